@@ -0,0 +1,217 @@
+import threading
+import time
+from collections import deque, namedtuple
+
+# =========================================================================
+# 事件总线
+# 进程内的发布/订阅：测试引擎、电机与各页签把日志和结构化事件（收发帧、移动、按压、测试项）发布到总线，
+# 日志页、日志落盘、测试流程卡片等各自订阅需要的事件类型。
+#
+# 每个订阅者有独立的有界队列，发布只是把事件对象追加到订阅了该类型的队列中，
+# 格式化、写文件、刷新界面都由订阅者在自己的线程中完成；队列满时丢弃最旧的事件并计数。
+# 没有订阅者的事件类型，发布方可以先用 wants() 判断，连事件对象都不创建。
+#
+# 路由表按事件类型保存订阅者元组，订阅变化时整体替换；发布时只读取，不需要加锁。
+# =========================================================================
+
+# 订阅者队列的默认容量（条）
+DEFAULT_QUEUE_SIZE = 10000
+
+# --- 事件类型 ---
+# 所有事件的第一个字段 ts_ns 为发生时刻 (time.monotonic_ns)
+
+# 文本日志: category 为日志分类，如 "SYS"
+LogMessage = namedtuple('LogMessage', ['ts_ns', 'category', 'message'])
+
+# 串口收发帧: port 为串口/设备名称，frame 为原始字节（超时无应答时 RxFrame.frame 为 None），desc 为指令说明
+TxFrame = namedtuple('TxFrame', ['ts_ns', 'port', 'frame', 'desc'])
+RxFrame = namedtuple('RxFrame', ['ts_ns', 'port', 'frame', 'desc'])
+
+# 电机移动: targets 为 ((轴名称, 当前位置, 目标位置), ...)；elapsed 为耗时（秒）
+MoveStarted = namedtuple('MoveStarted', ['ts_ns', 'targets'])
+MoveDone = namedtuple('MoveDone', ['ts_ns', 'ok', 'elapsed'])
+
+# 轴状态快照: 测试项前后各一次；phase 为 'before' / 'after'，registers 为 {寄存器地址: 值}（读取失败的不包含）
+AxisSnapshot = namedtuple('AxisSnapshot', ['ts_ns', 'item_index', 'phase', 'axis', 'registers'])
+
+# 按压: item_index 为测试项索引，press 为该测试项内的按压序号（从 1 开始）
+PressOn = namedtuple('PressOn', ['ts_ns', 'item_index', 'press'])
+PressOff = namedtuple('PressOff', ['ts_ns', 'item_index', 'press'])
+
+# 测试项: item 为测试项字典，result 为 TestEngine.run 返回的单项结果字典
+ItemStarted = namedtuple('ItemStarted', ['ts_ns', 'index', 'item'])
+ItemFinished = namedtuple('ItemFinished', ['ts_ns', 'index', 'result'])
+
+# 错误: source 为出错的模块/设备，message 为错误说明
+Error = namedtuple('Error', ['ts_ns', 'source', 'message'])
+
+
+class Subscription:
+    """
+    Subscription 类：一个订阅者的有界事件队列。
+    发布方（任意线程）追加，订阅方（单个线程）取出；队列满时丢弃最旧的事件。
+    """
+
+    def __init__(self, event_types, maxsize=DEFAULT_QUEUE_SIZE):
+        """
+        :param event_types: 订阅的事件类型元组
+        :param maxsize: 队列容量，None 表示不限
+        """
+        self.event_types = tuple(event_types)
+        self.maxsize = maxsize
+        self.dropped = 0      # 因队列满被丢弃的事件数
+        self.closed = False
+        self._queue = deque()
+        self._waiting = False
+        self._ready = threading.Event()
+
+    def __len__(self):
+        return len(self._queue)
+
+    def put(self, event):
+        """
+        追加一个事件（发布方调用）。
+
+        :param event: 事件对象
+        """
+        queue = self._queue
+        if self.maxsize is not None and len(queue) >= self.maxsize:
+            try:
+                queue.popleft()
+            except IndexError:
+                pass
+            self.dropped += 1
+        queue.append(event)
+        if self._waiting:
+            self._ready.set()
+
+    def drain(self, limit=None):
+        """
+        取出队列中的事件（不阻塞）。
+
+        :param limit: 最多取出的数量，None 表示全部
+        :return: 事件列表，按发布顺序
+        """
+        queue = self._queue
+        count = len(queue) if limit is None else min(limit, len(queue))
+        return [queue.popleft() for _ in range(count)]
+
+    def get(self, timeout=None):
+        """
+        取出一个事件，队列为空时等待（供后台线程使用）。
+
+        :param timeout: 最长等待时间（秒），None 表示一直等待
+        :return: 事件对象；超时或订阅已关闭且队列为空时返回 None
+        """
+        queue = self._queue
+        if not queue and not self.closed:
+            self._ready.clear()
+            self._waiting = True
+            # 设置等待标志后再检查一次，避免错过刚追加的事件
+            if not queue and not self.closed:
+                self._ready.wait(timeout)
+            self._waiting = False
+        try:
+            return queue.popleft()
+        except IndexError:
+            return None
+
+    def close(self):
+        """关闭订阅：不再接收新事件，唤醒正在等待的 get"""
+        self.closed = True
+        self._ready.set()
+
+
+class EventBus:
+    """
+    EventBus 类：进程内事件总线。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}  # {事件类型: (Subscription, ...)}
+
+    def subscribe(self, event_types, maxsize=DEFAULT_QUEUE_SIZE):
+        """
+        订阅事件。
+
+        :param event_types: 事件类型或事件类型元组
+        :param maxsize: 队列容量，None 表示不限
+        :return: Subscription 对象
+        """
+        if not isinstance(event_types, (tuple, list)):
+            event_types = (event_types,)
+        subscription = Subscription(event_types, maxsize)
+        with self._lock:
+            routes = dict(self._routes)
+            for event_type in subscription.event_types:
+                routes[event_type] = routes.get(event_type, ()) + (subscription,)
+            self._routes = routes
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """
+        取消订阅并关闭其队列。
+
+        :param subscription: subscribe 返回的 Subscription 对象
+        """
+        with self._lock:
+            routes = {}
+            for event_type, subscribers in self._routes.items():
+                subscribers = tuple(s for s in subscribers if s is not subscription)
+                if subscribers:
+                    routes[event_type] = subscribers
+            self._routes = routes
+        subscription.close()
+
+    def wants(self, event_type):
+        """
+        检查事件类型是否有订阅者；没有时发布方可以不创建事件对象。
+
+        :param event_type: 事件类型
+        :return: 是否有订阅者
+        """
+        return event_type in self._routes
+
+    def publish(self, event):
+        """
+        发布事件（可在任意线程中调用）。
+
+        :param event: 事件对象
+        """
+        for subscription in self._routes.get(type(event), ()):
+            subscription.put(event)
+
+    def publish_transaction(self, port, request, response, desc="", tx_ns=None):
+        """
+        发布一次串口收发 (TxFrame + RxFrame)；没有订阅者的类型不创建事件。
+
+        :param port: 串口/设备名称
+        :param request: 发送的帧
+        :param response: 应答帧，超时为 None
+        :param desc: 指令说明
+        :param tx_ns: 发送时刻 (time.monotonic_ns)，None 表示与应答时刻相同
+        """
+        routes = self._routes
+        if TxFrame not in routes and RxFrame not in routes:
+            return
+        now = time.monotonic_ns()
+        self.publish(TxFrame(tx_ns if tx_ns is not None else now, port, bytes(request), desc))
+        self.publish(RxFrame(now, port, bytes(response) if response else None, desc))
+
+    def log(self, message, category="SYS"):
+        """
+        发布一条文本日志，参数与 LogFrame.add_log 相同，可直接作为 log_callback 使用。
+
+        :param message: 消息内容
+        :param category: 日志分类
+        """
+        subscribers = self._routes.get(LogMessage)
+        if subscribers:
+            event = LogMessage(time.monotonic_ns(), category, message)
+            for subscription in subscribers:
+                subscription.put(event)
+
+
+# 全局事件总线，各页签、测试引擎与日志落盘共用
+BUS = EventBus()
@@ -0,0 +1,139 @@
+# =========================================================================
+# 测试流程顺序优化
+# 按绑定的 X/Y 脉冲坐标重新排列测试项，使电机总行程最短。
+# X/Y 两轴同时运动，一次移动的耗时取决于较慢的轴，因此距离采用切比雪夫距离
+# max(|dx|, |dy|)。先用最近邻构造初始路径，再用 2-opt 反转子路径逐步改进。
+# =========================================================================
+
+
+def travel_cost(a, b):
+    """
+    计算两个位置之间的移动代价（切比雪夫距离）。
+
+    :param a: (x_pulse, y_pulse)
+    :param b: (x_pulse, y_pulse)
+    :return: 移动代价（脉冲数）
+    """
+    return max(abs(a[0] - b[0]), abs(a[1] - b[1]))
+
+
+def path_length(points, order, start=None):
+    """
+    计算按指定顺序依次经过各点的总移动代价（开放路径，不返回起点）。
+
+    :param points: 坐标列表
+    :param order: 访问顺序（points 的索引列表）
+    :param start: 起始位置，None 表示从第一个点出发
+    :return: 总移动代价
+    """
+    total = 0
+    prev = start
+    for idx in order:
+        if prev is not None:
+            total += travel_cost(prev, points[idx])
+        prev = points[idx]
+    return total
+
+
+def nearest_neighbour(points, start=None):
+    """
+    最近邻法构造初始路径：每次走向距离当前位置最近的未访问点。
+
+    :param points: 坐标列表
+    :param start: 起始位置，None 表示从第一个点出发
+    :return: 访问顺序
+    """
+    if not points:
+        return []
+
+    remaining = list(range(len(points)))
+    if start is None:
+        order = [remaining.pop(0)]
+        current = points[order[0]]
+    else:
+        order = []
+        current = start
+
+    while remaining:
+        # 距离相同时保持原有先后顺序
+        nearest = min(remaining, key=lambda idx: travel_cost(current, points[idx]))
+        remaining.remove(nearest)
+        order.append(nearest)
+        current = points[nearest]
+    return order
+
+
+def two_opt(points, order, start=None, max_rounds=50):
+    """
+    2-opt 改进：反转路径中的一段，若总代价降低则保留，直到无法继续改进。
+
+    :param points: 坐标列表
+    :param order: 初始访问顺序
+    :param start: 起始位置，None 表示起点可以任意
+    :param max_rounds: 最多改进轮数
+    :return: 改进后的访问顺序
+    """
+    order = list(order)
+    n = len(order)
+
+    def position(i):
+        """路径上第 i 个位置的坐标；i == -1 时为起始位置"""
+        return start if i < 0 else points[order[i]]
+
+    for _ in range(max_rounds):
+        improved = False
+        for i in range(n - 1):
+            before = position(i - 1)
+            for j in range(i + 1, n):
+                after = points[order[j + 1]] if j + 1 < n else None
+
+                # 反转 order[i..j] 只改变两端的两条边
+                old = 0
+                new = 0
+                if before is not None:
+                    old += travel_cost(before, points[order[i]])
+                    new += travel_cost(before, points[order[j]])
+                if after is not None:
+                    old += travel_cost(points[order[j]], after)
+                    new += travel_cost(points[order[i]], after)
+
+                if new < old:
+                    order[i:j + 1] = reversed(order[i:j + 1])
+                    improved = True
+        if not improved:
+            break
+    return order
+
+
+def optimize_flow(test_flow, bindings, start=None):
+    """
+    按绑定坐标重新排列测试项，使电机总行程最短。
+    没有绑定坐标的测试项保持原有相对顺序，放在最后。
+    组合键测试项以主按键（keys 中的第一个）的坐标计算。
+
+    :param test_flow: 测试项列表
+    :param bindings: KeyManager.get_bindings() 返回的绑定列表
+    :param start: 起始位置 (x_pulse, y_pulse)，None 表示起点可以任意
+    :return: (新的测试项列表, 优化前行程, 优化后行程)
+    """
+    coords = {b['key_name']: (b.get('x_pulse', 0), b.get('y_pulse', 0)) for b in bindings}
+
+    def primary_key(item):
+        keys = item.get('keys')
+        return keys[0] if keys else item.get('key_name')
+
+    bound = [item for item in test_flow if primary_key(item) in coords]
+    unbound = [item for item in test_flow if primary_key(item) not in coords]
+    points = [coords[primary_key(item)] for item in bound]
+
+    original = list(range(len(points)))
+    before = path_length(points, original, start)
+
+    order = two_opt(points, nearest_neighbour(points, start), start)
+    after = path_length(points, order, start)
+    if after >= before:
+        # 没有改进时保持用户原有顺序
+        order = original
+        after = before
+
+    return [bound[idx] for idx in order] + unbound, before, after
@@ -0,0 +1,233 @@
+import argparse
+import datetime
+import json
+import signal
+import sys
+import threading
+import time
+import serial
+from config_manager import ConfigManager
+from key_manager import KeyManager
+from serial_worker import SerialWorker
+from register_shadow import RegisterShadow
+from move_engine import MotorAxis
+from test_engine import TestEngine
+from flow_optimizer import optimize_flow
+from log_trace import TRACE, TRACE_LEVELS
+
+# =========================================================================
+# 命令行测试入口 (jigctrl-run)
+# 不启动 Tk 界面，直接读取 config 目录下的 jigctrl_config.json 与 key_bindings.json，
+# 打开三个串口并使用与界面相同的 TestEngine 执行测试流程。
+# 进度与结果输出到标准输出，可选同时写入 JSONL 文件（每行一个事件）。
+#
+# 用法: python jigctrl_run.py [--jsonl results.jsonl] [--optimize-order] [--burst] [--quiet]
+# 退出码: 0 全部测试项完成，1 测试未全部完成，2 配置或串口错误
+# =========================================================================
+
+PORT_TITLES = ["X-Axis Motor", "Y-Axis Motor", "Relay (Solenoid)"]
+
+# 输出测试进度的最小间隔 (ns)
+PROGRESS_INTERVAL_NS = 1000000000
+
+
+class EventWriter:
+    """
+    EventWriter 类：把日志与进度事件输出到标准输出和 JSONL 文件。
+    测试线程与 I/O 线程都会调用，内部加锁保证每行完整。
+    """
+
+    def __init__(self, jsonl_path=None, quiet=False):
+        """
+        :param jsonl_path: JSONL 文件路径，"-" 表示以 JSONL 格式输出到标准输出，None 表示不输出 JSONL
+        :param quiet: 为 True 时标准输出不打印 COM/MOT 类日志
+        """
+        self.quiet = quiet
+        self.lock = threading.Lock()
+        self.jsonl_to_stdout = jsonl_path == "-"
+        self.jsonl_file = None
+        if jsonl_path and not self.jsonl_to_stdout:
+            self.jsonl_file = open(jsonl_path, 'a', encoding='utf-8')
+
+    def emit(self, event, **fields):
+        """写入一个 JSONL 事件"""
+        record = {'time': datetime.datetime.now().isoformat(timespec='milliseconds'), 'event': event}
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False)
+        with self.lock:
+            if self.jsonl_to_stdout:
+                print(line, flush=True)
+            if self.jsonl_file:
+                self.jsonl_file.write(line + "\n")
+                self.jsonl_file.flush()
+
+    def log(self, message, category="SYS"):
+        """日志回调，与 LogFrame.add_log 的参数相同"""
+        if not self.jsonl_to_stdout and not (self.quiet and category in ("COM", "MOT")):
+            now = datetime.datetime.now()
+            timestamp_str = now.strftime("%H:%M:%S") + f".{now.microsecond // 1000:03d}"
+            with self.lock:
+                print(f"[{timestamp_str}] [{category}] {message}", flush=True)
+        self.emit('log', category=category, message=message)
+
+    def progress(self, snapshot):
+        """
+        输出测试进度（调用方负责节流）。
+
+        :param snapshot: TestEngine.progress 发布的 TestProgress 快照
+        """
+        if not self.jsonl_to_stdout:
+            remaining = f", {snapshot.remaining_counts} remaining" if snapshot.mode == 'count' else ""
+            now = datetime.datetime.now()
+            timestamp_str = now.strftime("%H:%M:%S") + f".{now.microsecond // 1000:03d}"
+            with self.lock:
+                print(f"[{timestamp_str}] [PROG] Item {snapshot.item_index + 1}: {snapshot.presses} presses{remaining}",
+                      flush=True)
+        self.emit('progress', **snapshot._asdict())
+
+    def close(self):
+        """关闭 JSONL 文件"""
+        if self.jsonl_file:
+            self.jsonl_file.close()
+            self.jsonl_file = None
+
+
+def open_port(title, port_config, log):
+    """
+    按配置打开一个串口 (8-N-1)。
+
+    :param title: 串口名称
+    :param port_config: 配置文件中该串口的配置 {port, baud, ...}
+    :param log: 日志回调
+    :return: serial.Serial 对象，失败返回 None
+    """
+    if not port_config or not port_config.get('port'):
+        log(f"Error: No port configured for {title}", "ERR")
+        return None
+    try:
+        conn = serial.Serial(
+            port=port_config['port'],
+            baudrate=port_config.get('baud', 9600),
+            bytesize=8,
+            stopbits=1,
+            parity=serial.PARITY_NONE,
+            timeout=0.1
+        )
+    except Exception as e:
+        log(f"Error opening port {port_config['port']}: {e}", "ERR")
+        return None
+    log(f"{title} Port {port_config['port']} Opened successfully", "SER")
+    return conn
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="jigctrl-run", description="Run the JigCtrl test flow without the GUI.")
+    parser.add_argument("--config", default="jigctrl_config.json", help="config file name in the config directory")
+    parser.add_argument("--bindings", default="key_bindings.json", help="key bindings file name in the config directory")
+    parser.add_argument("--jsonl", help="append events to this JSONL file ('-' writes JSONL to stdout)")
+    parser.add_argument("--optimize-order", action="store_true", help="reorder test items to minimize motor travel")
+    parser.add_argument("--burst", action="store_true", help="high-rate press mode: no per-press log, timing summary per item")
+    parser.add_argument("--quiet", action="store_true", help="do not print COM/MOT log lines to stdout")
+    args = parser.parse_args(argv)
+
+    out = EventWriter(args.jsonl, args.quiet)
+    log = out.log
+    # --quiet 时标准输出不需要 COM/MOT 跟踪日志；写 JSONL 时仍订阅完整跟踪
+    if args.quiet:
+        for level in TRACE_LEVELS:
+            TRACE.set_enabled(level, False)
+    if args.jsonl:
+        for level in TRACE_LEVELS:
+            TRACE.subscribe(level)
+
+    # --- 加载配置 ---
+    config_manager = ConfigManager(args.config)
+    config = config_manager.load_config()
+    if config is None:
+        log(f"Error: Unable to load {config_manager.get_config_file_path()}", "ERR")
+        out.close()
+        return 2
+    log(f"Configuration loaded from {config_manager.get_config_file_path()}", "SET")
+
+    bindings = KeyManager(args.bindings).get_bindings()
+    test_flow = config.get('test_flow', [])
+    if not test_flow:
+        log("Error: Test flow is empty.", "ERR")
+        out.close()
+        return 2
+
+    if args.optimize_order:
+        test_flow, before, after = optimize_flow(test_flow, bindings)
+        log(f"Test flow reordered: travel {before} -> {after} pulses, saved {before - after}", "SET")
+
+    # --- 打开串口 ---
+    conns = {}
+    workers = []
+    try:
+        for title in PORT_TITLES:
+            conn = open_port(title, config.get(title), log)
+            if conn is None:
+                return 2
+            conns[title] = conn
+
+        axes = []
+        for name, title in (("X", "X-Axis Motor"), ("Y", "Y-Axis Motor")):
+            # 没有界面线程，回调直接在 I/O 线程中执行
+            worker = SerialWorker(conns[title], name=title, log_callback=log)
+            workers.append(worker)
+            axes.append(MotorAxis(name, conns[title], worker, RegisterShadow()))
+
+        # 按压进度每秒最多输出一次（测试项的最终按压次数见 item_done）
+        last_progress_ns = [0]
+
+        def on_progress(index, mode):
+            now = time.monotonic_ns()
+            snapshot = engine.progress.latest()
+            if snapshot is None or now - last_progress_ns[0] < PROGRESS_INTERVAL_NS:
+                return
+            last_progress_ns[0] = now
+            out.progress(snapshot)
+
+        engine = TestEngine(
+            conns["Relay (Solenoid)"], axes[0], axes[1], bindings, config,
+            log_callback=log,
+            on_item_start=lambda i, item: out.emit('item_start', index=i, key_name=item['key_name'],
+                                                   mode=item.get('mode'), target=item.get('target', 0)),
+            on_progress=on_progress,
+            on_item_done=lambda i, result: out.emit('item_done', **result),
+            burst=args.burst
+        )
+
+        # Ctrl+C / 调度器终止时请求停止，等待当前动作完成后退出
+        def request_stop(signum, frame):
+            log("Test Stop Requested (waiting for cycle to finish)", "TEST")
+            engine.stop_requested = True
+        signal.signal(signal.SIGINT, request_stop)
+        if hasattr(signal, 'SIGTERM'):
+            signal.signal(signal.SIGTERM, request_stop)
+
+        log("Test Started", "TEST")
+        results = engine.run(test_flow)
+        log("Test Finished/Stopped", "TEST")
+
+        completed = sum(1 for r in results if r['status'] == 'completed')
+        out.emit('summary', items=len(test_flow), completed=completed,
+                 presses=sum(r['presses'] for r in results), results=results)
+        if not out.jsonl_to_stdout:
+            for r in results:
+                print(f"  {r['index'] + 1:>3}. {r['key_name']:<20} {r['status']:<12} {r['presses']} presses")
+            print(f"{completed}/{len(test_flow)} items completed")
+        return 0 if completed == len(test_flow) else 1
+    finally:
+        for worker in workers:
+            worker.stop()
+        for conn in conns.values():
+            try:
+                conn.close()
+            except Exception:
+                pass
+        out.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -177,13 +177,14 @@ class KeyManager:
             return config['bindings']
         return []
     
-    def add_binding(self, key_name: str, x_pulse: int, y_pulse: int) -> bool:
+    def add_binding(self, key_name: str, x_pulse: int, y_pulse: int, relay_channel: int = 1) -> bool:
         """
         添加按键绑定。
         
         :param key_name: 按键名称
         :param x_pulse: X轴脉冲数
         :param y_pulse: Y轴脉冲数
+        :param relay_channel: 按压该按键的电磁铁所接的继电器通道
         :return: 是否添加成功
         """
         config = self.load_config()
@@ -196,7 +197,8 @@ class KeyManager:
         binding = {
             'key_name': key_name,
             'x_pulse': x_pulse,
-            'y_pulse': y_pulse
+            'y_pulse': y_pulse,
+            'relay_channel': relay_channel
         }
         
         config['bindings'].append(binding)
@@ -233,6 +235,22 @@ class KeyManager:
                     return self.save_config(config)
         return False
     
+    def set_relay_channel(self, key_name: str, relay_channel: int) -> bool:
+        """
+        设置按键绑定的继电器通道。
+        
+        :param key_name: 按键名称
+        :param relay_channel: 继电器通道号
+        :return: 是否设置成功
+        """
+        config = self.load_config()
+        if config and 'bindings' in config:
+            for binding in config['bindings']:
+                if binding['key_name'] == key_name:
+                    binding['relay_channel'] = relay_channel
+                    return self.save_config(config)
+        return False
+    
     def clear_bindings(self) -> bool:
         """
         清空所有按键绑定。
@@ -0,0 +1,51 @@
+from functools import lru_cache
+
+# =========================================================================
+# LC 多路继电器模块通信协议
+# 指令帧 4 字节：起始标识 (0xA0) + 通道号 + 状态 (0x01 吸合 / 0x00 断开) + 校验和
+# 校验和为前三个字节之和的低 8 位，例如通道 1 吸合: A0 01 01 A2。
+# =========================================================================
+
+# 起始标识
+FRAME_HEADER = 0xA0
+
+# 继电器状态
+STATE_OFF = 0x00
+STATE_ON = 0x01
+
+# 默认通道（单路继电器模块只有通道 1）
+DEFAULT_CHANNEL = 1
+
+# 通道号范围（常见模块为 1/2/4/8/16 路）
+MIN_CHANNEL = 1
+MAX_CHANNEL = 16
+
+
+@lru_cache(maxsize=64)
+def build_relay_frame(channel, on):
+    """
+    构建单个通道的继电器控制指令。
+
+    :param channel: 通道号 (1 - 16)
+    :param on: True 吸合，False 断开
+    :return: 4 字节指令帧
+    :raises ValueError: 通道号超出范围
+    """
+    if not MIN_CHANNEL <= channel <= MAX_CHANNEL:
+        raise ValueError(f"Relay channel {channel} out of range {MIN_CHANNEL}-{MAX_CHANNEL}")
+    state = STATE_ON if on else STATE_OFF
+    return bytes((FRAME_HEADER, channel, state, (FRAME_HEADER + channel + state) & 0xFF))
+
+
+def build_chord_frames(channels):
+    """
+    构建同时控制多个通道的指令：各通道的指令帧拼接后一次写入，
+    所有通道在同一个时间窗口内吸合/断开。
+
+    :param channels: 通道号列表（可重复，按升序去重）
+    :return: (吸合指令, 断开指令)
+    """
+    channels = sorted(set(channels))
+    on_frame = b''.join(build_relay_frame(ch, True) for ch in channels)
+    off_frame = b''.join(build_relay_frame(ch, False) for ch in channels)
+    return on_frame, off_frame
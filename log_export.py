@@ -0,0 +1,256 @@
+import csv
+import datetime
+import gzip
+import io
+import json
+import os
+
+# =========================================================================
+# 日志导出
+# 在后台线程中把日志逐条写入导出文件，不经过界面组件，也不在内存中拼接整个文件。
+# 数据来源：
+#   - 已被内存存储覆盖的早期记录：从 LogSink 写入的分段文件（含 .gz）中按行读取；
+#   - 内存中的记录：导出开始时在界面线程中取得的 LogRecord 列表（快照，不受后续写入影响）。
+# 导出格式按文件扩展名决定：.jsonl 每行一个 JSON 对象，.csv 带表头，其它为文本日志行。
+# =========================================================================
+
+# 导出格式
+FORMAT_JSONL = 'jsonl'
+FORMAT_CSV = 'csv'
+FORMAT_TEXT = 'text'
+
+# 估算进度时每条内存记录折算的字节数（与分段文件的字节数合并计算进度）
+RECORD_WEIGHT = 64
+
+
+def export_format(file_path):
+    """
+    按文件扩展名确定导出格式。
+
+    :param file_path: 导出文件路径
+    :return: FORMAT_JSONL / FORMAT_CSV / FORMAT_TEXT
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext in ('.jsonl', '.json'):
+        return FORMAT_JSONL
+    if ext == '.csv':
+        return FORMAT_CSV
+    return FORMAT_TEXT
+
+
+class LogFilter:
+    """
+    LogFilter 类：导出分段文件中的记录时使用的筛选条件，与日志索引的筛选规则一致。
+    """
+
+    def __init__(self, start_time=None, end_time=None, category="", keyword=""):
+        """
+        :param start_time: 起始时间 (datetime对象，包含)
+        :param end_time: 结束时间 (datetime对象，包含)
+        :param category: 分类关键字（分类名称包含即可，不区分大小写）
+        :param keyword: 消息关键字（不区分大小写的子串匹配）
+        """
+        self.start_ns = int(start_time.timestamp() * 1e9) if start_time else None
+        self.end_ns = int(end_time.timestamp() * 1e9) if end_time else None
+        self.category = category.upper()
+        self.keyword = keyword.lower()
+
+    def match(self, wall_ns, category, message):
+        """
+        检查一条记录是否满足条件。
+
+        :param wall_ns: 墙上时钟时刻（纳秒，Unix 时间）
+        :param category: 分类名称
+        :param message: 消息内容
+        :return: 是否满足
+        """
+        if self.start_ns is not None and wall_ns < self.start_ns:
+            return False
+        if self.end_ns is not None and wall_ns > self.end_ns:
+            return False
+        if self.category and self.category not in category.upper():
+            return False
+        if self.keyword and self.keyword not in message.lower():
+            return False
+        return True
+
+
+class SegmentReader:
+    """
+    SegmentReader 类：逐行解析 LogSink 分段文件。
+    行格式: [YYYY-MM-DD HH:MM:SS.mmm] [CAT] message，消息中的 "\\n" 还原为换行。
+    同一秒内的行只换算一次时间。
+    """
+
+    def __init__(self):
+        self._second_key = None
+        self._second_ns = 0
+
+    def parse(self, line):
+        """
+        解析一行。
+
+        :param line: 分段文件中的一行
+        :return: (墙上时钟时刻 ns, 分类, 消息)，格式不符时返回 None
+        """
+        if len(line) < 29 or line[0] != '[' or line[24:27] != '] [':
+            return None
+        end = line.find('] ', 27)
+        if end < 0:
+            return None
+        try:
+            key = line[1:20]
+            if key != self._second_key:
+                dt = datetime.datetime(int(key[0:4]), int(key[5:7]), int(key[8:10]),
+                                       int(key[11:13]), int(key[14:16]), int(key[17:19]))
+                self._second_ns = int(dt.timestamp()) * 1000000000
+                self._second_key = key
+            wall_ns = self._second_ns + int(line[21:24]) * 1000000
+        except ValueError:
+            return None
+        message = line[end + 2:].rstrip('\n').replace("\\n", "\n")
+        return wall_ns, line[27:end], message
+
+    def open(self, path):
+        """
+        打开分段文件（自动识别 .gz）。
+
+        :param path: 分段文件路径
+        :return: (文本文件对象, 底层二进制文件对象)；底层文件的读取位置用于计算进度
+        """
+        raw = open(path, 'rb')
+        stream = gzip.GzipFile(fileobj=raw, mode='rb') if path.endswith('.gz') else raw
+        return io.TextIOWrapper(stream, encoding='utf-8', errors='replace'), raw
+
+
+class LogExporter:
+    """
+    LogExporter 类：一次日志导出任务，run 在后台线程中执行。
+    进度以 (已完成, 总量) 元组整体替换，界面线程可随时读取。
+    """
+
+    def __init__(self, file_path, records, wall_offset_ns, segment_paths=(), segment_from_ns=None,
+                 segment_before_ns=None, log_filter=None):
+        """
+        :param file_path: 导出文件路径
+        :param records: 内存中需要导出的 LogRecord 列表（已按筛选条件选好）
+        :param wall_offset_ns: LogStore 的单调时钟到墙上时钟的偏移
+        :param segment_paths: 需要读取的分段文件（按时间先后）
+        :param segment_from_ns: 分段文件中只导出不早于该时刻的记录（墙上时钟 ns），None 表示不限
+        :param segment_before_ns: 分段文件中只导出早于该时刻的记录（内存中最早记录的时刻），None 表示不读分段文件
+        :param log_filter: 分段文件记录的筛选条件 (LogFilter)，None 表示不筛选
+        """
+        self.file_path = file_path
+        self.format = export_format(file_path)
+        self.records = records
+        self.wall_offset_ns = wall_offset_ns
+        self.segment_paths = list(segment_paths) if segment_before_ns is not None else []
+        self.segment_from_ns = segment_from_ns
+        # 分段文件的时间只精确到毫秒：分界所在的这一毫秒全部取自分段文件，内存记录从下一毫秒开始
+        self.boundary_ns = segment_before_ns // 1000000 * 1000000 if segment_before_ns is not None else None
+        self.log_filter = log_filter
+
+        self.count = 0          # 已导出的记录数
+        self.progress = (0, 1)  # (已完成, 总量)
+        self.error = None       # 导出失败的异常
+        self.done = False
+
+    def run(self):
+        """
+        执行导出（阻塞）。
+
+        :return: 导出的记录数；失败时返回 None，异常保存在 error
+        """
+        try:
+            with open(self.file_path, 'w', encoding='utf-8', newline='') as f:
+                write = self._writer(f)
+                self._export_segments(write)
+                self._export_records(write)
+            return self.count
+        except (OSError, ValueError) as e:
+            self.error = e
+            return None
+        finally:
+            self.done = True
+
+    def _writer(self, f):
+        """按导出格式创建写入函数 write(wall_ns, category, message)"""
+        def timestamp(wall_ns):
+            return datetime.datetime.fromtimestamp(wall_ns / 1e9).isoformat(timespec='milliseconds')
+
+        if self.format == FORMAT_JSONL:
+            def write(wall_ns, category, message):
+                f.write(json.dumps({'time': timestamp(wall_ns), 'category': category, 'message': message},
+                                   ensure_ascii=False))
+                f.write("\n")
+        elif self.format == FORMAT_CSV:
+            writer = csv.writer(f)
+            writer.writerow(['time', 'category', 'message'])
+
+            def write(wall_ns, category, message):
+                writer.writerow((timestamp(wall_ns), category, message))
+        else:
+            def write(wall_ns, category, message):
+                dt = datetime.datetime.fromtimestamp(wall_ns / 1e9)
+                f.write(f"[{dt.strftime('%H:%M:%S')}.{dt.microsecond // 1000:03d}] [{category}] {message}\n")
+        return write
+
+    def _export_segments(self, write):
+        """导出分段文件中早于内存记录的部分"""
+        paths = []
+        for path in self.segment_paths:
+            # 导出期间分段文件可能已被压缩
+            if not os.path.exists(path) and os.path.exists(path + ".gz"):
+                path += ".gz"
+            if os.path.exists(path):
+                paths.append(path)
+
+        segment_total = sum(os.path.getsize(path) for path in paths)
+        total = segment_total + len(self.records) * RECORD_WEIGHT
+        self.progress = (0, max(total, 1))
+
+        reader = SegmentReader()
+        log_filter = self.log_filter
+        from_ns = self.segment_from_ns
+        boundary_ns = self.boundary_ns
+        done = 0
+        for path in paths:
+            text, raw = reader.open(path)
+            with text:
+                for n, line in enumerate(text):
+                    parsed = reader.parse(line)
+                    if parsed is None:
+                        continue
+                    wall_ns, category, message = parsed
+                    if wall_ns > boundary_ns:
+                        # 之后的记录都在内存中
+                        self.progress = (segment_total, self.progress[1])
+                        return
+                    if from_ns is not None and wall_ns < from_ns:
+                        continue
+                    if log_filter is None or log_filter.match(wall_ns, category, message):
+                        write(wall_ns, category, message)
+                        self.count += 1
+                    if n % 1024 == 0:
+                        self.progress = (done + raw.tell(), self.progress[1])
+            done += os.path.getsize(path)
+            self.progress = (done, self.progress[1])
+
+    def _export_records(self, write):
+        """导出内存中的记录"""
+        total = self.progress[1]
+        base = total - len(self.records) * RECORD_WEIGHT
+        offset = self.wall_offset_ns
+        records = self.records
+        if self.boundary_ns is not None:
+            # 跳过分界毫秒内已从分段文件导出的记录
+            first = 0
+            while first < len(records) and records[first].ts_ns + offset < self.boundary_ns + 1000000:
+                first += 1
+            records = records[first:]
+        for n, record in enumerate(records):
+            write(record.ts_ns + offset, record.category, record.message)
+            self.count += 1
+            if n % 1024 == 0:
+                self.progress = (base + n * RECORD_WEIGHT, total)
+        self.progress = (total, total)
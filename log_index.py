@@ -0,0 +1,238 @@
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from log_store import category_name
+
+# =========================================================================
+# 日志索引
+# 为 LogStore 中的记录建立倒排索引，筛选时不再逐条扫描全部日志：
+#   - 时间：记录按序号递增且时间戳不减，直接对存储二分查找起止序号；
+#   - 分类：每个分类一个升序序号列表 (posting list)；
+#   - 关键字：消息按单词 (\w+，小写) 切分，每个单词一个序号列表。
+#     查询时先找出包含查询单词的所有索引单词，取其序号列表的并集作为候选；
+#     分类与各查询单词中候选最少的一项作为起点，其余条件与完整的关键字子串逐条校验，
+#     结果与逐条扫描 "keyword in message" 一致。
+# 索引只在界面线程中更新；查询可以在后台线程 (FilterTask) 中分块执行，
+# 查询期间界面线程暂停清理索引，新记录只追加在查询范围之后，不影响查询结果。
+# =========================================================================
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# 后台查询每次校验的候选记录数
+QUERY_CHUNK = 20000
+
+
+def tokenize(text):
+    """
+    把文本切分为小写单词集合。
+
+    :param text: 文本
+    :return: 单词集合
+    """
+    return set(_TOKEN_RE.findall(text.lower()))
+
+
+def _slice_range(postings, lo, hi):
+    """取升序序号列表中位于 [lo, hi) 的部分"""
+    return postings[bisect_left(postings, lo):bisect_left(postings, hi)]
+
+
+class LogIndex:
+    """
+    LogIndex 类：日志存储的分类与关键字索引。
+    记录被存储覆盖后（所有记录已由 LogSink 写入磁盘），对应的序号在累计到一定数量时批量清理。
+    """
+
+    def __init__(self, store):
+        """
+        :param store: LogStore 对象
+        """
+        self.store = store
+        self.categories = {}  # {分类编号: array('q') 序号列表}
+        self.tokens = {}      # {单词: array('q') 序号列表}
+        self.pruned_seq = 0   # 上次清理时的 first_seq
+        self.tasks = []       # 正在后台执行的查询 (FilterTask)，执行期间不清理索引
+
+    def add(self, record):
+        """
+        为新记录建立索引（在 LogStore.append 之后调用）。
+
+        :param record: LogRecord
+        """
+        seq = record.seq
+        postings = self.categories.get(record.cat_id)
+        if postings is None:
+            postings = self.categories[record.cat_id] = array('q')
+        postings.append(seq)
+
+        tokens = self.tokens
+        for token in tokenize(record.message):
+            postings = tokens.get(token)
+            if postings is None:
+                postings = tokens[token] = array('q')
+            postings.append(seq)
+
+        # 被覆盖的记录超过容量的一半时清理一次
+        if self.store.first_seq - self.pruned_seq > self.store.capacity // 2:
+            if self.tasks:
+                self.tasks = [task for task in self.tasks if not task.done]
+            if not self.tasks:
+                self.prune()
+
+    def prune(self):
+        """删除已不在内存中的记录的序号，并移除不再出现的单词"""
+        first = self.store.first_seq
+        for table in (self.categories, self.tokens):
+            for key in list(table):
+                postings = table[key]
+                cut = bisect_left(postings, first)
+                if cut == len(postings):
+                    del table[key]
+                elif cut:
+                    del postings[:cut]
+        self.pruned_seq = first
+
+    def clear(self):
+        """清空索引（与 LogStore.clear 一起调用）"""
+        self.categories = {}
+        self.tokens = {}
+        self.pruned_seq = self.store.first_seq
+
+    def query(self, start_ns=None, end_ns=None, category="", keyword=""):
+        """
+        查找满足条件的记录（阻塞）。
+
+        :param start_ns: 起始时刻 (monotonic_ns，包含)，None 表示不限
+        :param end_ns: 结束时刻 (monotonic_ns，包含)，None 表示不限
+        :param category: 分类关键字，匹配分类名称中包含该字符串的分类（不区分大小写）
+        :param keyword: 消息关键字（不区分大小写的子串匹配）
+        :return: 升序排列的记录序号列表
+        """
+        result = []
+        for part, _, _ in self.query_iter(start_ns, end_ns, category, keyword):
+            result.extend(part)
+        return result
+
+    def query_iter(self, start_ns=None, end_ns=None, category="", keyword="", chunk=QUERY_CHUNK):
+        """
+        分块查找满足条件的记录，参数与 query 相同。每校验完一块候选记录产出一次结果。
+
+        :param chunk: 每块的候选记录数
+        :return: 生成器，依次产出 (本块结果序号列表, 已校验候选数, 候选总数)
+        """
+        store = self.store
+        lo = store.first_seq if start_ns is None else store.bisect_time(start_ns)
+        hi = store.next_seq if end_ns is None else store.bisect_time(end_ns + 1)
+        if lo >= hi:
+            return
+
+        # 各条件的候选序号列表，只展开其中最短的一个，其余条件逐条校验
+        # （先复制字典的键，界面线程同时新增分类或单词不影响遍历）
+        categories = self.categories
+        cat_ids = None
+        options = []  # [(候选数量, [序号列表...])]
+        if category:
+            query = category.upper()
+            cat_ids = {cid for cid in list(categories) if query in category_name(cid).upper()}
+            lists = [_slice_range(categories[cid], lo, hi) for cid in cat_ids]
+            if not lists:
+                return
+            options.append((sum(map(len, lists)), lists))
+
+        keyword = keyword.lower()
+        words = tokenize(keyword)
+        tokens = self.tokens
+        vocabulary = list(tokens) if words else []
+        for word in words:
+            lists = [_slice_range(tokens[token], lo, hi) for token in vocabulary if word in token]
+            total = sum(map(len, lists))
+            if not total:
+                return
+            options.append((total, lists))
+
+        if options:
+            best = min(options, key=lambda option: option[0])
+            lists = best[1]
+            candidates = lists[0] if len(lists) == 1 else sorted(set().union(*lists))
+            if category and best is options[0]:
+                # 候选直接来自分类索引，不需要再校验分类
+                cat_ids = None
+        else:
+            candidates = range(lo, hi)
+
+        total = len(candidates)
+        for start in range(0, total, chunk):
+            part = candidates[start:start + chunk]
+            done = min(start + chunk, total)
+            if cat_ids is None and not keyword:
+                yield list(part), done, total
+                continue
+
+            # 单词索引只能缩小范围，关键字中的空格、标点等仍需按原文校验
+            result = []
+            for seq in part:
+                record = self._live_record(seq)
+                if record is None:
+                    continue
+                if cat_ids is not None and record.cat_id not in cat_ids:
+                    continue
+                if keyword and keyword not in record.message.lower():
+                    continue
+                result.append(seq)
+            yield result, done, total
+
+    def _live_record(self, seq):
+        """获取仍在内存中的记录；在后台线程中读取时记录可能刚被覆盖，此时返回 None"""
+        try:
+            record = self.store.get(seq)
+        except IndexError:
+            return None
+        return record if record is not None and record.seq == seq else None
+
+
+class FilterTask:
+    """
+    FilterTask 类：在后台线程中分块执行一次日志查询。
+    结果逐块追加到 results 列表（升序），界面线程可随时读取已得到的部分结果；
+    进度以 (已校验候选数, 候选总数) 元组整体替换。
+    """
+
+    def __init__(self, index, start_ns=None, end_ns=None, category="", keyword=""):
+        """
+        :param index: LogIndex 对象
+        :param start_ns: 起始时刻 (monotonic_ns，包含)，None 表示不限
+        :param end_ns: 结束时刻 (monotonic_ns，包含)，None 表示不限
+        :param category: 分类关键字
+        :param keyword: 消息关键字
+        """
+        self.index = index
+        self.args = (start_ns, end_ns, category, keyword)
+        self.results = []
+        self.progress = (0, 0)
+        self.error = None
+        self.done = False
+        self.cancelled = False
+
+    def start(self):
+        """启动后台查询（在界面线程中调用）"""
+        self.index.tasks.append(self)
+        threading.Thread(target=self._run, name="LogFilter", daemon=True).start()
+
+    def cancel(self):
+        """请求取消，后台线程在下一块开始前退出"""
+        self.cancelled = True
+
+    def _run(self):
+        """后台线程：逐块查询并追加结果"""
+        try:
+            for part, done, total in self.index.query_iter(*self.args):
+                if self.cancelled:
+                    break
+                self.results.extend(part)
+                self.progress = (done, total)
+        except Exception as e:
+            # 查询期间日志被清空等情况
+            self.error = e
+        finally:
+            self.done = True
@@ -0,0 +1,246 @@
+import datetime
+import gzip
+import os
+import shutil
+import threading
+import time
+from event_bus import LogMessage, Subscription
+
+# =========================================================================
+# 日志落盘
+# 后台线程把每条日志追加写入 logs 目录下的分段文件，按大小或时长切换新分段；
+# 写完的分段由独立线程压缩为 .log.gz。写入线程约每秒 flush + fsync 一次，
+# 程序崩溃最多丢失约 1 秒的日志，界面不需要在内存中保留全部历史。
+#
+# 分段文件每行一条日志: [YYYY-MM-DD HH:MM:SS.mmm] [CAT] message
+# 消息中的换行写为 "\n" 两个字符，保证一行一条记录。
+# =========================================================================
+
+# 单个分段文件的最大大小（字符数，近似字节数）
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+# 单个分段文件的最长写入时间（秒）
+DEFAULT_MAX_SECONDS = 3600
+
+# flush + fsync 的周期（秒）
+DEFAULT_SYNC_INTERVAL = 1.0
+
+# 一次从队列中连续取出的最多记录数
+WRITE_BATCH = 1000
+
+# 待写入队列的容量（条），写盘长时间阻塞时丢弃最旧的记录
+QUEUE_SIZE = 200000
+
+SEGMENT_PREFIX = "jigctrl_"
+SEGMENT_SUFFIX = ".log"
+
+
+def default_log_dir():
+    """
+    获取默认的日志目录（程序所在目录下的 logs 文件夹）。
+
+    :return: logs 文件夹的绝对路径
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
+
+
+def format_line(wall_ns, category, message):
+    """
+    格式化分段文件中的一行。
+
+    :param wall_ns: 墙上时钟时刻（纳秒，Unix 时间）
+    :param category: 分类名称
+    :param message: 消息内容
+    :return: 以换行结尾的日志行
+    """
+    dt = datetime.datetime.fromtimestamp(wall_ns / 1e9)
+    message = message.replace("\n", "\\n")
+    return f"[{dt.strftime('%Y-%m-%d %H:%M:%S')}.{dt.microsecond // 1000:03d}] [{category}] {message}\n"
+
+
+def compress_segment(path):
+    """
+    把分段文件压缩为 path + ".gz"，成功后删除原文件。
+
+    :param path: 分段文件路径
+    """
+    gz_path = path + ".gz"
+    with open(path, 'rb') as src, open(gz_path, 'wb') as raw:
+        with gzip.GzipFile(filename=os.path.basename(path), mode='wb', fileobj=raw) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.remove(path)
+
+
+class LogSink:
+    """
+    LogSink 类：后台日志写入器。
+    订阅事件总线上的 LogMessage（或由 write 在任意线程中提交），只把记录放入队列；
+    格式化、写文件、切换分段都在写入线程中完成。
+    """
+
+    def __init__(self, log_dir, wall_offset_ns=None, max_bytes=DEFAULT_MAX_BYTES,
+                 max_seconds=DEFAULT_MAX_SECONDS, sync_interval=DEFAULT_SYNC_INTERVAL, bus=None):
+        """
+        :param log_dir: 日志目录
+        :param wall_offset_ns: 单调时钟到墙上时钟的偏移（与 LogStore 一致），None 时自行计算
+        :param max_bytes: 单个分段文件的最大大小
+        :param max_seconds: 单个分段文件的最长写入时间（秒）
+        :param sync_interval: flush + fsync 的周期（秒）
+        :param bus: 订阅日志的事件总线 (EventBus)，None 表示只接收 write 提交的记录
+        """
+        self.log_dir = log_dir
+        if wall_offset_ns is None:
+            wall_offset_ns = time.time_ns() - time.monotonic_ns()
+        self.wall_offset_ns = wall_offset_ns
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.sync_interval = sync_interval
+
+        self.error = None           # 最近一次写入失败的异常
+        self.segment_path = None    # 当前分段文件路径
+        self.session_segments = []  # 本次运行写入的分段文件（未压缩时的路径），按时间先后
+        self._file = None
+        self._segment_bytes = 0
+        self._segment_started = 0.0
+        self._dirty = False
+        self._last_sync = 0.0
+
+        self.bus = bus
+        self.events = bus.subscribe(LogMessage, QUEUE_SIZE) if bus else Subscription((LogMessage,), QUEUE_SIZE)
+        self._compressors = []
+
+        os.makedirs(log_dir, exist_ok=True)
+        # 上次运行（或异常退出）遗留的未压缩分段
+        self._compress_later([os.path.join(log_dir, name) for name in sorted(os.listdir(log_dir))
+                              if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)])
+
+        self._thread = threading.Thread(target=self._run, name="LogSink", daemon=True)
+        self._thread.start()
+
+    def write(self, ts_ns, category, message):
+        """
+        提交一条日志（可在任意线程中调用）。
+
+        :param ts_ns: 记录时刻 (time.monotonic_ns)
+        :param category: 分类名称
+        :param message: 消息内容
+        """
+        self.events.put(LogMessage(ts_ns, category, message))
+
+    def close(self, timeout=5.0):
+        """
+        写完队列中的日志后关闭当前分段（不压缩，下次启动时压缩），并等待正在进行的压缩结束。
+
+        :param timeout: 最长等待时间（秒）
+        """
+        if self.bus:
+            self.bus.unsubscribe(self.events)
+        else:
+            self.events.close()
+        self._thread.join(timeout)
+        for thread in self._compressors:
+            thread.join(timeout)
+
+    # =========================================================================
+    # 写入线程
+    # =========================================================================
+    def _run(self):
+        """写入线程主循环"""
+        events = self.events
+        while True:
+            item = events.get(timeout=self.sync_interval)
+            if item is None:
+                # 订阅已关闭且队列中的记录都已写完
+                if events.closed:
+                    break
+            else:
+                lines = [item]
+                lines.extend(events.drain(WRITE_BATCH - 1))
+                self._write(lines)
+            self._maybe_rotate_or_sync()
+        self._close_segment()
+
+    def _write(self, items):
+        """格式化并写入一批记录"""
+        offset = self.wall_offset_ns
+        text = "".join(format_line(ts_ns + offset, category, message) for ts_ns, category, message in items)
+        try:
+            if self._file is None:
+                self._open_segment()
+            self._file.write(text)
+        except OSError as e:
+            self.error = e
+            return
+        self._segment_bytes += len(text)
+        self._dirty = True
+
+    def _maybe_rotate_or_sync(self):
+        """分段超过大小或时长时切换新分段，否则按周期 flush + fsync"""
+        if self._file is None:
+            return
+        now = time.monotonic()
+        if self._segment_bytes >= self.max_bytes or now - self._segment_started >= self.max_seconds:
+            path = self.segment_path
+            self._close_segment()
+            self._compress_later([path])
+        elif self._dirty and now - self._last_sync >= self.sync_interval:
+            self._sync()
+
+    def _open_segment(self):
+        """新建分段文件"""
+        stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self.log_dir, f"{SEGMENT_PREFIX}{stamp}{SEGMENT_SUFFIX}")
+        n = 1
+        while os.path.exists(path) or os.path.exists(path + ".gz"):
+            path = os.path.join(self.log_dir, f"{SEGMENT_PREFIX}{stamp}_{n}{SEGMENT_SUFFIX}")
+            n += 1
+        self._file = open(path, 'a', encoding='utf-8')
+        self.segment_path = path
+        self.session_segments.append(path)
+        self._segment_bytes = 0
+        self._segment_started = time.monotonic()
+        self._last_sync = self._segment_started
+
+    def _sync(self):
+        """把已写入的日志刷到磁盘"""
+        try:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        except OSError as e:
+            self.error = e
+        self._dirty = False
+        self._last_sync = time.monotonic()
+
+    def _close_segment(self):
+        """flush + fsync 后关闭当前分段"""
+        if self._file is None:
+            return
+        self._sync()
+        try:
+            self._file.close()
+        except OSError as e:
+            self.error = e
+        self._file = None
+        self.segment_path = None
+
+    # =========================================================================
+    # 压缩
+    # =========================================================================
+    def _compress_later(self, paths):
+        """在独立线程中压缩写完的分段，不占用写入线程"""
+        if not paths:
+            return
+        self._compressors = [t for t in self._compressors if t.is_alive()]
+        thread = threading.Thread(target=self._compress, args=(paths,), name="LogSinkCompress", daemon=True)
+        self._compressors.append(thread)
+        thread.start()
+
+    def _compress(self, paths):
+        """压缩线程：依次压缩分段文件"""
+        for path in paths:
+            try:
+                compress_segment(path)
+            except OSError as e:
+                self.error = e
@@ -0,0 +1,194 @@
+import datetime
+import sys
+import time
+
+# =========================================================================
+# 日志内存存储
+# 固定容量的环形缓冲区，每条日志只保存 (序号, 单调时钟时间戳, 分类编号, 消息) 四个字段，
+# 显示用的完整日志行在需要时才格式化。缓冲区满后最旧的记录直接被覆盖（全部日志已由 LogSink 落盘），
+# 长时间测试的内存占用保持恒定。
+# 只有界面线程写入（append / clear），不加锁。后台筛选线程 (FilterTask) 会同时读取：
+# 记录对象创建后不再修改，槽位替换与 first_seq / next_seq 的更新都是单次赋值，在 GIL 下是原子的，
+# 读取方至多看到刚被覆盖的槽位，按记录自身的 seq 校验后丢弃即可 (LogIndex._live_record)。
+# =========================================================================
+
+# 默认容量（条）
+DEFAULT_CAPACITY = 200000
+
+# 分类名称 <-> 编号，同一分类只保存一个字符串
+_category_ids = {}
+_category_names = []
+
+
+def category_id(name):
+    """
+    获取分类编号，首次出现的分类自动登记。
+
+    :param name: 分类名称，如 "SYS"
+    :return: 分类编号
+    """
+    cid = _category_ids.get(name)
+    if cid is None:
+        cid = len(_category_names)
+        _category_names.append(sys.intern(name))
+        _category_ids[name] = cid
+    return cid
+
+
+def category_name(cid):
+    """
+    获取分类编号对应的名称。
+
+    :param cid: 分类编号
+    :return: 分类名称
+    """
+    return _category_names[cid]
+
+
+class LogRecord:
+    """
+    LogRecord 类：一条日志记录。
+    """
+
+    __slots__ = ('seq', 'ts_ns', 'cat_id', 'message')
+
+    def __init__(self, seq, ts_ns, cat_id, message):
+        self.seq = seq          # 序号，从 0 开始连续递增
+        self.ts_ns = ts_ns      # 记录时刻 (time.monotonic_ns)
+        self.cat_id = cat_id    # 分类编号
+        self.message = message  # 消息内容
+
+    @property
+    def category(self):
+        """分类名称"""
+        return _category_names[self.cat_id]
+
+
+class LogStore:
+    """
+    LogStore 类：固定容量的日志环形缓冲区。
+    记录按序号连续存放，序号 seq 位于槽位 seq % capacity；
+    first_seq 到 next_seq - 1 之间的记录在内存中，更早的记录已被覆盖。
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        """
+        :param capacity: 内存中保留的最多记录数
+        """
+        self.capacity = capacity
+        self._ring = [None] * capacity
+        self.first_seq = 0   # 内存中最旧记录的序号
+        self.next_seq = 0    # 下一条记录的序号
+        self.last_ts_ns = 0  # 最新记录的时间戳
+
+        # 单调时钟到墙上时钟的偏移，显示时间 = 单调时钟时间戳 + 偏移
+        self.wall_offset_ns = time.time_ns() - time.monotonic_ns()
+
+    def __len__(self):
+        return self.next_seq - self.first_seq
+
+    def __iter__(self):
+        return self.records(self.first_seq, self.next_seq)
+
+    def append(self, ts_ns, category, message):
+        """
+        追加一条记录。缓冲区已满时覆盖最旧的记录。
+        多个线程的日志进入队列的先后与取时间戳的先后可能相差几微秒，
+        时间戳早于上一条记录时按上一条记录的时间戳保存，保证按序号排列时时间不减（可二分查找）。
+
+        :param ts_ns: 记录时刻 (time.monotonic_ns)
+        :param category: 分类名称
+        :param message: 消息内容
+        :return: 新的 LogRecord
+        """
+        seq = self.next_seq
+        if seq - self.first_seq == self.capacity:
+            self.first_seq += 1
+        if ts_ns < self.last_ts_ns:
+            ts_ns = self.last_ts_ns
+        self.last_ts_ns = ts_ns
+        record = LogRecord(seq, ts_ns, category_id(category), message)
+        self._ring[seq % self.capacity] = record
+        self.next_seq = seq + 1
+        return record
+
+    def get(self, seq):
+        """
+        按序号获取内存中的记录。
+
+        :param seq: 记录序号
+        :return: LogRecord
+        :raises IndexError: 记录不在内存中
+        """
+        if not self.first_seq <= seq < self.next_seq:
+            raise IndexError(f"Log record {seq} not in memory")
+        return self._ring[seq % self.capacity]
+
+    def records(self, start_seq, end_seq):
+        """
+        按时间顺序遍历序号区间 [start_seq, end_seq) 内仍在内存中的记录。
+
+        :param start_seq: 起始序号（包含）
+        :param end_seq: 结束序号（不包含）
+        """
+        ring = self._ring
+        capacity = self.capacity
+        for seq in range(max(start_seq, self.first_seq), min(end_seq, self.next_seq)):
+            yield ring[seq % capacity]
+
+    def bisect_time(self, ts_ns):
+        """
+        二分查找内存中第一条时间戳不早于 ts_ns 的记录。
+
+        :param ts_ns: 时刻 (time.monotonic_ns)
+        :return: 记录序号；所有记录都早于该时刻时返回 next_seq
+        """
+        ring = self._ring
+        capacity = self.capacity
+        lo, hi = self.first_seq, self.next_seq
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if ring[mid % capacity].ts_ns < ts_ns:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def monotonic_ns_of(self, dt):
+        """
+        把本地时间换算为存储使用的单调时钟时刻。
+
+        :param dt: datetime 对象
+        :return: 时刻 (time.monotonic_ns)
+        """
+        return int(dt.timestamp() * 1e9) - self.wall_offset_ns
+
+    def clear(self):
+        """清空内存中的记录（序号继续递增）"""
+        self._ring = [None] * self.capacity
+        self.first_seq = self.next_seq
+
+    # =========================================================================
+    # 格式化
+    # =========================================================================
+    def wall_ns(self, record):
+        """记录的墙上时钟时刻（纳秒，Unix 时间）"""
+        return record.ts_ns + self.wall_offset_ns
+
+    def datetime_of(self, record):
+        """记录的本地时间 (datetime 对象)"""
+        return datetime.datetime.fromtimestamp((record.ts_ns + self.wall_offset_ns) / 1e9)
+
+    def timestamp_text(self, record):
+        """记录的时间戳文字 HH:MM:SS.mmm"""
+        now = self.datetime_of(record)
+        return now.strftime("%H:%M:%S") + f".{now.microsecond // 1000:03d}"
+
+    def format(self, record):
+        """
+        格式化为完整日志行。
+
+        :param record: LogRecord
+        :return: "[HH:MM:SS.mmm] [CAT] message\\n"
+        """
+        return f"[{self.timestamp_text(record)}] [{record.category}] {record.message}\n"
@@ -0,0 +1,131 @@
+import threading
+
+# =========================================================================
+# 通讯跟踪日志 (COM / MOT)
+# 每条 Modbus、继电器收发都会产生一条跟踪日志，格式化十六进制字符串和拼接消息的开销
+# 在高频按压时不可忽略。跟踪日志只传入模板与原始数据 (bytes / 数值)，
+# 只有在该级别开启（日志页签中的开关）或有输出端订阅时才格式化并写入日志。
+#
+# 开启的级别保存为不可变集合，状态变化时整体替换；热循环中的判断只是一次集合查找，不需要加锁。
+# =========================================================================
+
+# 跟踪日志级别
+TRACE_LEVELS = ("COM", "MOT")
+
+
+def hex_bytes(data):
+    """
+    把字节数据格式化为以空格分隔的大写十六进制字符串。
+
+    :param data: bytes / bytearray
+    :return: 如 "01 06 00 02 00 01 E9 CA"
+    """
+    return bytes(data).hex(' ').upper()
+
+
+def render(template, args):
+    """
+    格式化一条跟踪日志，参数中的 bytes / bytearray 按十六进制显示。
+
+    :param template: str.format 模板
+    :param args: 模板参数
+    :return: 日志文本
+    """
+    return template.format(*[hex_bytes(arg) if isinstance(arg, (bytes, bytearray)) else arg for arg in args])
+
+
+class TraceGate:
+    """
+    TraceGate 类：跟踪日志级别开关。
+    级别由开关（界面/命令行设置）与订阅计数（需要完整跟踪的输出端）共同决定，任一满足即开启。
+    """
+
+    def __init__(self, levels=TRACE_LEVELS):
+        """
+        :param levels: 默认开启的级别
+        """
+        self._lock = threading.Lock()
+        self._switches = {level: True for level in levels}
+        self._subscribers = {}
+        self.active = frozenset(levels)  # 当前开启的级别（只读，整体替换）
+
+    def enabled(self, level):
+        """
+        检查级别是否开启。
+
+        :param level: 级别名称，如 "COM"
+        :return: 是否需要输出该级别的跟踪日志
+        """
+        return level in self.active
+
+    def switch(self, level):
+        """
+        获取级别开关的状态（不含订阅）。
+
+        :param level: 级别名称
+        :return: 开关是否打开
+        """
+        return self._switches.get(level, False)
+
+    def set_enabled(self, level, enabled):
+        """
+        打开或关闭级别开关。
+
+        :param level: 级别名称
+        :param enabled: 是否打开
+        """
+        with self._lock:
+            self._switches[level] = bool(enabled)
+            self._update()
+
+    def subscribe(self, level):
+        """
+        订阅级别：订阅期间无论开关状态如何都输出该级别。
+
+        :param level: 级别名称
+        """
+        with self._lock:
+            self._subscribers[level] = self._subscribers.get(level, 0) + 1
+            self._update()
+
+    def unsubscribe(self, level):
+        """
+        取消一次订阅。
+
+        :param level: 级别名称
+        """
+        with self._lock:
+            count = self._subscribers.get(level, 0) - 1
+            if count > 0:
+                self._subscribers[level] = count
+            else:
+                self._subscribers.pop(level, None)
+            self._update()
+
+    def trace(self, log, level, template, *args):
+        """
+        输出一条跟踪日志；级别未开启时直接返回，不格式化。
+
+        :param log: 日志回调 log(message, category)
+        :param level: 级别名称（同时作为日志分类）
+        :param template: str.format 模板
+        :param args: 模板参数，bytes / bytearray 按十六进制显示
+        """
+        if level in self.active:
+            log(render(template, args), level)
+
+    def _update(self):
+        """重新计算开启的级别（持有锁时调用）"""
+        self.active = frozenset([level for level, on in self._switches.items() if on] + list(self._subscribers))
+
+
+# 全局跟踪开关，日志页签与命令行入口共用
+TRACE = TraceGate()
+
+
+def trace(log, level, template, *args):
+    """
+    使用全局开关输出一条跟踪日志，参数与 TraceGate.trace 相同。
+    """
+    if level in TRACE.active:
+        log(render(template, args), level)
@@ -145,6 +145,8 @@ class JigCtrlApp(tk.Tk):
         """
         # 保存设置页签的配置
         self.tab_settings.save_config_to_file()
+        # 剩余日志写入磁盘
+        self.tab_log.close()
         # 关闭窗口
         self.destroy()
 
@@ -0,0 +1,362 @@
+import struct
+from functools import lru_cache
+
+# =========================================================================
+# Modbus-RTU 传输层公共模块
+# 负责 CRC16 校验计算与 FC03/FC06 指令帧的构建，供各页签共用。
+# =========================================================================
+
+# 功能码定义
+FC_READ_HOLDING = 0x03   # 读保持寄存器
+FC_WRITE_SINGLE = 0x06   # 写单个寄存器
+
+# 默认设备地址
+DEFAULT_DEVICE_ADDR = 0x01
+
+
+def _build_crc_table():
+    """
+    生成 CRC-16/MODBUS (多项式 0xA001，反射) 的 256 项查找表。
+
+    :return: 长度为 256 的元组，索引为字节值
+    """
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            if crc & 0x0001:
+                crc = (crc >> 1) ^ 0xA001
+            else:
+                crc >>= 1
+        table.append(crc)
+    return tuple(table)
+
+
+# 模块加载时只计算一次
+CRC_TABLE = _build_crc_table()
+
+
+def calculate_crc(data):
+    """
+    使用查表法计算 Modbus CRC16 校验码。
+
+    :param data: 待校验的字节数据 (bytes / bytearray)
+    :return: 16 位 CRC 值（发送时低字节在前）
+    """
+    crc = 0xFFFF
+    table = CRC_TABLE
+    for byte in data:
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+    return crc
+
+
+def append_crc(data):
+    """
+    在数据末尾追加 CRC 校验码（低字节在前）。
+
+    :param data: 不含 CRC 的指令数据
+    :return: 含 CRC 的完整指令帧
+    """
+    return bytes(data) + struct.pack('<H', calculate_crc(data))
+
+
+def check_crc(frame):
+    """
+    校验一帧完整数据（含末尾 2 字节 CRC）的 CRC 是否正确。
+
+    :param frame: 完整的接收帧
+    :return: CRC 是否正确
+    """
+    if len(frame) < 4:
+        return False
+    return calculate_crc(frame[:-2]) == struct.unpack('<H', frame[-2:])[0]
+
+
+@lru_cache(maxsize=512)
+def build_frame(addr, function, register, value):
+    """
+    构建一条 8 字节的 Modbus-RTU 指令帧 (地址 + 功能码 + 寄存器 + 数据 + CRC)。
+    结果按 (addr, function, register, value) 缓存，运行/停止/设置脉冲/查询等
+    高频指令只需构建一次。
+
+    :param addr: 设备地址
+    :param function: 功能码 (0x03 或 0x06)
+    :param register: 寄存器地址
+    :param value: 写入值 (FC06) 或读取数量 (FC03)
+    :return: 完整指令帧 (bytes，不可变，可安全共享)
+    """
+    data = struct.pack('>BBHH', addr, function, register, value)
+    return data + struct.pack('<H', calculate_crc(data))
+
+
+def build_write_frame(addr, register, value):
+    """
+    构建写单个寄存器指令 (功能码 06)。
+
+    :param addr: 设备地址
+    :param register: 寄存器地址
+    :param value: 写入值 (0 - 65535)
+    :return: 完整指令帧
+    """
+    return build_frame(addr, FC_WRITE_SINGLE, register, value)
+
+
+def build_read_frame(addr, register, count=1):
+    """
+    构建读保持寄存器指令 (功能码 03)。
+
+    :param addr: 设备地址
+    :param register: 起始寄存器地址
+    :param count: 读取寄存器数量
+    :return: 完整指令帧
+    """
+    return build_frame(addr, FC_READ_HOLDING, register, count)
+
+
+# =========================================================================
+# 接收引擎：按期望长度或 3.5 字符帧间静默判定一帧结束
+# =========================================================================
+
+# 每个字符的位数：1 起始位 + 8 数据位 + 1 停止位 (8-N-1)
+BITS_PER_CHAR = 10
+
+# 波特率高于 19200 时，Modbus 规范规定帧间静默固定为 1.75 ms
+SILENCE_FLOOR = 0.00175
+
+
+def char_time(baud):
+    """
+    计算在指定波特率下传输一个字符所需的时间。
+
+    :param baud: 波特率
+    :return: 单个字符时间（秒）
+    """
+    return BITS_PER_CHAR / float(baud)
+
+
+def frame_silence(baud):
+    """
+    计算 Modbus-RTU 帧间静默时间 (3.5 个字符时间)。
+
+    :param baud: 波特率
+    :return: 静默时间（秒）
+    """
+    if baud > 19200:
+        return SILENCE_FLOOR
+    return 3.5 * char_time(baud)
+
+
+def expected_response_length(request):
+    """
+    根据请求帧推算正常应答的长度。
+
+    :param request: 完整请求帧
+    :return: FC03 返回 5 + 2 * 数量，FC06 返回 8，其它功能码返回 None（按静默判定帧尾）
+    """
+    if len(request) < 6:
+        return None
+    function = request[1]
+    if function == FC_READ_HOLDING:
+        count = (request[4] << 8) | request[5]
+        return 5 + 2 * count
+    if function == FC_WRITE_SINGLE:
+        return 8
+    return None
+
+
+def is_exception_response(response):
+    """
+    判断应答是否为异常应答（功能码最高位置 1）。
+
+    :param response: 接收到的应答帧
+    :return: 是否为异常应答
+    """
+    return response is not None and len(response) >= 2 and bool(response[1] & 0x80)
+
+
+def read_frame(serial_conn, expected_length=None, timeout=0.5, baud=None):
+    """
+    读取一帧应答数据。
+    首字节最多等待 timeout 秒；收到首字节后，满足以下任一条件即认为一帧结束：
+    1. 已收到 expected_length 个字节；
+    2. 收到异常应答 (功能码最高位为 1) 的完整 5 个字节；
+    3. 连续 3.5 个字符时间没有新数据到达（按当前波特率计算）。
+
+    :param serial_conn: 串口连接对象
+    :param expected_length: 期望的应答长度，None 表示只按静默判定
+    :param timeout: 等待首字节的超时时间（秒）
+    :param baud: 波特率，None 时从串口对象读取
+    :return: 接收到的字节数据，超时返回 None
+    """
+    if baud is None:
+        baud = getattr(serial_conn, 'baudrate', 9600) or 9600
+    silence = frame_silence(baud)
+
+    original_timeout = serial_conn.timeout
+    try:
+        # 等待首字节
+        serial_conn.timeout = timeout
+        first = serial_conn.read(1)
+        if not first:
+            return None
+
+        response = bytearray(first)
+        serial_conn.timeout = silence
+        while True:
+            target = expected_length
+            if len(response) >= 2 and response[1] & 0x80:
+                target = 5  # 异常应答：地址 + 功能码 + 异常码 + CRC
+            if target is not None and len(response) >= target:
+                break
+
+            if target is not None:
+                want = target - len(response)
+            else:
+                want = max(serial_conn.in_waiting, 1)
+
+            chunk = serial_conn.read(want)
+            if not chunk:
+                # 超过帧间静默时间没有新数据，视为帧结束
+                break
+            response.extend(chunk)
+
+        return bytes(response)
+    finally:
+        serial_conn.timeout = original_timeout
+
+
+def transact(serial_conn, request, timeout=0.5, expected_length=None):
+    """
+    执行一次完整的请求/应答事务：清空接收缓冲区、发送请求、读取应答。
+
+    :param serial_conn: 串口连接对象
+    :param request: 完整请求帧
+    :param timeout: 等待应答首字节的超时时间（秒）
+    :param expected_length: 期望的应答长度，None 时根据请求帧自动推算
+    :return: 应答帧，超时返回 None
+    """
+    if expected_length is None:
+        expected_length = expected_response_length(request)
+
+    serial_conn.reset_input_buffer()
+    serial_conn.write(request)
+    return read_frame(serial_conn, expected_length, timeout)
+
+
+def write_register(serial_conn, addr, register, value, shadow=None, timeout=0.5):
+    """
+    写单个寄存器并等待回显应答。
+    提供影子缓存时，若寄存器已确认的值与待写入值相同则跳过本次写入，
+    否则写入后根据应答更新缓存。
+
+    :param serial_conn: 串口连接对象
+    :param addr: 设备地址
+    :param register: 寄存器地址
+    :param value: 写入值
+    :param shadow: RegisterShadow 影子缓存，None 表示不使用缓存
+    :param timeout: 等待应答的超时时间（秒）
+    :return: (应答帧, 是否跳过)；跳过时应答帧为请求帧本身（即控制器应有的回显）
+    """
+    request = build_write_frame(addr, register, value)
+    if shadow is not None and shadow.is_current(addr, register, value):
+        return request, True
+
+    response = transact(serial_conn, request, timeout)
+    if shadow is not None:
+        shadow.record_write(addr, register, value, response)
+    return response, False
+
+
+# =========================================================================
+# 多寄存器块读取：将离散寄存器合并为最少的连续 FC03 请求
+# =========================================================================
+
+# Modbus 规范中单次 FC03 最多读取 125 个寄存器
+MAX_READ_COUNT = 125
+
+
+def plan_block_reads(registers, max_count=MAX_READ_COUNT, max_gap=MAX_READ_COUNT):
+    """
+    将需要读取的寄存器合并为最少的连续读取块。
+    相邻寄存器之间的空隙不超过 max_gap 时合并为同一块（空隙寄存器一并读取后丢弃）。
+
+    :param registers: 需要读取的寄存器地址列表（可无序、可重复）
+    :param max_count: 单个块最多包含的寄存器数量
+    :param max_gap: 允许合并的最大空隙（寄存器个数）
+    :return: [(起始寄存器, 数量), ...]
+    """
+    blocks = []
+    start = None
+    end = None
+    for register in sorted(set(registers)):
+        if start is None:
+            start = end = register
+        elif register - end - 1 <= max_gap and register - start + 1 <= max_count:
+            end = register
+        else:
+            blocks.append((start, end - start + 1))
+            start = end = register
+    if start is not None:
+        blocks.append((start, end - start + 1))
+    return blocks
+
+
+def decode_read_response(response, start, count, addr=None):
+    """
+    解析 FC03 应答，得到寄存器映射表。
+
+    :param response: 应答帧
+    :param start: 请求的起始寄存器
+    :param count: 请求的寄存器数量
+    :param addr: 设备地址，不为 None 时校验应答地址
+    :return: {寄存器地址: 值}，应答无效（超时/异常应答/长度或 CRC 错误）时返回 None
+    """
+    if not response or len(response) < 5 + 2 * count:
+        return None
+    if addr is not None and response[0] != addr:
+        return None
+    if response[1] != FC_READ_HOLDING or response[2] != 2 * count:
+        return None
+    if not check_crc(response[:5 + 2 * count]):
+        return None
+
+    values = struct.unpack(f'>{count}H', response[3:3 + 2 * count])
+    return {start + i: value for i, value in enumerate(values)}
+
+
+def read_registers(serial_conn, addr, registers, timeout=0.5, on_transaction=None):
+    """
+    按块读取一组寄存器。如果控制器拒绝某个块（异常应答/超时/校验错误），
+    则对该块内需要的寄存器逐个单独读取。
+
+    :param serial_conn: 串口连接对象
+    :param addr: 设备地址
+    :param registers: 需要读取的寄存器地址列表
+    :param timeout: 每次事务等待应答的超时时间（秒）
+    :param on_transaction: 每次事务完成后的回调 (request, response)，用于记录收发
+    :return: {寄存器地址: 值}，读取失败的寄存器不包含在结果中
+    """
+    wanted = set(registers)
+    result = {}
+
+    def read_block(start, count):
+        request = build_read_frame(addr, start, count)
+        response = transact(serial_conn, request, timeout)
+        if on_transaction:
+            on_transaction(request, response)
+        return decode_read_response(response, start, count, addr)
+
+    for start, count in plan_block_reads(wanted):
+        values = read_block(start, count)
+        if values is None and count > 1:
+            # 控制器不接受该范围，退回到逐个读取
+            for register in range(start, start + count):
+                if register in wanted:
+                    single = read_block(register, 1)
+                    if single:
+                        result.update(single)
+            continue
+        if values:
+            result.update({r: v for r, v in values.items() if r in wanted})
+
+    return result
@@ -0,0 +1,324 @@
+import time
+from concurrent.futures import Future
+import modbus_rtu
+from log_trace import trace
+
+
+class MoveError(Exception):
+    """电机移动失败的基类异常"""
+
+
+class MoveTimeoutError(MoveError):
+    """电机在安全超时时间内未停止"""
+
+
+class MoveStallError(MoveError):
+    """电机报告正在运行，但脉冲计数长时间没有变化（堵转）"""
+
+
+# 脉冲计数 (0x18) 增大时方向寄存器 (0x01) 的取值；电机接线方向相反时改为 0
+POSITIVE_DIRECTION = 1
+
+# 行程寄存器 (0x05) 单次最大脉冲数；写 0 表示一直运行，因此不能用来表示 65536
+MAX_TRAVEL_PULSES = 0xFFFF
+
+
+def plan_relative_move(current, target, positive_direction=POSITIVE_DIRECTION, max_pulses=MAX_TRAVEL_PULSES):
+    """
+    将绝对目标位置换算为相对移动（方向 + 脉冲数）。
+    超过单次最大脉冲数的移动拆分为多段。
+
+    :param current: 当前绝对位置（脉冲计数）
+    :param target: 目标绝对位置（脉冲计数）
+    :param positive_direction: 脉冲计数增大方向对应的方向寄存器值
+    :param max_pulses: 单段最大脉冲数
+    :return: [(方向寄存器值, 脉冲数), ...]；已在目标位置时返回空列表
+    """
+    delta = target - current
+    if delta == 0:
+        return []
+
+    direction = positive_direction if delta > 0 else 1 - positive_direction
+    remaining = abs(delta)
+    steps = []
+    while remaining > 0:
+        pulses = min(remaining, max_pulses)
+        steps.append((direction, pulses))
+        remaining -= pulses
+    return steps
+
+
+def read_run_status(serial_conn, addr=modbus_rtu.DEFAULT_DEVICE_ADDR, timeout=0.5):
+    """
+    读取运行状态寄存器 (0x02)。
+
+    :param serial_conn: 串口连接对象
+    :param addr: 设备地址
+    :param timeout: 等待应答的超时时间（秒）
+    :return: 1 表示运行中，0 表示已停止，读取失败返回 None
+    """
+    response = modbus_rtu.transact(serial_conn, modbus_rtu.build_read_frame(addr, 0x02, 1), timeout)
+    values = modbus_rtu.decode_read_response(response, 0x02, 1, addr)
+    return values[0x02] if values else None
+
+
+def read_pulse_count(serial_conn, addr=modbus_rtu.DEFAULT_DEVICE_ADDR, timeout=0.5):
+    """
+    读取运行脉冲计数 (0x18，2 个寄存器，32 位有符号)。
+
+    :param serial_conn: 串口连接对象
+    :param addr: 设备地址
+    :param timeout: 等待应答的超时时间（秒）
+    :return: 脉冲计数，读取失败返回 None
+    """
+    response = modbus_rtu.transact(serial_conn, modbus_rtu.build_read_frame(addr, 0x18, 2), timeout)
+    values = modbus_rtu.decode_read_response(response, 0x18, 2, addr)
+    if not values:
+        return None
+    pulse_count = (values[0x18] << 16) | values[0x19]
+    return pulse_count if pulse_count < 0x80000000 else pulse_count - 0x100000000
+
+
+class MotorAxis:
+    """
+    MotorAxis 类：一个电机轴的连接信息。
+    所有收发都通过该串口的 I/O 线程执行（如果有）。
+    """
+
+    def __init__(self, name, serial_conn, worker=None, shadow=None, addr=modbus_rtu.DEFAULT_DEVICE_ADDR):
+        """
+        :param name: 轴名称 (例如 "X")
+        :param serial_conn: 串口连接对象
+        :param worker: 该串口的 SerialWorker，None 时在当前线程直接收发
+        :param shadow: 该串口的 RegisterShadow 影子缓存
+        :param addr: 设备地址
+        """
+        self.name = name
+        self.serial_conn = serial_conn
+        self.worker = worker
+        self.shadow = shadow
+        self.addr = addr
+        self.position = None  # 当前绝对位置（脉冲计数），None 表示未知，需要从控制器同步
+
+    def call(self, fn, *args, **kwargs):
+        """在该轴的 I/O 线程中同步执行 fn"""
+        if self.worker:
+            return self.worker.call(fn, *args, **kwargs)
+        return fn(*args, **kwargs)
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        将 fn 提交到该轴的 I/O 线程异步执行。
+        没有 I/O 线程时在当前线程直接执行，并返回已完成的 Future。
+
+        :return: Future 对象
+        """
+        if self.worker:
+            return self.worker.submit(fn, *args, **kwargs)
+
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def read_run_status(self):
+        """读取运行状态，1 运行 / 0 停止 / None 失败"""
+        return self.call(read_run_status, self.serial_conn, self.addr)
+
+    def read_pulse_count(self):
+        """读取脉冲计数，失败返回 None"""
+        return self.call(read_pulse_count, self.serial_conn, self.addr)
+
+    def sync_position(self):
+        """从脉冲计数寄存器 (0x18) 同步当前位置，读取失败时位置置为未知"""
+        self.position = self.read_pulse_count()
+        return self.position
+
+    def stop(self):
+        """发送停止指令 (0x03)，同时清空影子缓存"""
+        response, _ = self.call(modbus_rtu.write_register, self.serial_conn, self.addr, 0x03, 1, self.shadow)
+        return response is not None and not modbus_rtu.is_exception_response(response)
+
+
+def run_parallel(axes, fn, *args):
+    """
+    在各轴的 I/O 线程上同时执行 fn(axis, *args)，等待全部完成后返回（组合完成屏障）。
+    每个串口同一时间只有一个事务，不同串口的事务并行进行，总耗时取决于最慢的轴。
+
+    :param axes: MotorAxis 列表
+    :param fn: 要执行的函数，第一个参数为 MotorAxis
+    :return: 与 axes 顺序对应的结果列表
+    :raises Exception: 任一轴执行失败时抛出该异常（其余轴仍会执行完毕）
+    """
+    futures = [axis.submit(fn, axis, *args) for axis in axes]
+    errors = [f.exception() for f in futures]
+    for error in errors:
+        if error is not None:
+            raise error
+    return [f.result() for f in futures]
+
+
+class MoveEngine:
+    """
+    MoveEngine 类：电机移动完成检测引擎。
+    发送运行指令后轮询各轴的运行状态 (0x02) 与脉冲计数 (0x18)，
+    所有轴都报告停止后立即返回，取代固定的等待时间。
+    轮询间隔从 min_interval 开始按比例增大到 max_interval：短距离移动能被尽快发现，
+    长距离移动也不会占满总线。
+    """
+
+    def __init__(self, timeout=10.0, stall_timeout=1.0, min_interval=0.01, max_interval=0.1,
+                 log_callback=None):
+        """
+        :param timeout: 安全超时时间（秒），超过后抛出 MoveTimeoutError
+        :param stall_timeout: 运行中脉冲计数无变化的最长时间（秒），超过后抛出 MoveStallError；0 表示不检测
+        :param min_interval: 最小轮询间隔（秒）
+        :param max_interval: 最大轮询间隔（秒）
+        :param log_callback: 日志回调函数
+        """
+        self.timeout = timeout
+        self.stall_timeout = stall_timeout
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.log = log_callback if log_callback else print
+
+    # 连续读取失败多少次后放弃
+    MAX_READ_FAILURES = 3
+
+    def wait_until_stopped(self, axes, stop_check=None):
+        """
+        阻塞等待所有轴停止（在测试后台线程中调用）。
+
+        :param axes: MotorAxis 列表
+        :param stop_check: 可选的取消检查函数，返回 True 时立即放弃等待
+        :return: 所有轴都已停止返回 True，被 stop_check 取消返回 False
+        :raises MoveTimeoutError: 超过安全超时时间仍未停止
+        :raises MoveStallError: 某轴运行中但脉冲计数长时间不变
+        :raises MoveError: 连续多次无法读取运行状态
+        """
+        start = time.monotonic()
+        deadline = start + self.timeout
+        pending = list(axes)
+        last_count = {axis.name: None for axis in pending}
+        last_progress = {axis.name: start for axis in pending}
+        failures = {axis.name: 0 for axis in pending}
+        interval = self.min_interval
+
+        while pending:
+            if stop_check and stop_check():
+                return False
+
+            time.sleep(interval)
+            now = time.monotonic()
+
+            # 各轴同时查询，每轮耗时取决于最慢的轴
+            results = run_parallel(pending, self._poll_axis)
+
+            for axis, (status, count) in list(zip(pending, results)):
+                if status is None:
+                    failures[axis.name] += 1
+                    if failures[axis.name] >= self.MAX_READ_FAILURES:
+                        raise MoveError(f"Axis {axis.name}: no response to run status query")
+                    continue
+                failures[axis.name] = 0
+
+                if status == 0:
+                    pending.remove(axis)
+                    continue
+
+                if self.stall_timeout:
+                    if count is not None and count != last_count[axis.name]:
+                        last_count[axis.name] = count
+                        last_progress[axis.name] = now
+                    elif now - last_progress[axis.name] >= self.stall_timeout:
+                        raise MoveStallError(
+                            f"Axis {axis.name}: running but pulse count stuck at {last_count[axis.name]}"
+                        )
+
+            if pending and now >= deadline:
+                names = ', '.join(axis.name for axis in pending)
+                raise MoveTimeoutError(f"Axis {names} still running after {self.timeout:.1f} s")
+
+            interval = min(interval * 1.5, self.max_interval)
+
+        trace(self.log, "MOT", "Move completed in {:.3f} s", time.monotonic() - start)
+        return True
+
+    def move_to(self, targets, send_move, stop_check=None):
+        """
+        将各轴移动到绝对目标位置（在测试后台线程中调用）。
+        根据各轴跟踪的当前位置计算相对移动，各轴同时下发、同时等待；
+        每段移动完成后从脉冲计数寄存器重新同步位置，消除累积误差。
+
+        :param targets: [(MotorAxis, 目标绝对位置), ...]
+        :param send_move: 下发一段相对移动的函数 send_move(axis, direction, pulses)，
+                          在该轴的 I/O 线程中执行，返回控制器是否确认
+        :param stop_check: 可选的取消检查函数，返回 True 时立即放弃等待
+        :return: 全部到位返回 True，被 stop_check 取消返回 False
+        :raises MoveError: 无法读取位置、移动指令未被确认或移动失败
+        """
+        axes = [axis for axis, _ in targets]
+        unknown = [axis for axis in axes if axis.position is None]
+        if unknown:
+            run_parallel(unknown, MotorAxis.sync_position)
+            for axis in unknown:
+                if axis.position is None:
+                    raise MoveError(f"Axis {axis.name}: unable to read current position")
+
+        plans = {}
+        for axis, target in targets:
+            plans[axis.name] = plan_relative_move(axis.position, target)
+            if plans[axis.name]:
+                trace(self.log, "MOT", "Axis {}: {} -> {} (delta {:+d})", axis.name, axis.position, target, target - axis.position)
+
+        while True:
+            moving = [axis for axis in axes if plans[axis.name]]
+            if not moving:
+                return True
+            steps = {axis.name: plans[axis.name].pop(0) for axis in moving}
+
+            try:
+                acks = run_parallel(moving, lambda axis: send_move(axis, *steps[axis.name]))
+                for axis, ack in zip(moving, acks):
+                    if not ack:
+                        raise MoveError(f"Axis {axis.name}: move command not acknowledged")
+
+                if not self.wait_until_stopped(moving, stop_check):
+                    # 中途取消：先停止电机并等待真正停下（否则下一段指令会发给仍在运行的控制器而被忽略），
+                    # 停止位置未知，下次移动前重新同步
+                    self._stop_axes(moving)
+                    return False
+            except Exception:
+                for axis in moving:
+                    axis.position = None
+                raise
+
+            run_parallel(moving, MotorAxis.sync_position)
+
+    def _stop_axes(self, axes):
+        """
+        取消移动时停止各轴并等待停下（尽力而为：失败只记录日志，不抛出异常），之后位置标记为未知。
+
+        :param axes: MotorAxis 列表
+        """
+        try:
+            run_parallel(axes, MotorAxis.stop)
+            self.wait_until_stopped(axes)
+        except Exception as e:
+            self.log(f"Stop after cancelled move failed: {e}", "ERR")
+        for axis in axes:
+            axis.position = None
+
+    def _poll_axis(self, axis):
+        """
+        查询单轴状态（在该轴的 I/O 线程中执行）。
+
+        :return: (运行状态, 脉冲计数)；未运行或不检测堵转时脉冲计数为 None
+        """
+        status = read_run_status(axis.serial_conn, axis.addr)
+        count = None
+        if status and self.stall_timeout:
+            count = read_pulse_count(axis.serial_conn, axis.addr)
+        return status, count
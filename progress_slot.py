@@ -0,0 +1,42 @@
+from collections import namedtuple
+
+# =========================================================================
+# 测试进度发布槽
+# 测试线程每次状态变化时把完整的进度快照（不可变元组）整体写入槽位，界面按固定帧率读取最新值。
+# 写入只是一次对象引用赋值，读取方拿到的总是某个完整快照，不需要加锁；
+# 中间被覆盖的快照直接丢弃，界面刷新开销与按压频率无关。
+# =========================================================================
+
+# 进度快照
+# item_index: 当前测试项索引（全部结束后为测试项总数）
+# mode: 当前测试项的模式 ('count' / 'time')，电机移动期间为 None
+# remaining_counts: 次数模式的剩余次数
+# presses: 当前测试项已完成的按压次数
+TestProgress = namedtuple('TestProgress', ['item_index', 'mode', 'remaining_counts', 'presses'])
+
+
+class ProgressSlot:
+    """
+    ProgressSlot 类：单值进度槽。写入方覆盖写入，读取方随时取最新快照。
+    """
+
+    __slots__ = ('_value',)
+
+    def __init__(self):
+        self._value = None
+
+    def publish(self, value):
+        """
+        发布最新快照（覆盖上一次的值）。
+
+        :param value: 不可变的进度快照
+        """
+        self._value = value
+
+    def latest(self):
+        """
+        读取最新快照。
+
+        :return: 最近一次发布的快照，尚未发布时返回 None
+        """
+        return self._value
@@ -0,0 +1,107 @@
+import threading
+
+
+class RegisterShadow:
+    """
+    RegisterShadow 类：控制器参数寄存器的影子缓存。
+    记录每个设备上各可写参数寄存器最近一次被确认（收到正确回显）的值，
+    写入值与缓存一致时可以跳过该次写入，省去一次总线往返。
+    控制器的速度、行程、方向等参数具有记忆功能，因此跳过重复写入是安全的。
+    """
+
+    # 具有记忆功能、可以跳过重复写入的参数寄存器
+    CACHEABLE_REGISTERS = {
+        0x01,  # 运行方向
+        0x04,  # 速度
+        0x05,  # 脉冲数
+        0x06,  # 圈数
+        0x07,  # 角度
+        0x09,  # 脱机使能
+        0x0B,  # 上电回原点
+        0x0D,  # 启用限位
+        0x0E,  # 加减速系数
+        0x1A,  # 回原点速度
+    }
+
+    # 行程寄存器三选一：写入其中一个后，另外两个的缓存不再有效
+    TRAVEL_REGISTERS = {0x05, 0x06, 0x07}
+
+    # 停止、回原点、设置原点等动作会使控制器状态不确定，写入后清空该设备的缓存
+    INVALIDATING_REGISTERS = {0x03, 0x0A, 0x15}
+
+    def __init__(self):
+        self._values = {}  # {(设备地址, 寄存器地址): 值}
+        self._lock = threading.Lock()
+
+    def is_current(self, addr, register, value):
+        """
+        检查寄存器缓存值是否与待写入值一致。
+
+        :param addr: 设备地址
+        :param register: 寄存器地址
+        :param value: 待写入的值
+        :return: 一致返回 True（可跳过写入）
+        """
+        with self._lock:
+            return self._values.get((addr, register)) == value
+
+    def get(self, addr, register):
+        """
+        获取寄存器的缓存值。
+
+        :return: 缓存值，未知时返回 None
+        """
+        with self._lock:
+            return self._values.get((addr, register))
+
+    def update(self, addr, register, value):
+        """
+        记录寄存器已被确认的值。
+
+        :param addr: 设备地址
+        :param register: 寄存器地址
+        :param value: 已确认的值
+        """
+        with self._lock:
+            if register in self.TRAVEL_REGISTERS:
+                for other in self.TRAVEL_REGISTERS:
+                    self._values.pop((addr, other), None)
+            self._values[(addr, register)] = value
+
+    def invalidate(self, addr=None):
+        """
+        清空缓存。
+
+        :param addr: 设备地址，None 表示清空所有设备
+        """
+        with self._lock:
+            if addr is None:
+                self._values.clear()
+            else:
+                for key in [k for k in self._values if k[0] == addr]:
+                    del self._values[key]
+
+    def record_write(self, addr, register, value, response):
+        """
+        根据写指令的应答更新缓存。
+        应答超时、异常应答或回显不一致时清空该设备的缓存；
+        停止、回原点等动作写入成功后同样清空。
+
+        :param addr: 设备地址
+        :param register: 寄存器地址
+        :param value: 写入的值
+        :param response: 应答帧，超时为 None
+        """
+        echo_ok = (
+            response is not None
+            and len(response) >= 6
+            and response[0] == addr
+            and response[1] == 0x06
+            and ((response[2] << 8) | response[3]) == register
+            and ((response[4] << 8) | response[5]) == value
+        )
+
+        if not echo_ok or register in self.INVALIDATING_REGISTERS:
+            self.invalidate(addr)
+        elif register in self.CACHEABLE_REGISTERS:
+            self.update(addr, register, value)
@@ -0,0 +1,176 @@
+import time
+from array import array
+
+# =========================================================================
+# 继电器按压时序调度
+# 所有吸合/断开时刻都按绝对截止时间 (time.monotonic_ns) 计算：第 k 次吸合时刻为
+# 起点 + k * 周期，写串口、记录日志等耗时只占用本周期的空闲时间，不会累积成漂移。
+# =========================================================================
+
+NS_PER_MS = 1000000
+
+# 按压时长或间隔小于该值时启用“睡眠 + 自旋”混合等待
+HYBRID_THRESHOLD_NS = 10 * NS_PER_MS
+
+# 混合等待时最后自旋的时长：先睡到截止时间前这么久，再忙等到截止时间
+DEFAULT_SPIN_NS = 2 * NS_PER_MS
+
+
+def wait_until(deadline_ns, spin_ns=0):
+    """
+    等待到指定的绝对时刻。
+
+    :param deadline_ns: 截止时刻 (time.monotonic_ns)
+    :param spin_ns: 截止前最后自旋等待的时长（纳秒），0 表示只用 sleep
+    """
+    remaining = deadline_ns - time.monotonic_ns()
+    if remaining > spin_ns:
+        time.sleep((remaining - spin_ns) / 1e9)
+    if spin_ns:
+        while time.monotonic_ns() < deadline_ns:
+            pass
+
+
+def percentile(sorted_values, p):
+    """
+    取已排序序列的百分位数（最近秩法）。
+
+    :param sorted_values: 已升序排列的序列
+    :param p: 百分位 (0 - 100)
+    :return: 百分位数值
+    """
+    if not sorted_values:
+        return 0
+    rank = max(int(len(sorted_values) * p / 100.0 + 0.5), 1)
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class RelayScheduler:
+    """
+    RelayScheduler 类：按固定周期（按压时长 + 间隔）驱动继电器吸合/断开。
+    记录每次吸合/断开的计划时刻与实际时刻，用于统计实际占空比与时序抖动。
+    """
+
+    def __init__(self, relay_conn, on_frame, off_frame, press_ns, interval_ns, spin_ns=None, capacity=0):
+        """
+        :param relay_conn: 继电器串口连接对象
+        :param on_frame: 吸合指令帧
+        :param off_frame: 断开指令帧
+        :param press_ns: 按压（吸合）时长（纳秒）
+        :param interval_ns: 两次按压之间的间隔（纳秒）
+        :param spin_ns: 混合等待的自旋时长（纳秒），None 时按时序长短自动决定
+        :param capacity: 预计按压次数，用于预先分配时间戳缓冲区（不足时自动扩容）
+        """
+        self.relay_conn = relay_conn
+        self.on_frame = on_frame
+        self.off_frame = off_frame
+        self.press_ns = press_ns
+        self.interval_ns = interval_ns
+        self.period_ns = press_ns + interval_ns
+        if spin_ns is None:
+            spin_ns = DEFAULT_SPIN_NS if min(press_ns, interval_ns) < HYBRID_THRESHOLD_NS else 0
+        self.spin_ns = spin_ns
+
+        self.next_on_ns = None
+        # 每次按压的计划吸合时刻与实际吸合/断开时刻，预先分配，按压过程中只做下标写入
+        size = max(capacity, 64)
+        self.planned_on = array('q', bytes(8 * size))
+        self.actual_on = array('q', bytes(8 * size))
+        self.actual_off = array('q', bytes(8 * size))
+        self.count = 0
+
+    def start(self):
+        """以当前时刻为起点重新排定时序（开始测试项或暂停恢复后调用）"""
+        self.next_on_ns = time.monotonic_ns()
+
+    def press(self):
+        """
+        执行一次按压：等到计划吸合时刻吸合，等到计划断开时刻断开。
+        返回时下一次吸合时刻已排定，调用方可利用剩余间隔做其它事情（记录日志等）。
+
+        :return: (实际吸合时刻, 实际断开时刻)，单位纳秒
+        """
+        if self.next_on_ns is None:
+            self.start()
+
+        write = self.relay_conn.write
+        planned = self.next_on_ns
+        wait_until(planned, self.spin_ns)
+        write(self.on_frame)
+        on_ns = time.monotonic_ns()
+
+        wait_until(planned + self.press_ns, self.spin_ns)
+        write(self.off_frame)
+        off_ns = time.monotonic_ns()
+
+        n = self.count
+        if n == len(self.actual_on):
+            self._grow()
+        self.planned_on[n] = planned
+        self.actual_on[n] = on_ns
+        self.actual_off[n] = off_ns
+        self.count = n + 1
+
+        self.next_on_ns = planned + self.period_ns
+        if off_ns > self.next_on_ns:
+            # 已经落后超过一个周期（例如串口阻塞），从当前时刻重新排定，避免连续补按
+            self.next_on_ns = off_ns
+        return on_ns, off_ns
+
+    def _grow(self):
+        """时间戳缓冲区已满时容量翻倍"""
+        for buffer in (self.planned_on, self.actual_on, self.actual_off):
+            buffer.frombytes(bytes(8 * len(buffer)))
+
+    def finish(self):
+        """
+        等待最后一次按压后的间隔结束（保证测试项之间仍保留设定的间隔）。
+        """
+        if self.next_on_ns is not None:
+            wait_until(self.next_on_ns, self.spin_ns)
+
+    def stats(self):
+        """
+        统计实际时序。
+
+        :return: {presses, rate_hz, duty, target_duty, period_ms, on_ms,
+                  on_jitter_mean_ms, on_jitter_max_ms, on_jitter_p50_ms, on_jitter_p99_ms,
+                  off_jitter_max_ms, off_jitter_p50_ms, off_jitter_p99_ms}；
+                 抖动为实际时刻减计划时刻；没有按压记录时返回 None
+        """
+        n = self.count
+        if n == 0:
+            return None
+
+        planned_on = self.planned_on[:n]
+        actual_on = self.actual_on[:n]
+        actual_off = self.actual_off[:n]
+
+        on_time = sum(actual_off) - sum(actual_on)
+        on_jitter = sorted(actual_on[i] - planned_on[i] for i in range(n))
+        off_jitter = sorted(actual_off[i] - planned_on[i] - self.press_ns for i in range(n))
+
+        # 只统计按计划衔接的相邻两次按压（暂停恢复或落后重排后的间隔不计入周期）
+        periods = [actual_on[i + 1] - actual_on[i] for i in range(n - 1)
+                   if planned_on[i + 1] - planned_on[i] == self.period_ns]
+        period = sum(periods) / len(periods) if periods else self.period_ns
+        duty = on_time / n / period if period else 0
+
+        def ms(value):
+            return round(value / NS_PER_MS, 3)
+
+        return {
+            'presses': n,
+            'rate_hz': round(1e9 / period, 2) if period else 0,
+            'duty': round(duty, 4),
+            'target_duty': round(self.press_ns / self.period_ns, 4) if self.period_ns else 0,
+            'period_ms': ms(period),
+            'on_ms': ms(on_time / n),
+            'on_jitter_mean_ms': ms(sum(on_jitter) / n),
+            'on_jitter_max_ms': ms(on_jitter[-1]),
+            'on_jitter_p50_ms': ms(percentile(on_jitter, 50)),
+            'on_jitter_p99_ms': ms(percentile(on_jitter, 99)),
+            'off_jitter_max_ms': ms(off_jitter[-1]),
+            'off_jitter_p50_ms': ms(percentile(off_jitter, 50)),
+            'off_jitter_p99_ms': ms(percentile(off_jitter, 99)),
+        }
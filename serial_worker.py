@@ -0,0 +1,158 @@
+import queue
+import threading
+from concurrent.futures import Future
+
+
+class SerialWorker:
+    """
+    SerialWorker 类：单个串口的专用后台 I/O 线程。
+    所有针对该串口的收发事务都通过请求队列串行执行，调用方拿到 Future，
+    或者提供回调函数，由 dispatcher 投递回界面线程执行，避免阻塞 Tk 主循环。
+    """
+
+    def __init__(self, serial_conn, name="", dispatcher=None, log_callback=None):
+        """
+        初始化并启动 I/O 线程。
+
+        :param serial_conn: 已打开的 serial.Serial 连接对象
+        :param name: 串口名称（用于线程名与日志）
+        :param dispatcher: 回调投递函数，接收一个无参函数，例如 lambda fn: widget.after(0, fn)；
+                           为 None 时回调直接在 I/O 线程中执行
+        :param log_callback: 日志回调函数，用于记录事务中未捕获的异常
+        """
+        self.serial_conn = serial_conn
+        self.name = name
+        self.dispatcher = dispatcher
+        self.log = log_callback if log_callback else print
+
+        self._queue = queue.Queue()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=f"SerialWorker-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, *args, callback=None, **kwargs):
+        """
+        提交一个 I/O 事务到队列。
+
+        :param fn: 在 I/O 线程中执行的函数
+        :param callback: 事务完成后调用的回调函数，参数为 fn 的返回值
+        :return: concurrent.futures.Future 对象
+        """
+        future = Future()
+        if not self._running:
+            future.set_exception(RuntimeError(f"{self.name} worker is stopped"))
+            return future
+
+        if callback is not None:
+            future.add_done_callback(lambda f: self._deliver(f, callback))
+
+        self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def call(self, fn, *args, timeout=None, **kwargs):
+        """
+        同步执行一个 I/O 事务并返回结果（供后台线程使用，不要在 Tk 主线程中调用）。
+        如果当前已经在本 I/O 线程中，则直接执行，避免自我等待死锁。
+
+        :param fn: 要执行的函数
+        :param timeout: 等待结果的超时时间（秒），None 表示一直等待
+        :return: fn 的返回值
+        """
+        if threading.current_thread() is self._thread:
+            return fn(*args, **kwargs)
+        return self.submit(fn, *args, **kwargs).result(timeout)
+
+    def is_alive(self):
+        """检查 I/O 线程是否仍在运行"""
+        return self._running and self._thread.is_alive()
+
+    def stop(self, timeout=1.0):
+        """
+        停止 I/O 线程。尚未执行的事务将被取消。
+
+        :param timeout: 等待线程退出的时间（秒）
+        """
+        if not self._running:
+            return
+        self._running = False
+
+        # 取消队列中尚未执行的事务
+        while True:
+            try:
+                future, _, _, _ = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            future.cancel()
+
+        self._queue.put(None)
+        if threading.current_thread() is not self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        """I/O 线程主循环：依次取出事务并执行"""
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+
+            future, fn, args, kwargs = job
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                self.log(f"{self.name} I/O Error: {e}", "ERR")
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+    def _deliver(self, future, callback):
+        """将事务结果投递给回调函数（异常或取消的事务不回调）"""
+        if future.cancelled() or future.exception() is not None:
+            return
+
+        result = future.result()
+        if self.dispatcher:
+            self.dispatcher(lambda: callback(result))
+        else:
+            callback(result)
+
+
+def when_all(futures, callback, dispatcher=None):
+    """
+    等待一组 Future 全部完成后调用回调函数（组合完成屏障）。
+
+    :param futures: Future 列表
+    :param callback: 回调函数，参数为与 futures 顺序对应的结果列表（失败或取消的项为 None）
+    :param dispatcher: 回调投递函数，与 SerialWorker.dispatcher 含义相同
+    """
+    futures = list(futures)
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def collect():
+        results = []
+        for f in futures:
+            if f.cancelled() or f.exception() is not None:
+                results.append(None)
+            else:
+                results.append(f.result())
+        if dispatcher:
+            dispatcher(lambda: callback(results))
+        else:
+            callback(results)
+
+    if not futures:
+        collect()
+        return
+
+    def on_done(_):
+        with lock:
+            remaining[0] -= 1
+            done = remaining[0] == 0
+        if done:
+            collect()
+
+    for f in futures:
+        f.add_done_callback(on_done)
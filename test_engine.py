@@ -0,0 +1,467 @@
+import time
+import modbus_rtu
+from move_engine import MotorAxis, MoveEngine, run_parallel
+from relay_scheduler import RelayScheduler, NS_PER_MS, DEFAULT_SPIN_NS
+import lc_relay
+from progress_slot import ProgressSlot, TestProgress
+from log_trace import TRACE, hex_bytes, trace
+from event_bus import (BUS, TxFrame, RxFrame, MoveStarted, MoveDone, AxisSnapshot, PressOn, PressOff,
+                       ItemStarted, ItemFinished, Error)
+
+
+def item_keys(item):
+    """
+    获取测试项包含的按键列表。
+    单键测试项只有 key_name；组合键 (Multi-Key) 测试项的 keys 保存全部按键，第一个为主按键。
+
+    :param item: 测试项字典
+    :return: 按键名称列表
+    """
+    return item.get('keys') or [item['key_name']]
+
+
+def item_duration_seconds(item):
+    """
+    计算时间模式测试项的持续时间。
+
+    :param item: 测试项字典
+    :return: 持续时间（秒）
+    """
+    target = item.get('target', 0)
+    unit = item.get('unit', 'Seconds')
+    if unit == 'Minutes':
+        return target * 60
+    if unit == 'Hours':
+        return target * 3600
+    return target
+
+
+class TestEngine:
+    """
+    TestEngine 类：测试流程执行引擎，与界面无关。
+    依次对每个测试项执行：移动电机到绑定位置 -> 按设定次数/时间循环按压继电器。
+    组合键测试项移动到主按键（第一个按键）的位置，各按键绑定的继电器通道在同一时间窗口内同时吸合/断开。
+    通过回调函数报告进度，界面 (TestControlFrame) 与命令行 (jigctrl_run.py) 共用同一引擎。
+
+    高频模式 (burst) 下按压过程中不逐次记录日志，进度回调限频，
+    继电器时序始终使用“睡眠 + 自旋”等待，测试项结束后只汇总一次实际频率与抖动。
+
+    时间模式下测试项的结束时刻由引擎按单调时钟 (time.monotonic_ns) 计算，暂停期间的时长顺延到结束时刻；
+    界面或命令行只需读取 remaining_seconds 显示剩余时间。
+
+    测试进度（当前测试项、剩余次数、按压次数）以快照形式发布到 progress 槽，
+    界面按固定帧率读取，不需要为每次按压投递回调。
+    """
+
+    def __init__(self, relay_conn, axis_x, axis_y, bindings, settings, log_callback=None,
+                 on_item_start=None, on_progress=None, on_item_done=None, burst=False, bus=None):
+        """
+        :param relay_conn: 继电器串口连接对象
+        :param axis_x: X 轴 MotorAxis
+        :param axis_y: Y 轴 MotorAxis
+        :param bindings: KeyManager.get_bindings() 返回的绑定列表
+        :param settings: 测试参数 (press_duration / press_interval / move_timeout，单位 ms)
+        :param log_callback: 日志回调函数
+        :param on_item_start: 测试项开始回调 (index, item)，在测试线程中调用
+        :param on_progress: 按压次数更新回调 (index, mode)，在测试线程中调用
+        :param on_item_done: 测试项结束回调 (index, result)，在测试线程中调用
+        :param burst: 是否使用高频按压模式
+        :param bus: 发布结构化事件的事件总线，None 表示全局事件总线
+        """
+        self.relay_conn = relay_conn
+        self.axis_x = axis_x
+        self.axis_y = axis_y
+        self.binding_dict = {b['key_name']: b for b in bindings}
+        self.press_ns = settings.get('press_duration', 100) * NS_PER_MS
+        self.interval_ns = settings.get('press_interval', 500) * NS_PER_MS
+        self.log = log_callback if log_callback else print
+        self.on_item_start = on_item_start
+        self.on_progress = on_progress
+        self.on_item_done = on_item_done
+        self.burst = burst
+        self.bus = bus if bus is not None else BUS
+
+        # 电机移动完成检测引擎
+        self.move_engine = MoveEngine(timeout=settings.get('move_timeout', 10000) / 1000.0, log_callback=self.log)
+
+        # --- 测试状态 ---
+        self.current_item_index = 0
+        self.current_mode = None        # 当前测试项的模式 ('count' / 'time')
+        self.deadline_ns = None         # 时间模式测试项的结束时刻 (monotonic_ns)，暂停时顺延
+        self.paused_at_ns = None        # 本次暂停的开始时刻，未暂停为 None
+        self.remaining_counts = 0       # 剩余测试次数
+        self.is_running = False
+        self.is_paused = False
+        self.stop_requested = False
+        self.pause_requested = False
+        self.skip_item_requested = False
+        self.progress = ProgressSlot()  # 最新进度快照，供界面定时读取
+
+    def publish_progress(self, presses=0):
+        """
+        发布当前进度快照（在测试线程中调用）。
+
+        :param presses: 当前测试项已完成的按压次数
+        """
+        self.progress.publish(TestProgress(self.current_item_index, self.current_mode,
+                                           self.remaining_counts, presses))
+
+    @property
+    def remaining_seconds(self):
+        """
+        时间模式测试项的剩余时间（整秒，向上取整）。暂停期间保持不变。
+        可在任意线程中读取。
+        """
+        deadline = self.deadline_ns
+        if deadline is None:
+            return 0
+        paused_at = self.paused_at_ns
+        now = paused_at if paused_at is not None else time.monotonic_ns()
+        remaining = deadline - now
+        if remaining <= 0:
+            return 0
+        return -(-remaining // 1000000000)
+
+    def run(self, test_flow):
+        """
+        执行测试流程（阻塞，在后台线程中调用）。
+
+        :param test_flow: 测试项列表
+        :return: 每个已执行测试项的结果列表
+                 [{index, key_name, mode, target, presses, status, timing}, ...]，
+                 status 取值 completed / skipped / stopped / move_failed / relay_error
+        """
+        self.is_running = True
+        results = []
+
+        for i, item in enumerate(test_flow):
+            if self.stop_requested:
+                break
+
+            self.current_item_index = i
+            self.current_mode = None
+            self.publish_progress()
+            key_name = item['key_name']
+            if self.on_item_start:
+                self.on_item_start(i, item)
+            self.bus.publish(ItemStarted(time.monotonic_ns(), i, item))
+            self.snapshot_axes(i, 'before')
+
+            self.log(f"Testing item {i+1}/{len(test_flow)}: {key_name}", "TEST")
+
+            result = {
+                'index': i,
+                'key_name': key_name,
+                'mode': item.get('mode'),
+                'target': item.get('target', 0),
+                'presses': 0,
+                'status': 'completed',
+                'timing': None,
+            }
+
+            # 1. 移动电机到指定位置（组合键移动到主按键位置）
+            if not self.move_to_binding(item_keys(item)[0]):
+                result['status'] = 'move_failed'
+            elif self.stop_requested:
+                result['status'] = 'stopped'
+            elif self.skip_item_requested:
+                result['status'] = 'skipped'
+            else:
+                # 2. 执行单项按压循环
+                try:
+                    scheduler = self.create_scheduler(item)
+                except ValueError as e:
+                    self.log(f"Relay Error: {e}", "ERR")
+                    self.bus.publish(Error(time.monotonic_ns(), "relay", str(e)))
+                    result['status'] = 'relay_error'
+                else:
+                    result['presses'], result['status'] = self.run_item(i, item, scheduler)
+                    result['timing'] = scheduler.stats()
+                    self.log_timing(result['timing'])
+
+            self.snapshot_axes(i, 'after')
+            self.skip_item_requested = False
+            results.append(result)
+            if self.on_item_done:
+                self.on_item_done(i, result)
+            self.bus.publish(ItemFinished(time.monotonic_ns(), i, result))
+
+            if self.stop_requested:
+                break
+
+        self.is_running = False
+        self.current_item_index = len(test_flow)  # 全部标记为已完成
+        self.current_mode = None
+        self.publish_progress()
+        return results
+
+    def move_to_binding(self, key_name):
+        """
+        将两轴移动到按键绑定的位置。没有绑定时不移动。
+
+        :param key_name: 按键名称
+        :return: 移动失败返回 False（同时请求停止测试），其它情况返回 True
+        """
+        binding = self.binding_dict.get(key_name)
+        if not binding:
+            self.log(f"Warning: No binding found for {key_name}", "WRN")
+            return True
+
+        x_pulse = binding.get('x_pulse', 0)
+        y_pulse = binding.get('y_pulse', 0)
+        trace(self.log, "MOT", "Moving to {} (X:{}, Y:{})", key_name, x_pulse, y_pulse)
+
+        # 按当前位置换算为相对移动，两轴同时运行；两轴都停止后立即开始按压，等待期间也要检查停止请求
+        targets = [(self.axis_x, x_pulse), (self.axis_y, y_pulse)]
+        bus = self.bus
+        start_ns = time.monotonic_ns()
+        bus.publish(MoveStarted(start_ns, tuple((axis.name, axis.position, target) for axis, target in targets)))
+        try:
+            done = self.move_engine.move_to(
+                targets,
+                self.send_motor_move,
+                stop_check=lambda: self.stop_requested or self.skip_item_requested
+            )
+        except Exception as e:
+            # 移动失败，或测试中串口被关闭（I/O 线程已停止）
+            self.log(f"Move Error: {e}", "ERR")
+            end_ns = time.monotonic_ns()
+            bus.publish(Error(end_ns, "move", str(e)))
+            bus.publish(MoveDone(end_ns, False, (end_ns - start_ns) / 1e9))
+            try:
+                run_parallel([self.axis_x, self.axis_y], MotorAxis.stop)
+            except Exception as stop_error:
+                self.log(f"Motor Stop Error: {stop_error}", "ERR")
+            self.stop_requested = True
+            return False
+        end_ns = time.monotonic_ns()
+        bus.publish(MoveDone(end_ns, done, (end_ns - start_ns) / 1e9))
+        return True
+
+    # 测试项前后快照的寄存器：方向、运行状态、速度、脉冲数、脱机使能、加减速系数、脉冲计数
+    # （按块合并读取，每轴一到两次往返）
+    SNAPSHOT_REGISTERS = (0x01, 0x02, 0x04, 0x05, 0x09, 0x0E, 0x18, 0x19)
+
+    def snapshot_axes(self, index, phase):
+        """
+        读取两轴的状态寄存器，发布 AxisSnapshot 事件并记录 MOT 跟踪日志。
+        没有订阅者且 MOT 跟踪关闭时不读取；读取失败只记录日志，不影响测试。
+
+        :param index: 测试项索引
+        :param phase: 'before' / 'after'
+        """
+        bus = self.bus
+        if not (bus.wants(AxisSnapshot) or TRACE.enabled("MOT")):
+            return
+        axes = [self.axis_x, self.axis_y]
+        try:
+            snapshots = run_parallel(axes, self.read_axis_snapshot)
+        except Exception as e:
+            self.log(f"Axis snapshot failed: {e}", "ERR")
+            return
+        ts_ns = time.monotonic_ns()
+        for axis, registers in zip(axes, snapshots):
+            bus.publish(AxisSnapshot(ts_ns, index, phase, axis.name, registers))
+            if TRACE.enabled("MOT"):
+                values = ' '.join(f"{register:02X}={value}" for register, value in sorted(registers.items()))
+                self.log(f"Axis {axis.name} {phase} item {index + 1}: {values}", "MOT")
+
+    def read_axis_snapshot(self, axis):
+        """
+        按块读取单轴的状态寄存器（在该轴的 I/O 线程中执行）。
+
+        :param axis: MotorAxis 对象
+        :return: {寄存器地址: 值}
+        """
+        return modbus_rtu.read_registers(axis.serial_conn, axis.addr, self.SNAPSHOT_REGISTERS)
+
+    # 高频模式下进度回调的最小间隔
+    BURST_PROGRESS_INTERVAL_NS = 100 * NS_PER_MS
+
+    def relay_channels(self, item):
+        """
+        获取测试项需要驱动的继电器通道（各按键绑定的 relay_channel，未设置时为通道 1）。
+
+        :param item: 测试项字典
+        :return: 升序排列的通道号列表
+        """
+        channels = []
+        for key in item_keys(item):
+            binding = self.binding_dict.get(key) or {}
+            channel = binding.get('relay_channel', lc_relay.DEFAULT_CHANNEL)
+            if channel in channels:
+                self.log(f"Warning: {key} shares relay channel {channel} with another key in this item", "WRN")
+                continue
+            channels.append(channel)
+        return sorted(channels)
+
+    def create_scheduler(self, item):
+        """
+        为测试项创建继电器时序调度器。各通道的指令帧预先拼接，每次吸合/断开只写一次串口。
+        高频模式下按预计按压次数预先分配时间戳缓冲区，并强制自旋等待。
+
+        :param item: 测试项字典
+        :return: RelayScheduler 对象
+        """
+        on_frame, off_frame = lc_relay.build_chord_frames(self.relay_channels(item))
+        if not self.burst:
+            return RelayScheduler(self.relay_conn, on_frame, off_frame, self.press_ns, self.interval_ns)
+
+        if item.get('mode') == 'time':
+            period = self.press_ns + self.interval_ns
+            capacity = item_duration_seconds(item) * 1000000000 // period + 1 if period else 0
+        else:
+            capacity = item.get('target', 0)
+        return RelayScheduler(self.relay_conn, on_frame, off_frame, self.press_ns, self.interval_ns,
+                              spin_ns=DEFAULT_SPIN_NS, capacity=capacity)
+
+    def run_item(self, index, item, scheduler):
+        """
+        执行单个测试项的按压循环。按压时序由 scheduler 按绝对截止时间控制。
+
+        :param index: 测试项索引
+        :param item: 测试项字典
+        :param scheduler: RelayScheduler 对象
+        :return: (实际按压次数, 结束状态)
+        """
+        mode = item.get('mode')
+        self.current_mode = mode
+        if mode == 'time':
+            self.deadline_ns = time.monotonic_ns() + int(item_duration_seconds(item) * 1000000000)
+        else:
+            self.deadline_ns = None
+            self.remaining_counts = item.get('target', 0)
+        self.publish_progress()
+        if self.on_progress:
+            self.on_progress(index, mode)
+
+        presses = 0
+        burst = self.burst
+        bus = self.bus
+        on_hex = off_hex = None  # 帧内容在第一次需要记录时才格式化
+        last_progress_ns = 0
+        scheduler.start()
+        while self.is_running:
+            if self.stop_requested:
+                return presses, 'stopped'
+            if self.skip_item_requested:
+                return presses, 'skipped'
+
+            # 检查暂停
+            if self.pause_requested:
+                self.paused_at_ns = time.monotonic_ns()
+                self.is_paused = True
+                while self.pause_requested and not self.stop_requested:
+                    time.sleep(0.05)
+                # 暂停时长顺延到结束时刻
+                if self.deadline_ns is not None:
+                    self.deadline_ns += time.monotonic_ns() - self.paused_at_ns
+                self.paused_at_ns = None
+                self.is_paused = False
+                if self.stop_requested:
+                    return presses, 'stopped'
+                # 暂停恢复后从当前时刻重新排定时序
+                scheduler.start()
+
+            # 执行动作
+            try:
+                # 吸合 -> 保持按压时长 -> 断开；日志在按压完成后的间隔内记录，不影响时序
+                on_ns, off_ns = scheduler.press()
+                # 没有订阅者时不创建事件对象
+                if bus.wants(PressOn):
+                    bus.publish(PressOn(on_ns, index, presses + 1))
+                if bus.wants(PressOff):
+                    bus.publish(PressOff(off_ns, index, presses + 1))
+                if not burst and TRACE.enabled("COM"):
+                    if on_hex is None:
+                        on_hex = hex_bytes(scheduler.on_frame)
+                        off_hex = hex_bytes(scheduler.off_frame)
+                    self.log(f"Relay ON: {on_hex}", "COM")
+                    self.log(f"Relay OFF: {off_hex}", "COM")
+            except Exception as e:
+                self.log(f"Relay Error: {e}", "ERR")
+                bus.publish(Error(time.monotonic_ns(), "relay", str(e)))
+                return presses, 'relay_error'
+            presses += 1
+
+            if mode == 'count':
+                self.remaining_counts -= 1
+                self.publish_progress(presses)
+                if self.remaining_counts <= 0:
+                    break
+            else:
+                self.publish_progress(presses)
+                if time.monotonic_ns() >= self.deadline_ns:
+                    break
+
+            if self.on_progress:
+                if not burst:
+                    self.on_progress(index, mode)
+                elif off_ns - last_progress_ns >= self.BURST_PROGRESS_INTERVAL_NS:
+                    last_progress_ns = off_ns
+                    self.on_progress(index, mode)
+
+        if self.on_progress:
+            self.on_progress(index, mode)
+
+        # 保留最后一次按压后的间隔
+        scheduler.finish()
+        return presses, 'completed'
+
+    def log_timing(self, timing):
+        """
+        记录测试项的实际按压时序统计。
+
+        :param timing: RelayScheduler.stats() 的返回值
+        """
+        if not timing:
+            return
+        self.log(
+            f"Relay timing: {timing['presses']} presses, rate {timing['rate_hz']:.2f} Hz "
+            f"(period {timing['period_ms']:.3f} ms), "
+            f"duty {timing['duty'] * 100:.2f}% (target {timing['target_duty'] * 100:.2f}%), "
+            f"on jitter p50/p99/max {timing['on_jitter_p50_ms']:.3f}/{timing['on_jitter_p99_ms']:.3f}/{timing['on_jitter_max_ms']:.3f} ms, "
+            f"off jitter p50/p99/max {timing['off_jitter_p50_ms']:.3f}/{timing['off_jitter_p99_ms']:.3f}/{timing['off_jitter_max_ms']:.3f} ms",
+            "TEST"
+        )
+
+    def send_motor_move(self, axis, direction, pulse):
+        """
+        发送一段相对移动指令 (Modbus RTU)：方向 (0x01)、脉冲数 (0x05)、运行 (0x02)。
+        每条写指令都等待控制器回显；与影子缓存中已确认的值相同的参数跳过写入。
+        在该轴的 I/O 线程中执行。
+
+        :param axis: MotorAxis 对象
+        :param direction: 方向寄存器值 (1 正转 / 0 反转)
+        :param pulse: 脉冲数 (1 - 65535)
+        :return: 运行指令是否被控制器确认
+        """
+        conn = axis.serial_conn
+        if not conn or not conn.is_open:
+            return False
+        try:
+            for register, value, desc in ((0x01, direction, "Set Direction"),
+                                          (0x05, pulse, "Set Pulse"),
+                                          (0x02, 0x0001, "Run")):
+                response, skipped = modbus_rtu.write_register(conn, axis.addr, register, value, shadow=axis.shadow)
+                if not skipped and self.bus.wants(TxFrame):
+                    self.bus.publish(TxFrame(time.monotonic_ns(), axis.name,
+                                             modbus_rtu.build_write_frame(axis.addr, register, value), desc))
+                if not skipped and self.bus.wants(RxFrame):
+                    self.bus.publish(RxFrame(time.monotonic_ns(), axis.name, response, desc))
+                if skipped:
+                    trace(self.log, "COM", "Motor {} {} ({}): unchanged, skipped", axis.name, desc, value)
+                    continue
+                if TRACE.enabled("COM"):
+                    frame = modbus_rtu.build_write_frame(axis.addr, register, value)
+                    self.log(f"Motor {axis.name} {desc} ({value}): {hex_bytes(frame)}", "COM")
+                if not response or modbus_rtu.is_exception_response(response):
+                    detail = f"{desc} failed: {hex_bytes(response) if response else 'timeout'}"
+                    self.log(f"Motor {axis.name} {detail}", "ERR")
+                    self.bus.publish(Error(time.monotonic_ns(), f"motor {axis.name}", detail))
+                    return False
+            return True
+        except Exception as e:
+            self.log(f"Motor {axis.name} Command Error: {e}", "ERR")
+            self.bus.publish(Error(time.monotonic_ns(), f"motor {axis.name}", str(e)))
+            return False
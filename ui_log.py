@@ -1,21 +1,204 @@
 import tkinter as tk
-from tkinter import ttk, scrolledtext, filedialog, messagebox
+from tkinter import ttk, filedialog, messagebox
+import tkinter.font as tkfont
 import datetime
+import threading
+import time
+from bisect import bisect_left
+from log_store import LogStore
+from log_index import LogIndex, FilterTask
+from log_sink import LogSink, default_log_dir
+from log_export import LogExporter, LogFilter
+from log_trace import TRACE, TRACE_LEVELS
+from event_bus import BUS, LogMessage
+
+# =========================================================================
+# 辅助类：虚拟化日志显示 (LogViewer)
+# =========================================================================
+class LogViewer(ttk.Frame):
+    """
+    LogViewer 类：只绘制可见行的日志显示组件。
+    Text 组件只保存当前窗口内的几十行，每次滚动或有新日志时整体重绘；
+    纵向滚动条按全部记录数计算位置，较长的行不换行，通过横向滚动条查看；分类颜色在绘制时通过标签设置。
+    显示内容为 LogStore 中的全部记录，或一组筛选结果（记录序号列表）。
+    """
+
+    # 鼠标滚轮每格滚动的行数
+    WHEEL_LINES = 3
+
+    def __init__(self, master, store, font=("Cambria", 10), **text_options):
+        """
+        :param master: 父容器组件
+        :param store: LogStore 对象
+        :param font: 字体
+        :param text_options: 传给 Text 组件的其它参数（颜色等）
+        """
+        super().__init__(master)
+        self.store = store
+        self.seqs = None       # 筛选结果（升序序号列表），None 表示显示全部记录
+        self.top = 0           # 第一条可见记录的位置键（全部记录时为序号，筛选结果时为列表下标）
+        self.follow = True     # 是否自动跟随最新日志
+        self.drawn = None      # 上次绘制时的状态，状态不变时不重绘
+
+        self.font = tkfont.Font(font=font)
+        self.text = tk.Text(self, font=self.font, wrap=tk.NONE, state='disabled', height=20, **text_options)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.on_scroll)
+        self.xscrollbar = ttk.Scrollbar(self, orient=tk.HORIZONTAL, command=self.text.xview)
+        self.text.config(xscrollcommand=self.xscrollbar.set)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.xscrollbar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.text.bind("<Configure>", lambda e: self.draw())
+        self.text.bind("<MouseWheel>", lambda e: self.scroll_lines(-self.WHEEL_LINES if e.delta > 0 else self.WHEEL_LINES))
+        self.text.bind("<Button-4>", lambda e: self.scroll_lines(-self.WHEEL_LINES))
+        self.text.bind("<Button-5>", lambda e: self.scroll_lines(self.WHEEL_LINES))
+
+    def tag_configure(self, tag, **options):
+        """配置分类颜色标签"""
+        self.text.tag_configure(tag, **options)
+
+    def bounds(self):
+        """
+        当前显示内容的位置键范围。
+
+        :return: (第一条, 最后一条之后)；筛选结果中已被存储覆盖的记录不再显示
+        """
+        if self.seqs is None:
+            return self.store.first_seq, self.store.next_seq
+        return bisect_left(self.seqs, self.store.first_seq), len(self.seqs)
+
+    def rows(self):
+        """可见行数"""
+        return max(self.text.winfo_height() // self.font.metrics('linespace'), 1)
+
+    def iter_seqs(self):
+        """按顺序遍历当前显示内容的全部记录序号"""
+        first, end = self.bounds()
+        if self.seqs is None:
+            return iter(range(first, end))
+        return iter(self.seqs[first:end])
+
+    def set_view(self, seqs):
+        """
+        切换显示内容并跳到最新记录。
+
+        :param seqs: 筛选结果（升序序号列表），None 表示显示全部记录
+        """
+        self.seqs = seqs
+        self.follow = True
+        self.draw()
+
+    def scroll_lines(self, lines):
+        """按行滚动"""
+        self.scroll_to(self.top + lines)
+        return "break"
+
+    def on_scroll(self, action, amount, unit=None):
+        """滚动条回调"""
+        first, end = self.bounds()
+        if action == tk.MOVETO:
+            self.scroll_to(first + int(float(amount) * (end - first)))
+        elif unit == tk.PAGES:
+            self.scroll_to(self.top + int(amount) * self.rows())
+        else:
+            self.scroll_to(self.top + int(amount))
+
+    def scroll_to(self, top):
+        """滚动到指定位置；滚动到底部时恢复自动跟随"""
+        first, end = self.bounds()
+        last_top = max(end - self.rows(), first)
+        self.top = min(max(top, first), last_top)
+        self.follow = self.top >= last_top
+        self.draw()
+
+    def draw(self):
+        """重绘可见窗口内的记录（自动跟随时显示最新记录）"""
+        first, end = self.bounds()
+        rows = self.rows()
+        if self.follow:
+            self.top = max(end - rows, first)
+        else:
+            self.top = min(max(self.top, first), max(end - rows, first))
+
+        state = (self.seqs is None, id(self.seqs), first, end, self.top, rows)
+        if state == self.drawn:
+            return
+        self.drawn = state
+
+        store = self.store
+        get = store.get
+        stop = min(self.top + rows, end)
+        keys = range(self.top, stop) if self.seqs is None else self.seqs[self.top:stop]
+        chunks = []
+        for seq in keys:
+            record = get(seq)
+            category = record.category
+            # 分段插入以应用不同颜色: (文本, 标签) 依次排列
+            chunks.extend((f"[{store.timestamp_text(record)}] ", "TIMESTAMP",
+                           f"[{category}] ", category, f"{record.message}\n", ""))
+
+        # 重绘后保持横向滚动位置
+        x = self.text.xview()[0]
+        self.text.config(state='normal')
+        self.text.delete("1.0", tk.END)
+        if chunks:
+            self.text.insert(tk.END, *chunks)
+        self.text.config(state='disabled')
+        self.text.xview_moveto(x)
+
+        total = end - first
+        if total <= rows:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set((self.top - first) / total, (stop - first) / total)
+
+    def reset(self):
+        """清空后强制重绘"""
+        self.drawn = None
+        self.set_view(None)
 
 class LogFrame(ttk.Frame):
     """
     LogFrame 类：日志管理界面类，继承自 ttk.Frame。
     提供日志的实时显示、内存存储、多条件筛选、恢复显示、导出及清空功能。
+    add_log 可在任意线程中调用：日志先放入线程安全队列，由界面线程定时批量写入显示区域。
+    日志保存在固定容量的 LogStore 中，由 LogViewer 只绘制可见的几十行；
+    全部日志同时由 LogSink 在后台写入 logs 目录下的分段文件。
     """
+
+    # 界面线程批量写入日志的周期 (ms)
+    LOG_DRAIN_MS = 50
+
+    # 导出进度的刷新周期 (ms)
+    EXPORT_POLL_MS = 100
+
     def __init__(self, master=None):
         super().__init__(master)
         # --- 成员变量初始化 ---
-        # 存储所有日志的列表，每条日志为一个元组: (datetime对象, 分类字符串, 消息内容, 完整日志行)
-        self.all_logs = [] 
+        # 日志存储：内存中保留最近的记录（全部记录已由 LogSink 落盘）
+        self.store = LogStore()
+        # 分类与关键字索引，筛选时不再逐条扫描
+        self.index = LogIndex(self.store)
+        # 日志落盘：每条日志都写入分段文件
+        self.sink = LogSink(default_log_dir(), wall_offset_ns=self.store.wall_offset_ns, bus=BUS)
+        self.sink_error_reported = False
         # 预定义的日志分类标签
         self.categories = ['SYS', 'MOT', 'SET', 'SER', 'TEST', 'REL', 'ERR']
         # 标记当前是否处于筛选状态
         self.is_filtered = False
+        # 当前筛选条件 (start_time, end_time, category, keyword)，未筛选时为 None
+        self.filter_args = None
+        # 最近一次清空时内存存储的起始序号与时刻（墙上时钟 ns），导出时不包含清空前的记录
+        self.clear_seq = 0
+        self.clear_wall_ns = None
+        # 正在进行的导出任务 (LogExporter)
+        self.exporter = None
+        # 正在后台执行的筛选 (FilterTask)
+        self.filter_task = None
+        # 订阅事件总线上的日志，等待界面线程写入存储；容量与存储相同，更早的记录本来也会被覆盖
+        self.log_events = BUS.subscribe(LogMessage, self.store.capacity)
+        self.dropped_reported = 0  # 已报告的因队列满丢弃的日志数
         
         # 填充父容器并设置内边距
         self.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -24,6 +207,8 @@ class LogFrame(ttk.Frame):
         self.create_widgets()
         # 添加初始模拟日志
         self.add_mock_logs()
+        # 启动日志批量写入
+        self.after(self.LOG_DRAIN_MS, self.drain_logs)
 
     # =========================================================================
     # 界面构建分区 (UI Construction)
@@ -47,18 +232,31 @@ class LogFrame(ttk.Frame):
         self.btn_export = ttk.Button(self.toolbar, text="💾 Export Log", command=self.export_log)
         self.btn_export.pack(side=tk.RIGHT, padx=5)
 
+        # 导出进度
+        self.lbl_export = ttk.Label(self.toolbar, text="")
+        self.lbl_export.pack(side=tk.RIGHT, padx=5)
+
         # 4. 清空日志按钮
         self.btn_clear = ttk.Button(self.toolbar, text="🗑️ Clear Log", style="Danger.TButton", command=self.clear_log_with_confirm)
         self.btn_clear.pack(side=tk.RIGHT, padx=5)
 
+        # 5. 通讯跟踪开关 (COM / MOT)：关闭后不再格式化和记录该级别的收发日志
+        self.trace_vars = {}
+        for level in TRACE_LEVELS:
+            var = tk.BooleanVar(value=TRACE.switch(level))
+            ttk.Checkbutton(
+                self.toolbar, text=f"{level} Trace", variable=var,
+                command=lambda level=level: self.toggle_trace(level)
+            ).pack(side=tk.LEFT, padx=5)
+            self.trace_vars[level] = var
+
         # --- 日志显示区域 (Log Area) ---
         log_container = ttk.Frame(self, style="Card.TFrame")
         log_container.pack(fill=tk.BOTH, expand=True)
 
-        self.log_area = scrolledtext.ScrolledText(
-            log_container, 
-            state='disabled', 
-            height=20, 
+        self.log_area = LogViewer(
+            log_container,
+            self.store,
             font=("Cambria", 10),
             bg="#2b2b2b", # 深色背景
             fg="#d1d1d1", # 浅灰色文字
@@ -78,31 +276,57 @@ class LogFrame(ttk.Frame):
         self.log_area.tag_configure("COM", foreground="#7f8c8d")    # 灰色 (通讯日志)
         self.log_area.tag_configure("TIMESTAMP", foreground="#586e75") # 时间戳颜色
 
+    def toggle_trace(self, level):
+        """
+        打开或关闭跟踪日志级别。
+
+        :param level: 级别名称，如 "COM"
+        """
+        enabled = self.trace_vars[level].get()
+        TRACE.set_enabled(level, enabled)
+        self.add_log(f"{level} trace {'enabled' if enabled else 'disabled'}", "SYS")
+
     def add_log(self, message, category="SYS"):
         """
-        向系统添加一条新日志。
+        向系统添加一条新日志（可在任意线程中调用）。
+        只发布到事件总线，由日志页与落盘线程各自的订阅队列接收，不直接操作界面组件。
         """
-        now = datetime.datetime.now()
-        timestamp_str = now.strftime("%H:%M:%S") + f".{now.microsecond // 1000:03d}"
-        
-        entry_time = f"[{timestamp_str}] "
-        entry_cat = f"[{category}] "
-        entry_msg = f"{message}\n"
-        
-        # 将日志数据存储在内存列表中
-        self.all_logs.append((now, category, message, f"{entry_time}{entry_cat}{entry_msg}"))
-        
-        if not self.is_filtered:
-            self.log_area.config(state='normal')
-            
-            # 分段插入以应用不同颜色
-            start_idx = self.log_area.index(tk.END + "-1c")
-            self.log_area.insert(tk.END, entry_time, "TIMESTAMP")
-            self.log_area.insert(tk.END, entry_cat, category)
-            self.log_area.insert(tk.END, entry_msg)
-            
-            self.log_area.see(tk.END)
-            self.log_area.config(state='disabled')
+        BUS.log(message, category)
+
+    def drain_logs(self):
+        """
+        界面线程定时任务：取出队列中的全部日志，存入日志存储并建立索引，
+        最后重绘一次可见窗口。
+        """
+        events = self.log_events.drain()
+        for ts_ns, category, message in events:
+            self.index.add(self.store.append(ts_ns, category, message))
+        received = bool(events)
+
+        # 筛选状态下新日志不加入显示，但被覆盖的旧结果需要移出；后台筛选期间显示已得到的部分结果
+        task = self.filter_task
+        finished = task is not None and task.done
+        if received or task:
+            self.log_area.draw()
+        if finished:
+            self.filter_task = None
+            if task.error and not task.cancelled:
+                self.add_log(f"Error filtering log: {task.error}", "ERR")
+
+        if self.sink.error and not self.sink_error_reported:
+            self.sink_error_reported = True
+            self.add_log(f"Error writing log file: {self.sink.error}", "ERR")
+        dropped = self.log_events.dropped + self.sink.events.dropped
+        if dropped != self.dropped_reported:
+            self.add_log(f"{dropped - self.dropped_reported} log messages dropped (queue full)", "ERR")
+            self.dropped_reported = dropped
+
+        self.after(self.LOG_DRAIN_MS, self.drain_logs)
+
+    def close(self):
+        """程序退出时把剩余日志写入磁盘并关闭日志文件"""
+        BUS.unsubscribe(self.log_events)
+        self.sink.close()
 
     def add_mock_logs(self):
         """
@@ -122,6 +346,7 @@ class LogFrame(ttk.Frame):
         恢复日志显示：取消筛选状态，显示所有历史日志。
         """
         self.is_filtered = False
+        self.filter_args = None
         # 隐藏恢复按钮
         self.btn_recover.pack_forget()
         # 重新应用无条件的筛选逻辑（即显示全部）
@@ -131,7 +356,7 @@ class LogFrame(ttk.Frame):
         """
         清空日志前的确认逻辑：询问用户是否需要先保存。
         """
-        if not self.all_logs:
+        if not len(self.store):
             return
 
         # 弹出确认对话框：是(导出并清空), 否(直接清空), 取消(不做操作)
@@ -148,43 +373,95 @@ class LogFrame(ttk.Frame):
         """
         执行具体的日志清空操作。
         """
-        # 清空内存存储
-        self.all_logs = []
+        # 取消正在进行的筛选并清空内存存储
+        self.cancel_filter()
+        self.store.clear()
+        self.index.clear()
+        self.clear_seq = self.store.first_seq
+        self.clear_wall_ns = time.time_ns()
         self.is_filtered = False
+        self.filter_args = None
         # 隐藏恢复按钮
         self.btn_recover.pack_forget()
         # 清空 UI 显示
-        self.log_area.config(state='normal')
-        self.log_area.delete("1.0", tk.END)
-        self.log_area.config(state='disabled')
+        self.log_area.reset()
         # 记录一条清空操作的日志
         self.add_log("Log cleared.", "SYS")
 
     def export_log(self):
         """
-        将当前显示的日志内容导出到文本文件。
-        返回: 布尔值，表示导出是否成功。
+        把当前显示的日志（全部或筛选结果）导出为 JSONL / CSV / 文本文件。
+        导出在后台线程中进行，内存中较早被覆盖的记录从磁盘分段文件中读取。
+        返回: 布尔值，表示导出是否已开始。
         """
+        if self.exporter:
+            messagebox.showinfo("Export Log", "An export is already in progress.")
+            return False
+        if self.filter_task:
+            messagebox.showinfo("Export Log", "Filtering is still in progress.")
+            return False
+
         # 生成默认文件名：test_年月日_时分秒
         default_filename = "test_" + datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
         # 弹出文件保存对话框
         file_path = filedialog.asksaveasfilename(
-            defaultextension=".txt",
+            defaultextension=".jsonl",
             initialfile=default_filename,
-            filetypes=[("Text Files", "*.txt"), ("All Files", "*.*")]
+            filetypes=[("JSON Lines", "*.jsonl"), ("CSV Files", "*.csv"), ("Text Files", "*.txt"), ("All Files", "*.*")]
         )
-        if file_path:
-            try:
-                # 仅获取当前 log_area 中可见的内容（可能是筛选后的结果）
-                content = self.log_area.get("1.0", tk.END)
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
-                self.add_log(f"Log exported to {file_path}", "SYS")
-                return True
-            except Exception as e:
-                self.add_log(f"Error exporting log: {e}", "ERR")
-                return False
-        return False
+        if not file_path:
+            return False
+
+        # 在界面线程中取得内存记录的快照，之后的新日志或清空不影响本次导出；
+        # 筛选状态下直接使用已完成的筛选结果，不在界面线程中重新查询
+        store = self.store
+        if self.filter_args:
+            first_seq = store.first_seq
+            seqs = [seq for seq in self.log_area.seqs if seq >= first_seq]
+            log_filter = LogFilter(*self.filter_args)
+        else:
+            seqs = range(store.first_seq, store.next_seq)
+            log_filter = None
+        records = [store.get(seq) for seq in seqs]
+
+        # 清空之后有记录被内存存储覆盖时，这部分记录从分段文件中读取
+        segment_before_ns = None
+        if store.first_seq > self.clear_seq and len(store):
+            segment_before_ns = store.wall_ns(store.get(store.first_seq))
+
+        self.exporter = LogExporter(
+            file_path, records, store.wall_offset_ns,
+            segment_paths=self.sink.session_segments,
+            segment_from_ns=self.clear_wall_ns,
+            segment_before_ns=segment_before_ns,
+            log_filter=log_filter
+        )
+        threading.Thread(target=self.run_export, args=(self.exporter,), daemon=True).start()
+        self.btn_export.config(state=tk.DISABLED)
+        self.poll_export()
+        return True
+
+    def run_export(self, exporter):
+        """导出后台线程"""
+        count = exporter.run()
+        if exporter.error:
+            self.add_log(f"Error exporting log: {exporter.error}", "ERR")
+        else:
+            self.add_log(f"Log exported to {exporter.file_path} ({count} records)", "SYS")
+
+    def poll_export(self):
+        """定时刷新导出进度，导出结束后恢复导出按钮"""
+        exporter = self.exporter
+        if exporter is None:
+            return
+        if exporter.done:
+            self.exporter = None
+            self.lbl_export.config(text="")
+            self.btn_export.config(state=tk.NORMAL)
+            return
+        done, total = exporter.progress
+        self.lbl_export.config(text=f"Exporting... {done * 100 // total}%")
+        self.after(self.EXPORT_POLL_MS, self.poll_export)
 
     # =========================================================================
     # 筛选逻辑分区 (Filter Logic)
@@ -195,7 +472,7 @@ class LogFrame(ttk.Frame):
         """
         filter_win = tk.Toplevel(self)
         filter_win.title("Filter Logs")
-        filter_win.geometry("550x500")
+        filter_win.geometry("550x540")
         filter_win.resizable(False, False)
         filter_win.configure(bg="white")
         # 设置为模态窗口
@@ -298,6 +575,50 @@ class LogFrame(ttk.Frame):
             cat_var.set("")
             content_var.set("")
 
+        # --- 筛选进度（筛选在后台执行，期间可取消）---
+        progress_frame = ttk.Frame(filter_win, padding=(10, 0))
+        progress_frame.pack(fill=tk.X, side=tk.BOTTOM)
+        progress_bar = ttk.Progressbar(progress_frame, mode='determinate', maximum=100)
+        lbl_progress = ttk.Label(progress_frame, text="")
+        # 正在执行的筛选任务及筛选前的显示状态
+        filter_state = {'task': None, 'previous': None}
+
+        def poll_filter():
+            """定时刷新筛选进度，完成后关闭筛选窗口"""
+            task = filter_state['task']
+            if task is None or not filter_win.winfo_exists():
+                return
+            done, total = task.progress
+            progress_bar['value'] = done * 100 // total if total else 0
+            lbl_progress.config(text=f"{len(task.results)} matches")
+            if task.done:
+                filter_win.destroy()
+                return
+            filter_win.after(100, poll_filter)
+
+        def cancel_filter_action():
+            """取消后台筛选，恢复筛选前的显示"""
+            if filter_state['task'] is not None:
+                self.cancel_filter()
+                filter_state['task'] = None
+                was_filtered, filter_args, seqs = filter_state['previous']
+                self.is_filtered = was_filtered
+                self.filter_args = filter_args
+                if not was_filtered:
+                    self.btn_recover.pack_forget()
+                self.log_area.set_view(seqs)
+            filter_win.destroy()
+
+        def on_close():
+            """关闭窗口：筛选进行中时视为取消"""
+            task = filter_state['task']
+            if task is not None and not task.done:
+                cancel_filter_action()
+            else:
+                filter_win.destroy()
+
+        filter_win.protocol("WM_DELETE_WINDOW", on_close)
+
         def apply_filter_action():
             """执行筛选动作：验证输入并调用主界面的筛选逻辑"""
             s_time = get_dt_from_vars(start_vars)
@@ -313,12 +634,25 @@ class LogFrame(ttk.Frame):
                 return
 
             # 设置筛选状态并显示恢复按钮
+            previous = (self.is_filtered, self.filter_args, self.log_area.seqs)
             self.is_filtered = True
             self.btn_recover.pack(side=tk.LEFT, padx=5, after=self.btn_filter)
-            # 应用筛选逻辑
-            self.apply_filter(s_time, e_time, cat_var.get().strip(), content_var.get().strip())
-            # 关闭筛选窗口
-            filter_win.destroy()
+            # 应用筛选逻辑（后台执行）
+            task = self.apply_filter(s_time, e_time, cat_var.get().strip(), content_var.get().strip())
+            if task is None:
+                filter_win.destroy()
+                return
+
+            # 筛选期间释放模态抓取，其它页签（停止测试等）保持可用；显示进度与取消按钮
+            filter_state['task'] = task
+            filter_state['previous'] = previous
+            filter_win.grab_release()
+            btn_reset.config(state=tk.DISABLED)
+            btn_apply.config(state=tk.DISABLED)
+            btn_cancel.pack(side=tk.RIGHT, padx=10)
+            lbl_progress.pack(side=tk.RIGHT, padx=(10, 0))
+            progress_bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
+            poll_filter()
 
         # 底部按钮布局
         btn_reset = ttk.Button(btn_action_frame, text="Reset", command=reset_filters_ui)
@@ -327,29 +661,42 @@ class LogFrame(ttk.Frame):
         btn_apply = ttk.Button(btn_action_frame, text="Filter", command=apply_filter_action)
         btn_apply.pack(side=tk.RIGHT, padx=10)
 
+        # 取消按钮（仅在筛选进行中显示）
+        btn_cancel = ttk.Button(btn_action_frame, text="Cancel", command=cancel_filter_action)
+
     def apply_filter(self, start_time, end_time, category, keyword):
         """
-        根据给定条件，对内存中的所有日志进行过滤并刷新显示。
+        根据给定条件，在后台线程中通过日志索引查找内存中的日志，结果逐块显示。
         参数:
             start_time: 起始时间 (datetime对象)
             end_time: 结束时间 (datetime对象)
             category: 分类关键字 (字符串)
             keyword: 消息关键字 (字符串)
+        返回: 后台筛选任务 (FilterTask)；没有任何条件时直接显示全部日志并返回 None
         """
-        self.log_area.config(state='normal')
-        # 先清空显示区域
-        self.log_area.delete("1.0", tk.END)
-        
-        # 遍历所有存储的日志并检查条件
-        for log_time, log_cat, log_msg, full_entry in self.all_logs:
-            if start_time and log_time < start_time: continue
-            if end_time and log_time > end_time: continue
-            if category and category.upper() not in log_cat.upper(): continue
-            if keyword and keyword.lower() not in log_msg.lower(): continue
-            
-            # 满足所有条件的日志行将被插入
-            self.log_area.insert(tk.END, full_entry)
-            
-        # 滚动到最新位置并重新禁用编辑
-        self.log_area.see(tk.END)
-        self.log_area.config(state='disabled')
+        self.cancel_filter()
+        if not (start_time or end_time or category or keyword):
+            # 没有任何条件时显示全部日志
+            self.filter_args = None
+            self.log_area.set_view(None)
+            return None
+
+        self.filter_args = (start_time, end_time, category, keyword)
+        store = self.store
+        task = FilterTask(
+            self.index,
+            store.monotonic_ns_of(start_time) if start_time else None,
+            store.monotonic_ns_of(end_time) if end_time else None,
+            category, keyword
+        )
+        # 显示结果列表本身，后台线程追加结果后由定时任务重绘
+        self.filter_task = task
+        self.log_area.set_view(task.results)
+        task.start()
+        return task
+
+    def cancel_filter(self):
+        """取消正在后台执行的筛选"""
+        if self.filter_task:
+            self.filter_task.cancel()
+            self.filter_task = None
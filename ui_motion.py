@@ -1,10 +1,15 @@
 import tkinter as tk
 from tkinter import ttk
-import struct
 import threading
 import time
+import modbus_rtu
+from log_trace import hex_bytes, trace
+from event_bus import BUS
+from serial_worker import when_all
+from move_engine import MotorAxis, MoveEngine, MoveError
 from key_manager import KeyManager
 from key_selection_window import KeySelectionWindow
+import lc_relay
 
 
 class MotionControlFrame(ttk.Frame):
@@ -15,6 +20,12 @@ class MotionControlFrame(ttk.Frame):
     X轴使用左右方向键控制，Y轴使用上下方向键控制。
     """
 
+    # 坐标轴列表：(轴名称, 串口键名)
+    AXES = [
+        ("X-Axis", "X-Axis Motor"),
+        ("Y-Axis", "Y-Axis Motor")
+    ]
+
     def __init__(self, master=None, settings_source=None, log_callback=None):
         super().__init__(master)
         self.settings_source = settings_source
@@ -29,6 +40,7 @@ class MotionControlFrame(ttk.Frame):
         self.is_long_press = {}
         self.is_pressing = {}
         self.press_timer = {}
+        self.press_check = {}  # 按下时提交的“电机是否运行”查询 Future
 
         # 脉冲数显示变量
         self.x_pulse_var = tk.StringVar(value="--")
@@ -217,19 +229,18 @@ class MotionControlFrame(ttk.Frame):
         if self.is_pressing.get(direction, False):
             return
 
-        # 先检查电机是否正在运行
         serial_conn = self.get_serial_connection(serial_key)
-        if serial_conn:
-            if self.is_motor_running(serial_conn, serial_key):
-                self.log(f"Button pressed: {direction} ({axis_name}) - Ignored, motor is already running", "MOT")
-                # 标记此次按键被忽略，这样 release 不会执行操作
-                self.is_pressing[direction] = False
-                self.is_long_press[direction] = False
-                return
-        else:
+        worker = self.get_serial_worker(serial_key)
+        if not serial_conn or not worker:
             self.log(f"Button pressed: {direction} ({axis_name}) - {serial_key} not connected", "ERR")
             return
 
+        # 先在 I/O 线程中检查电机是否正在运行，结果通过回调返回，不阻塞界面
+        self.press_check[direction] = worker.submit(
+            self.is_motor_running, serial_conn, serial_key,
+            callback=lambda running: self.on_press_checked(direction, running)
+        )
+
         self.is_pressing[direction] = True
         self.is_long_press[direction] = False
         self.press_start_time[direction] = time.time() * 1000
@@ -243,6 +254,52 @@ class MotionControlFrame(ttk.Frame):
 
         self.log(f"Button pressed: {direction} ({axis_name})", "MOT")
 
+    def on_press_checked(self, direction, running):
+        """
+        按下时运行状态查询的回调（在界面线程中执行）。
+        如果电机正在运行，则忽略此次按键，release 也不再执行操作。
+        """
+        if not running:
+            return
+
+        axis_name, _, _ = self.get_axis_info(direction)
+        self.log(f"Button pressed: {direction} ({axis_name}) - Ignored, motor is already running", "MOT")
+
+        # 标记此次按键被忽略，这样 release 不会执行操作
+        self.is_pressing[direction] = False
+        self.is_long_press[direction] = False
+        if direction in self.press_timer:
+            self.after_cancel(self.press_timer[direction])
+            del self.press_timer[direction]
+
+        btn = self.buttons.get(direction)
+        if btn:
+            btn.state(['!pressed'])
+
+    def submit_if_idle(self, direction, action):
+        """
+        将运动动作提交到对应轴的 I/O 线程。
+        同一串口的事务按顺序执行，动作执行时按下时的状态查询已经完成，
+        如果查询结果为“正在运行”，则跳过该动作。
+
+        :param direction: 方向字符串
+        :param action: 要执行的动作函数，参数为 direction
+        """
+        _, serial_key, _ = self.get_axis_info(direction)
+        worker = self.get_serial_worker(serial_key)
+        if not worker:
+            self.log(f"Error: {serial_key} serial port not open", "ERR")
+            return
+
+        check = self.press_check.get(direction)
+
+        def job():
+            if check is not None and not check.cancelled() and check.exception() is None and check.result():
+                return
+            action(direction)
+
+        worker.submit(job)
+
     def on_long_press_detected(self, direction):
         """
         长按检测定时器回调。
@@ -252,7 +309,7 @@ class MotionControlFrame(ttk.Frame):
             self.is_long_press[direction] = True
             axis_name, _, _ = self.get_axis_info(direction)
             self.log(f"Long press detected: {direction} ({axis_name}), starting continuous motion", "MOT")
-            self.start_continuous_motion(direction)
+            self.submit_if_idle(direction, self.start_continuous_motion)
 
     def on_release(self, direction):
         """
@@ -283,68 +340,77 @@ class MotionControlFrame(ttk.Frame):
 
         if self.is_long_press.get(direction, False):
             self.log(f"Button released: {direction} ({axis_name}), stopping continuous motion", "MOT")
-            self.stop_motion(direction)
+            self.submit_if_idle(direction, self.stop_motion)
         else:
             self.log(f"Button released: {direction} ({axis_name}), executing single step", "MOT")
-            self.execute_single_step(direction)
+            self.submit_if_idle(direction, self.execute_single_step)
 
         self.is_long_press[direction] = False
+        self.press_check.pop(direction, None)
 
     def on_set_origin(self):
         """
         设置原点按钮回调函数。
-        向 X 轴和 Y 轴电机发送设置原点命令（寄存器 0x15）。
-        """
-        axes = [
-            ("X-Axis", "X-Axis Motor"),
-            ("Y-Axis", "Y-Axis Motor")
-        ]
-
-        for axis_name, serial_key in axes:
-            serial_conn = self.get_serial_connection(serial_key)
-            if serial_conn:
-                # 发送设置原点命令 (寄存器 0x15, 值 0x01)
-                if self.send_command_and_wait_response(serial_conn, serial_key, 0x15, 0x01):
-                    self.log(f"Origin set successfully for {axis_name}", "MOT")
-                else:
-                    self.log(f"Failed to set origin for {axis_name}", "ERR")
-            else:
-                self.log(f"Error: {serial_key} serial port not open", "ERR")
+        向 X 轴和 Y 轴电机同时发送设置原点命令（寄存器 0x15）。
+        """
+        futures = []
+        for axis_name, serial_key in self.AXES:
+            # 发送设置原点命令 (寄存器 0x15, 值 0x01)
+            futures.append(self.submit_axis_command(
+                axis_name, serial_key, 0x15, 0x01,
+                f"Origin set successfully for {axis_name}",
+                f"Failed to set origin for {axis_name}"
+            ))
+        self.report_all_axes(futures, "Set origin")
 
     def on_return_to_origin(self):
         """
         回到原点按钮回调函数。
-        向 X 轴和 Y 轴电机发送回到原点命令（寄存器 0x0A）。
-        """
-        axes = [
-            ("X-Axis", "X-Axis Motor"),
-            ("Y-Axis", "Y-Axis Motor")
-        ]
-
-        for axis_name, serial_key in axes:
-            serial_conn = self.get_serial_connection(serial_key)
-            if serial_conn:
-                # 发送回到原点命令 (寄存器 0x0A, 值 0x01)
-                if self.send_command_and_wait_response(serial_conn, serial_key, 0x0A, 0x01):
-                    self.log(f"Return to origin command sent successfully for {axis_name}", "MOT")
-                else:
-                    self.log(f"Failed to send return to origin command for {axis_name}", "ERR")
-            else:
-                self.log(f"Error: {serial_key} serial port not open", "ERR")
+        向 X 轴和 Y 轴电机同时发送回到原点命令（寄存器 0x0A），各轴回零运动结束后才记录完成。
+        """
+        futures = []
+        for axis_name, serial_key in self.AXES:
+            # 发送回到原点命令 (寄存器 0x0A, 值 0x01)，并等待该轴停止
+            futures.append(self.submit_axis_command(
+                axis_name, serial_key, 0x0A, 0x01,
+                f"Return to origin completed for {axis_name}",
+                f"Return to origin failed for {axis_name}",
+                wait_stopped=True
+            ))
+        self.report_all_axes(futures, "Return to origin")
 
     def on_get_homing_speed(self):
         """
         获取回原点速度按钮回调函数。
-        读取寄存器 0x1A，返回 2 字节速度数据。
+        在 I/O 线程中读取寄存器 0x1A，结果通过回调更新输入框。
         """
         # 优先读取 X 轴的回原点速度
         serial_key = "X-Axis Motor"
         axis_name = "X-Axis"
-        
+
+        worker = self.get_serial_worker(serial_key)
+        if not worker:
+            self.log(f"Error: {serial_key} serial port not open", "ERR")
+            return
+
+        def on_result(homing_speed):
+            if homing_speed is not None:
+                self.homing_speed_var.set(str(homing_speed))
+
+        worker.submit(self.get_homing_speed_value, axis_name, serial_key, callback=on_result)
+
+    def get_homing_speed_value(self, axis_name, serial_key):
+        """
+        读取指定轴的回原点速度（在 I/O 线程中执行）。
+
+        :param axis_name: 轴名称
+        :param serial_key: 串口键名
+        :return: 回原点速度 (RPM)，失败返回 None
+        """
         serial_conn = self.get_serial_connection(serial_key)
         if not serial_conn:
             self.log(f"Error: {serial_key} serial port not open", "ERR")
-            return
+            return None
 
         try:
             port_info = self.get_serial_port_info(serial_conn, serial_key)
@@ -353,37 +419,34 @@ class MotionControlFrame(ttk.Frame):
             serial_conn.reset_input_buffer()
 
             # 构建读取命令 (功能码 0x03, 寄存器 0x1A, 读取 1 个寄存器 = 2 字节)
-            data = struct.pack('>BBHH', self.device_addr, 0x03, 0x1A, 0x01)
-            crc = self.calculate_crc(data)
-            crc_low = crc & 0xFF
-            crc_high = (crc >> 8) & 0xFF
-            command = data + bytes([crc_low, crc_high])
+            command = modbus_rtu.build_read_frame(self.device_addr, 0x1A, 0x01)
 
             # 发送命令
+            tx_ns = time.monotonic_ns()
             serial_conn.write(command)
-            hex_str = ' '.join([f'{b:02X}' for b in command])
-            self.log(f"{port_info} TX: [{hex_str}] Query Homing Speed", "MOT")
+            trace(self.log, "MOT", "{} TX: [{}] Query Homing Speed", port_info, command)
 
             # 等待接收回复（读命令回复通常是7字节：地址+功能码+字节数+2字节数据+2字节CRC）
             response = self.wait_for_response(serial_conn, expected_length=7, timeout=0.5)
+            BUS.publish_transaction(serial_key, command, response, "Query Homing Speed", tx_ns)
 
             if response and len(response) >= 7:
-                resp_hex = ' '.join([f'{b:02X}' for b in response])
                 # 解析回复：第2字节是数据字节数(0x02)，第3-4字节是速度数据(2字节，大端模式)
                 homing_speed = (response[3] << 8) | response[4]
-                self.log(f"{port_info} RX: [{resp_hex}] Homing Speed = {homing_speed} RPM", "MOT")
-                # 更新输入框显示
-                self.homing_speed_var.set(str(homing_speed))
+                trace(self.log, "MOT", "{} RX: [{}] Homing Speed = {} RPM", port_info, response, homing_speed)
+                return homing_speed
             else:
                 self.log(f"{port_info} RX: [Timeout - No response received]", "ERR")
+                return None
 
         except Exception as e:
             self.log(f"Error querying homing speed for {axis_name}: {e}", "ERR")
+            return None
 
     def on_set_homing_speed(self):
         """
         设置回原点速度按钮回调函数。
-        向 X 轴和 Y 轴电机发送设置回原点速度命令（寄存器 0x1A）。
+        向 X 轴和 Y 轴电机同时发送设置回原点速度命令（寄存器 0x1A）。
         """
         try:
             # 获取输入的速度值
@@ -394,85 +457,121 @@ class MotionControlFrame(ttk.Frame):
             if speed < 1 or speed > 800:
                 self.log(f"Error: Homing speed must be between 1 and 800 RPM", "ERR")
                 return
-            
-            axes = [
-                ("X-Axis", "X-Axis Motor"),
-                ("Y-Axis", "Y-Axis Motor")
-            ]
-
-            for axis_name, serial_key in axes:
-                serial_conn = self.get_serial_connection(serial_key)
-                if serial_conn:
-                    # 发送设置回原点速度命令 (寄存器 0x1A, 值为速度)
-                    if self.send_command_and_wait_response(serial_conn, serial_key, 0x1A, speed):
-                        self.log(f"Homing speed set to {speed} RPM for {axis_name}", "MOT")
-                    else:
-                        self.log(f"Failed to set homing speed for {axis_name}", "ERR")
-                else:
-                    self.log(f"Error: {serial_key} serial port not open", "ERR")
+
+            futures = []
+            for axis_name, serial_key in self.AXES:
+                # 发送设置回原点速度命令 (寄存器 0x1A, 值为速度)
+                futures.append(self.submit_axis_command(
+                    axis_name, serial_key, 0x1A, speed,
+                    f"Homing speed set to {speed} RPM for {axis_name}",
+                    f"Failed to set homing speed for {axis_name}"
+                ))
+            self.report_all_axes(futures, "Set homing speed")
 
         except ValueError:
             self.log(f"Error: Invalid homing speed value '{self.homing_speed_var.get()}'", "ERR")
         except Exception as e:
             self.log(f"Error setting homing speed: {e}", "ERR")
 
-    def on_get_pulse(self, axis_name, serial_key):
+    def submit_axis_command(self, axis_name, serial_key, register, value, success_msg, fail_msg, wait_stopped=False):
         """
-        获取指定轴的运行脉冲数按钮回调函数。
-        读取寄存器 0x18，返回 4 字节脉冲数据。
+        将单条写寄存器命令提交到指定轴的 I/O 线程，收到回复后记录结果。
 
-        :param axis_name: 轴名称 ("X-Axis" 或 "Y-Axis")
-        :param serial_key: 串口键名 ("X-Axis Motor" 或 "Y-Axis Motor")
+        :param axis_name: 轴名称
+        :param serial_key: 串口键名
+        :param register: 寄存器地址
+        :param value: 写入值
+        :param success_msg: 成功时的日志
+        :param fail_msg: 失败时的日志
+        :param wait_stopped: 为 True 时命令被确认后继续轮询运行状态，直到该轴停止才算完成
+        :return: Future 对象，串口未打开时返回 None
         """
         serial_conn = self.get_serial_connection(serial_key)
-        if not serial_conn:
+        worker = self.get_serial_worker(serial_key)
+        if not serial_conn or not worker:
             self.log(f"Error: {serial_key} serial port not open", "ERR")
-            return
+            return None
 
-        try:
-            port_info = self.get_serial_port_info(serial_conn, serial_key)
+        def job():
+            if (self.send_command_and_wait_response(serial_conn, serial_key, register, value)
+                    and (not wait_stopped or self.wait_axis_stopped(axis_name, serial_conn))):
+                self.log(success_msg, "MOT")
+                return True
+            self.log(fail_msg, "ERR")
+            return False
 
-            # 清空接收缓冲区
-            serial_conn.reset_input_buffer()
+        return worker.submit(job)
 
-            # 构建读取命令 (功能码 0x03, 寄存器 0x18, 读取 2 个寄存器 = 4 字节)
-            data = struct.pack('>BBHH', self.device_addr, 0x03, 0x18, 0x02)
-            crc = self.calculate_crc(data)
-            crc_low = crc & 0xFF
-            crc_high = (crc >> 8) & 0xFF
-            command = data + bytes([crc_low, crc_high])
+    # 等待回零等长时间运动结束的最长时间（秒）
+    MOTION_WAIT_TIMEOUT = 60.0
 
-            # 发送命令
-            serial_conn.write(command)
-            hex_str = ' '.join([f'{b:02X}' for b in command])
-            self.log(f"{port_info} TX: [{hex_str}] Query Pulse Count", "MOT")
+    def wait_axis_stopped(self, axis_name, serial_conn):
+        """
+        轮询运行状态 (0x02) 直到该轴停止（在该轴的 I/O 线程中执行）。
 
-            # 等待接收回复（读命令回复通常是9字节：地址+功能码+字节数+4字节数据+2字节CRC）
-            response = self.wait_for_response(serial_conn, expected_length=9, timeout=0.5)
+        :param axis_name: 轴名称
+        :param serial_conn: 串口连接对象
+        :return: 已停止返回 True，超时或无法读取状态返回 False
+        """
+        # 已在 I/O 线程中，直接在当前线程收发
+        axis = MotorAxis(axis_name, serial_conn, addr=self.device_addr)
+        engine = MoveEngine(timeout=self.MOTION_WAIT_TIMEOUT, stall_timeout=0, log_callback=self.log)
+        try:
+            return engine.wait_until_stopped([axis])
+        except MoveError as e:
+            self.log(f"{axis_name}: {e}", "ERR")
+            return False
 
-            if response and len(response) >= 9:
-                resp_hex = ' '.join([f'{b:02X}' for b in response])
-                # 解析回复：第2字节是数据字节数(0x04)，第3-6字节是脉冲数据(4字节，大端模式，有符号)
-                pulse_count_unsigned = (response[3] << 24) | (response[4] << 16) | (response[5] << 8) | response[6]
-                # 将有符号数转换为Python整数（32位有符号）
-                pulse_count = pulse_count_unsigned if pulse_count_unsigned < 0x80000000 else pulse_count_unsigned - 0x100000000
-                self.log(f"{port_info} RX: [{resp_hex}] Pulse Count = {pulse_count}", "MOT")
-                
-                # 更新界面显示
-                if axis_name == "X-Axis":
-                    self.x_pulse_var.set(str(pulse_count))
-                elif axis_name == "Y-Axis":
-                    self.y_pulse_var.set(str(pulse_count))
+    def report_all_axes(self, futures, action):
+        """
+        各轴命令全部完成后汇总记录一次结果（组合完成屏障）。
+        各轴的命令已分别提交到各自的 I/O 线程并行执行。
+
+        :param futures: submit_axis_command 返回的 Future 列表（串口未打开的项为 None）
+        :param action: 动作名称，用于日志
+        """
+        started = [f for f in futures if f is not None]
+        if not started:
+            return
+
+        def on_done(results):
+            succeeded = sum(1 for result in results if result)
+            if succeeded == len(self.AXES):
+                self.log(f"{action} completed on all axes", "MOT")
             else:
-                self.log(f"{port_info} RX: [Timeout - No response received]", "ERR")
+                self.log(f"{action} completed on {succeeded}/{len(self.AXES)} axes", "ERR")
 
-        except Exception as e:
-            self.log(f"Error querying pulse count for {axis_name}: {e}", "ERR")
+        when_all(started, on_done, dispatcher=lambda fn: self.after(0, fn))
+
+    def on_get_pulse(self, axis_name, serial_key):
+        """
+        获取指定轴的运行脉冲数按钮回调函数。
+        在 I/O 线程中读取寄存器 0x18，结果通过回调更新界面显示。
+
+        :param axis_name: 轴名称 ("X-Axis" 或 "Y-Axis")
+        :param serial_key: 串口键名 ("X-Axis Motor" 或 "Y-Axis Motor")
+        """
+        worker = self.get_serial_worker(serial_key)
+        if not worker:
+            self.log(f"Error: {serial_key} serial port not open", "ERR")
+            return
+
+        def on_result(pulse_count):
+            if pulse_count is None:
+                return
+            # 更新界面显示
+            if axis_name == "X-Axis":
+                self.x_pulse_var.set(str(pulse_count))
+            elif axis_name == "Y-Axis":
+                self.y_pulse_var.set(str(pulse_count))
+
+        worker.submit(self.get_pulse_value, axis_name, serial_key, callback=on_result)
 
     def execute_single_step(self, direction):
         """
         执行单步运动（点按）：设置方向，行程为1圈，然后运行。
         每条命令发送后等待回复才能发送下一条。
+        在对应轴的 I/O 线程中执行。
         """
         axis_name, serial_key, direction_value = self.get_axis_info(direction)
         if axis_name is None:
@@ -504,6 +603,7 @@ class MotionControlFrame(ttk.Frame):
         """
         开始持续转动（长按）：设置方向，行程为0（无限），然后运行。
         每条命令发送后等待回复才能发送下一条。
+        在对应轴的 I/O 线程中执行。
         """
         axis_name, serial_key, direction_value = self.get_axis_info(direction)
         if axis_name is None:
@@ -534,7 +634,7 @@ class MotionControlFrame(ttk.Frame):
     def stop_motion(self, direction):
         """
         停止电机运动（发送停止命令）。
-        发送后等待回复。
+        发送后等待回复。在对应轴的 I/O 线程中执行。
         """
         axis_name, serial_key, _ = self.get_axis_info(direction)
         if axis_name is None:
@@ -562,6 +662,28 @@ class MotionControlFrame(ttk.Frame):
             return self.settings_source.get_serial_connection(serial_key)
         return None
 
+    def get_register_shadow(self, serial_key):
+        """
+        获取指定轴串口的参数寄存器影子缓存。
+
+        :param serial_key: 串口键名 ("X-Axis Motor" 或 "Y-Axis Motor")
+        :return: RegisterShadow 对象，串口未打开时返回 None
+        """
+        if self.settings_source and hasattr(self.settings_source, 'get_register_shadow'):
+            return self.settings_source.get_register_shadow(serial_key)
+        return None
+
+    def get_serial_worker(self, serial_key):
+        """
+        获取指定轴串口的后台 I/O 线程。
+
+        :param serial_key: 串口键名 ("X-Axis Motor" 或 "Y-Axis Motor")
+        :return: SerialWorker 对象，串口未打开时返回 None
+        """
+        if self.settings_source and hasattr(self.settings_source, 'get_serial_worker'):
+            return self.settings_source.get_serial_worker(serial_key)
+        return None
+
     def is_motor_running(self, serial_conn, serial_key):
         """
         查询电机是否正在运行。
@@ -578,23 +700,19 @@ class MotionControlFrame(ttk.Frame):
             serial_conn.reset_input_buffer()
 
             # 构建读取命令 (功能码 0x03)
-            data = struct.pack('>BBHH', self.device_addr, 0x03, 0x02, 0x01)
-            crc = self.calculate_crc(data)
-            crc_low = crc & 0xFF
-            crc_high = (crc >> 8) & 0xFF
-            command = data + bytes([crc_low, crc_high])
+            command = modbus_rtu.build_read_frame(self.device_addr, 0x02, 0x01)
 
             # 发送命令
+            tx_ns = time.monotonic_ns()
             serial_conn.write(command)
-            hex_str = ' '.join([f'{b:02X}' for b in command])
-            self.log(f"{port_info} TX: [{hex_str}] Query Run Status", "MOT")
+            trace(self.log, "MOT", "{} TX: [{}] Query Run Status", port_info, command)
 
             # 等待接收回复（读命令回复通常是7字节）
             response = self.wait_for_response(serial_conn, expected_length=7, timeout=0.5)
+            BUS.publish_transaction(serial_key, command, response, "Query Run Status", tx_ns)
 
             if response and len(response) >= 7:
-                resp_hex = ' '.join([f'{b:02X}' for b in response])
-                self.log(f"{port_info} RX: [{resp_hex}]", "MOT")
+                trace(self.log, "MOT", "{} RX: [{}]", port_info, response)
                 # 解析回复：第4个字节是数据高位，第5个字节是数据低位
                 # 如果值为1，表示正在运行
                 run_status = response[4] if len(response) > 4 else 0
@@ -607,20 +725,6 @@ class MotionControlFrame(ttk.Frame):
             self.log(f"Error querying motor status: {e}", "ERR")
             return False
 
-    def calculate_crc(self, data):
-        """
-        计算 Modbus CRC16 校验码。
-        """
-        crc = 0xFFFF
-        for byte in data:
-            crc ^= byte
-            for _ in range(8):
-                if crc & 0x0001:
-                    crc = (crc >> 1) ^ 0xA001
-                else:
-                    crc >>= 1
-        return crc
-
     def get_register_description(self, register, value):
         """
         获取寄存器命令的描述信息。
@@ -679,39 +783,39 @@ class MotionControlFrame(ttk.Frame):
         """
         发送 Modbus-RTU 命令到电机控制器，并等待接收回复。
         只有在收到回复后才能发送下一个命令。
+        如果该寄存器已确认的值与待写入值相同（影子缓存命中），则跳过本次写入。
 
         :param serial_conn: 串口连接对象
         :param serial_key: 串口键名
         :param register: 寄存器地址
         :param value: 写入值
-        :return: 是否成功发送并收到回复
+        :return: 是否成功发送并收到回复（跳过写入视为成功）
         """
         try:
             # 获取串口信息
             port_info = self.get_serial_port_info(serial_conn, serial_key)
+            desc = self.get_register_description(register, value)
 
-            # 清空接收缓冲区
-            serial_conn.reset_input_buffer()
-
-            # 构建命令
-            data = struct.pack('>BBHH', self.device_addr, 0x06, register, value)
-            crc = self.calculate_crc(data)
-            crc_low = crc & 0xFF
-            crc_high = (crc >> 8) & 0xFF
-            command = data + bytes([crc_low, crc_high])
+            # 发送命令并等待回复（写命令回复通常是8字节）
+            shadow = self.get_register_shadow(serial_key)
+            tx_ns = time.monotonic_ns()
+            response, skipped = modbus_rtu.write_register(
+                serial_conn, self.device_addr, register, value, shadow=shadow, timeout=0.5
+            )
 
-            # 发送命令
-            serial_conn.write(command)
-            hex_str = ' '.join([f'{b:02X}' for b in command])
-            desc = self.get_register_description(register, value)
-            self.log(f"{port_info} TX: [{hex_str}] {desc}", "MOT")
+            if skipped:
+                trace(self.log, "MOT", "{} Skip: {} (unchanged)", port_info, desc)
+                return True
 
-            # 等待接收回复（写命令回复通常是8字节）
-            response = self.wait_for_response(serial_conn, expected_length=8, timeout=0.5)
+            command = modbus_rtu.build_write_frame(self.device_addr, register, value)
+            trace(self.log, "MOT", "{} TX: [{}] {}", port_info, command, desc)
+            BUS.publish_transaction(serial_key, command, response, desc, tx_ns)
 
             if response:
-                resp_hex = ' '.join([f'{b:02X}' for b in response])
-                self.log(f"{port_info} RX: [{resp_hex}]", "MOT")
+                if modbus_rtu.is_exception_response(response):
+                    self.log(f"{port_info} RX: [{hex_bytes(response)}] Error response", "ERR")
+                    return False
+                trace(self.log, "MOT", "{} RX: [{}]", port_info, response)
                 return True
             else:
                 self.log(f"{port_info} RX: [Timeout - No response received]", "ERR")
@@ -724,26 +828,14 @@ class MotionControlFrame(ttk.Frame):
     def wait_for_response(self, serial_conn, expected_length=8, timeout=0.5):
         """
         等待并读取串口回复数据。
+        收到期望长度或异常应答后立即返回，否则按 Modbus 3.5 字符静默判定帧尾。
 
         :param serial_conn: 串口连接对象
         :param expected_length: 期望接收的数据长度
         :param timeout: 超时时间（秒）
         :return: 接收到的字节数据，超时返回 None
         """
-        original_timeout = serial_conn.timeout
-        serial_conn.timeout = timeout
-
-        try:
-            response = bytearray()
-            while len(response) < expected_length:
-                chunk = serial_conn.read(expected_length - len(response))
-                if not chunk:
-                    break
-                response.extend(chunk)
-
-            return bytes(response) if len(response) > 0 else None
-        finally:
-            serial_conn.timeout = original_timeout
+        return modbus_rtu.read_frame(serial_conn, expected_length, timeout)
 
     # =========================================================================
     # 测试键绑定功能分区 (Test Key Binding)
@@ -756,14 +848,30 @@ class MotionControlFrame(ttk.Frame):
             self.create_binding_item(
                 binding['key_name'],
                 binding['x_pulse'],
-                binding['y_pulse']
+                binding['y_pulse'],
+                relay_channel=binding.get('relay_channel', lc_relay.DEFAULT_CHANNEL)
             )
 
     def on_add_binding(self):
-        """新增绑定按键按钮回调"""
-        # 获取X轴和Y轴的脉冲数
-        x_pulse = self.get_pulse_value("X-Axis", "X-Axis Motor")
-        y_pulse = self.get_pulse_value("Y-Axis", "Y-Axis Motor")
+        """新增绑定按键按钮回调：在两个轴的 I/O 线程中同时读取脉冲数"""
+        futures = []
+        for axis_name, serial_key in self.AXES:
+            worker = self.get_serial_worker(serial_key)
+            if not worker:
+                self.on_binding_pulses_ready([None, None])
+                return
+            futures.append(worker.submit(self.get_pulse_value, axis_name, serial_key))
+
+        # 两个轴都返回后再继续绑定流程
+        when_all(futures, self.on_binding_pulses_ready, dispatcher=lambda fn: self.after(0, fn))
+
+    def on_binding_pulses_ready(self, pulses):
+        """
+        新增绑定时脉冲数读取完成的回调（在界面线程中执行）。
+
+        :param pulses: [X轴脉冲数, Y轴脉冲数]，失败的项为 None
+        """
+        x_pulse, y_pulse = pulses
         
         # 检查是否获取成功（暂时注释掉）
         if x_pulse is None or y_pulse is None:
@@ -784,7 +892,7 @@ class MotionControlFrame(ttk.Frame):
         self.open_key_selection_window(temp_item)
 
     def get_pulse_value(self, axis_name, serial_key):
-        """获取指定轴的脉冲数
+        """获取指定轴的脉冲数（在 I/O 线程中执行）
         
         :param axis_name: 轴名称
         :param serial_key: 串口键名
@@ -799,23 +907,19 @@ class MotionControlFrame(ttk.Frame):
             port_info = self.get_serial_port_info(serial_conn, serial_key)
             serial_conn.reset_input_buffer()
             
-            data = struct.pack('>BBHH', self.device_addr, 0x03, 0x18, 0x02)
-            crc = self.calculate_crc(data)
-            crc_low = crc & 0xFF
-            crc_high = (crc >> 8) & 0xFF
-            command = data + bytes([crc_low, crc_high])
+            command = modbus_rtu.build_read_frame(self.device_addr, 0x18, 0x02)
             
+            tx_ns = time.monotonic_ns()
             serial_conn.write(command)
-            hex_str = ' '.join([f'{b:02X}' for b in command])
-            self.log(f"{port_info} TX: [{hex_str}] Query Pulse Count", "MOT")
+            trace(self.log, "MOT", "{} TX: [{}] Query Pulse Count", port_info, command)
             
             response = self.wait_for_response(serial_conn, expected_length=9, timeout=0.5)
+            BUS.publish_transaction(serial_key, command, response, "Query Pulse Count", tx_ns)
             
             if response and len(response) >= 9:
-                resp_hex = ' '.join([f'{b:02X}' for b in response])
                 pulse_count_unsigned = (response[3] << 24) | (response[4] << 16) | (response[5] << 8) | response[6]
                 pulse_count = pulse_count_unsigned if pulse_count_unsigned < 0x80000000 else pulse_count_unsigned - 0x100000000
-                self.log(f"{port_info} RX: [{resp_hex}] Pulse Count = {pulse_count}", "MOT")
+                trace(self.log, "MOT", "{} RX: [{}] Pulse Count = {}", port_info, response, pulse_count)
                 return pulse_count
             else:
                 self.log(f"{port_info} RX: [Timeout - No response received]", "ERR")
@@ -824,13 +928,14 @@ class MotionControlFrame(ttk.Frame):
             self.log(f"Error querying pulse count for {axis_name}: {e}", "ERR")
             return None
 
-    def create_binding_item(self, key_name, x_pulse, y_pulse, is_temp=False):
+    def create_binding_item(self, key_name, x_pulse, y_pulse, is_temp=False, relay_channel=lc_relay.DEFAULT_CHANNEL):
         """创建一个绑定项UI
         
         :param key_name: 按键名称
         :param x_pulse: X轴脉冲数
         :param y_pulse: Y轴脉冲数
         :param is_temp: 是否为临时项（未完成绑定）
+        :param relay_channel: 按压该按键的继电器通道
         :return: 绑定项字典
         """
         item_frame = ttk.Frame(self.binding_inner_frame)
@@ -850,6 +955,10 @@ class MotionControlFrame(ttk.Frame):
         lbl_y = ttk.Label(item_frame, text=f"Y: {y_pulse_text}", width=15, foreground="blue" if y_pulse is not None else "red")
         lbl_y.pack(side=tk.LEFT, padx=5)
         
+        # 继电器通道
+        lbl_ch = ttk.Label(item_frame, text=f"CH: {relay_channel}", width=8)
+        lbl_ch.pack(side=tk.LEFT, padx=5)
+        
         # 选择按键和取消按钮（仅临时项显示）
         btn_select = None
         btn_cancel = None
@@ -869,7 +978,7 @@ class MotionControlFrame(ttk.Frame):
             btn_cancel.pack(side=tk.LEFT, padx=5)
         
         # 绑定右键菜单到所有子组件
-        for widget in [item_frame, lbl_key, lbl_x, lbl_y]:
+        for widget in [item_frame, lbl_key, lbl_x, lbl_y, lbl_ch]:
             widget.bind("<Button-3>", lambda e, f=item_frame, k=key_name: self.show_binding_context_menu(e, f, k))
             widget.bind("<Button-2>", lambda e, f=item_frame, k=key_name: self.show_binding_context_menu(e, f, k))  # Windows兼容
         
@@ -882,6 +991,8 @@ class MotionControlFrame(ttk.Frame):
             'lbl_key': lbl_key,
             'lbl_x': lbl_x,
             'lbl_y': lbl_y,
+            'lbl_ch': lbl_ch,
+            'relay_channel': relay_channel,
             'btn_select': btn_select,
             'btn_cancel': btn_cancel
         }
@@ -955,10 +1066,35 @@ class MotionControlFrame(ttk.Frame):
                 return
         
         context_menu = tk.Menu(self, tearoff=0)
+        context_menu.add_command(label="Set Relay Channel...", command=lambda: self.set_binding_channel(item_frame, key_name))
         context_menu.add_command(label="Delete", command=lambda: self.delete_binding(item_frame, key_name))
         
         context_menu.post(event.x_root, event.y_root)
 
+    def set_binding_channel(self, item_frame, key_name):
+        """设置绑定项的继电器通道（组合键测试时各按键由各自通道的电磁铁按压）
+        
+        :param item_frame: 绑定项的frame
+        :param key_name: 按键名称
+        """
+        from tkinter import simpledialog
+        item_data = next((item for item in self.binding_items if item['frame'] == item_frame), None)
+        if item_data is None:
+            return
+
+        channel = simpledialog.askinteger(
+            "Relay Channel", f"Relay channel for {key_name}:",
+            initialvalue=item_data.get('relay_channel', lc_relay.DEFAULT_CHANNEL),
+            minvalue=lc_relay.MIN_CHANNEL, maxvalue=lc_relay.MAX_CHANNEL, parent=self
+        )
+        if channel is None:
+            return
+
+        self.key_manager.set_relay_channel(key_name, channel)
+        item_data['relay_channel'] = channel
+        item_data['lbl_ch'].config(text=f"CH: {channel}")
+        self.log(f"Key binding {key_name} relay channel set to {channel}", "MOT")
+
     def delete_binding(self, item_frame, key_name):
         """删除绑定项
         
@@ -2,7 +2,10 @@ import tkinter as tk
 from tkinter import ttk, scrolledtext
 import serial
 import serial.tools.list_ports
-import struct
+import time
+import modbus_rtu
+from serial_worker import SerialWorker
+from event_bus import BUS
 
 
 class MotorDebugFrame(ttk.Frame):
@@ -15,6 +18,7 @@ class MotorDebugFrame(ttk.Frame):
         super().__init__(master)
         self.log = log_callback if log_callback else print
         self.serial_conn = None
+        self.worker = None  # 调试串口的后台 I/O 线程
         self.is_open = False
 
         self.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -246,23 +250,24 @@ class MotorDebugFrame(ttk.Frame):
             return
 
         try:
-            parity_map = {
-                'None': serial.PARITY_NONE,
-                'Even': serial.PARITY_EVEN,
-                'Odd': serial.PARITY_ODD,
-                'Mark': serial.PARITY_MARK,
-                'Space': serial.PARITY_SPACE
-            }
-
+            # 控制器固定为 8-N-1
             self.serial_conn = serial.Serial(
                 port=port,
                 baudrate=self.baud_var.get(),
-                bytesize=self.data_bits_var.get(),
-                stopbits=self.stop_bits_var.get(),
-                parity=parity_map.get(self.parity_var.get(), serial.PARITY_NONE),
+                bytesize=8,
+                stopbits=1,
+                parity=serial.PARITY_NONE,
                 timeout=0.5
             )
 
+            # 收发在后台 I/O 线程中执行，应答通过 after 投递回界面线程
+            self.worker = SerialWorker(
+                self.serial_conn,
+                name="Motor Debug",
+                dispatcher=lambda fn: self.after(0, fn),
+                log_callback=self.log
+            )
+
             self.is_open = True
             self.btn_open.config(text="Close Port")
             self.add_log(f"Port {port} opened successfully", "info")
@@ -274,6 +279,10 @@ class MotorDebugFrame(ttk.Frame):
 
     def close_port(self):
         """关闭串口连接"""
+        if self.worker:
+            self.worker.stop()
+            self.worker = None
+
         if self.serial_conn and self.serial_conn.is_open:
             try:
                 self.serial_conn.close()
@@ -286,18 +295,6 @@ class MotorDebugFrame(ttk.Frame):
         self.add_log("Port closed", "info")
         self.log("Motor Debug: Port closed", "SER")
 
-    def calculate_crc(self, data):
-        """计算 Modbus CRC16 校验码"""
-        crc = 0xFFFF
-        for byte in data:
-            crc ^= byte
-            for _ in range(8):
-                if crc & 0x0001:
-                    crc = (crc >> 1) ^ 0xA001
-                else:
-                    crc >>= 1
-        return crc
-
     def send_quick_command(self, register, value):
         """发送快速设置指令 (功能码 06)"""
         if not self.is_open or not self.serial_conn:
@@ -305,11 +302,7 @@ class MotorDebugFrame(ttk.Frame):
             return
 
         try:
-            data = struct.pack('>BBHH', self.device_addr, 0x06, register, value)
-            crc = self.calculate_crc(data)
-            crc_low = crc & 0xFF
-            crc_high = (crc >> 8) & 0xFF
-            command = data + bytes([crc_low, crc_high])
+            command = modbus_rtu.build_write_frame(self.device_addr, register, value)
 
             self.send_and_receive(command)
 
@@ -327,11 +320,7 @@ class MotorDebugFrame(ttk.Frame):
             return
 
         try:
-            data = struct.pack('>BBHH', self.device_addr, 0x03, register, 1)
-            crc = self.calculate_crc(data)
-            crc_low = crc & 0xFF
-            crc_high = (crc >> 8) & 0xFF
-            command = data + bytes([crc_low, crc_high])
+            command = modbus_rtu.build_read_frame(self.device_addr, register, 1)
 
             # 保存当前查询的寄存器地址，用于响应处理
             self.pending_query_register = register
@@ -343,7 +332,9 @@ class MotorDebugFrame(ttk.Frame):
     def get_all_parameters(self):
         """
         获取所有电机参数并更新到输入框
-        依次查询：方向、速度、脉冲、圈数、角度、加减速系数、脱机使能
+        查询：方向、运行状态、速度、脉冲、圈数、角度、脱机使能、加减速系数。
+        寄存器合并为最少的连续 FC03 块读取（0x01-0x0E 一帧完成），
+        控制器拒绝某个范围时自动退回逐个读取。
         """
         if not self.is_open or not self.serial_conn:
             self.add_log("Error: Port not open", "error")
@@ -363,95 +354,49 @@ class MotorDebugFrame(ttk.Frame):
             (0x02, "Run Status")
         ]
 
-        # 使用索引来跟踪当前查询的寄存器
-        self._get_all_registers = registers
-        self._get_all_index = 0
-
-        # 开始依次查询
-        self._query_next_register()
-
-    def _query_next_register(self):
-        """查询下一个寄存器"""
-        if not hasattr(self, '_get_all_registers') or not hasattr(self, '_get_all_index'):
-            return
-
-        if self._get_all_index >= len(self._get_all_registers):
-            # 所有寄存器查询完成
-            self.add_log("All parameters retrieved successfully!", "info")
-            delattr(self, '_get_all_registers')
-            delattr(self, '_get_all_index')
-            return
-
-        register, name = self._get_all_registers[self._get_all_index]
+        # 在 I/O 线程中记录每次收发（同时发布到事件总线），回到界面线程后统一显示
+        transactions = []
+        port = self.serial_conn.port
 
-        # 发送查询命令
-        try:
-            data = struct.pack('>BBHH', self.device_addr, 0x03, register, 1)
-            crc = self.calculate_crc(data)
-            crc_low = crc & 0xFF
-            crc_high = (crc >> 8) & 0xFF
-            command = data + bytes([crc_low, crc_high])
-
-            # 标记这是批量查询的一部分
-            self._is_batch_query = True
-            self.pending_query_register = register
-
-            # 清空接收缓冲区
-            self.serial_conn.reset_input_buffer()
+        def on_transaction(request, response):
+            transactions.append((request, response))
+            BUS.publish_transaction(port, request, response, "Get All Parameters")
 
-            # 发送指令
-            self.serial_conn.write(command)
-
-            # 显示发送的数据
-            hex_str = ' '.join(f'{b:02X}' for b in command)
-            self.add_log(f"[TX] {hex_str} (Get {name})", "sent")
+        def job():
+            values = modbus_rtu.read_registers(
+                self.serial_conn, self.device_addr, [r for r, _ in registers],
+                on_transaction=on_transaction
+            )
+            return transactions, values
 
-            # 等待响应
-            self.after(150, lambda: self._read_batch_response())
+        self.worker.submit(job, callback=lambda result: self._on_all_parameters(registers, *result))
 
-        except Exception as e:
-            self.add_log(f"Error querying {name}: {e}", "error")
-            self._get_all_index += 1
-            self.after(100, self._query_next_register)
-
-    def _read_batch_response(self):
-        """读取批量查询的响应"""
-        if not self.serial_conn or not self.serial_conn.is_open:
-            self._get_all_index += 1
-            self.after(100, self._query_next_register)
-            return
+    def _on_all_parameters(self, registers, transactions, values):
+        """
+        批量参数读取完成的回调：显示收发记录并更新各输入框。
 
-        try:
-            if self.serial_conn.in_waiting > 0:
-                response = self.serial_conn.read(self.serial_conn.in_waiting)
-
-                # 显示接收的数据
-                hex_str = ' '.join(f'{b:02X}' for b in response)
-                display_str = f"[RX] {hex_str}"
-
-                # 解析响应并更新输入框
-                data_value = None
-                if len(response) >= 5:
-                    if response[1] & 0x80:
-                        display_str += "  [ERROR RESPONSE]"
-                    elif response[1] == 0x03 and len(response) >= 5:
-                        byte_count = response[2]
-                        if len(response) >= 3 + byte_count + 2:
-                            data_value = int.from_bytes(response[3:3+byte_count], 'big')
-                            display_str += f"  [Value: {data_value}]"
-                            # 更新输入框
-                            self.update_input_value(data_value)
-
-                self.add_log(display_str, "received")
+        :param registers: [(寄存器地址, 名称), ...]
+        :param transactions: [(请求帧, 应答帧), ...]
+        :param values: {寄存器地址: 值}
+        """
+        for request, response in transactions:
+            start = (request[2] << 8) | request[3]
+            count = (request[4] << 8) | request[5]
+            hex_str = ' '.join(f'{b:02X}' for b in request)
+            self.add_log(f"[TX] {hex_str} (Get 0x{start:02X}-0x{start + count - 1:02X})", "sent")
+            self.show_response(response)
+
+        missing = []
+        for register, name in registers:
+            if register in values:
+                self.update_input_value(values[register], register)
             else:
-                self.add_log("[RX] No response (timeout)", "info")
+                missing.append(name)
 
-        except Exception as e:
-            self.add_log(f"Error reading response: {e}", "error")
-
-        # 查询下一个寄存器
-        self._get_all_index += 1
-        self.after(100, self._query_next_register)
+        if missing:
+            self.add_log(f"Failed to get: {', '.join(missing)}", "error")
+        else:
+            self.add_log("All parameters retrieved successfully!", "info")
 
     def set_speed(self):
         """设置速度"""
@@ -495,11 +440,8 @@ class MotorDebugFrame(ttk.Frame):
 
             # 如果指令长度不足6字节，添加CRC
             if len(command) == 6:
-                crc = self.calculate_crc(command)
-                crc_low = crc & 0xFF
-                crc_high = (crc >> 8) & 0xFF
-                command = command + bytes([crc_low, crc_high])
-                self.add_log(f"Auto-added CRC: {crc_low:02X} {crc_high:02X}", "info")
+                command = modbus_rtu.append_crc(command)
+                self.add_log(f"Auto-added CRC: {command[6]:02X} {command[7]:02X}", "info")
 
             self.send_and_receive(command)
 
@@ -509,14 +451,8 @@ class MotorDebugFrame(ttk.Frame):
             self.add_log(f"Error sending manual command: {e}", "error")
 
     def send_and_receive(self, command):
-        """发送指令并接收响应"""
+        """发送指令并接收响应（收发在 I/O 线程中执行）"""
         try:
-            # 清空接收缓冲区
-            self.serial_conn.reset_input_buffer()
-
-            # 发送指令
-            self.serial_conn.write(command)
-
             # 显示发送的数据
             hex_str = ' '.join(f'{b:02X}' for b in command)
             display_str = f"[TX] {hex_str}"
@@ -525,91 +461,87 @@ class MotorDebugFrame(ttk.Frame):
                 display_str += f"  |  {ascii_str}"
             self.add_log(display_str, "sent")
 
-            # 等待并接收响应
-            self.after(100, lambda: self.read_response())
+            # 按期望长度或帧间静默判定应答结束，不再固定等待
+            self.worker.submit(self.transact, command, callback=self.read_response)
 
         except Exception as e:
             self.add_log(f"Error in communication: {e}", "error")
 
-    def read_response(self):
-        """读取串口响应"""
-        if not self.serial_conn or not self.serial_conn.is_open:
-            return
+    def transact(self, command):
+        """
+        发送一帧并等待应答（在 I/O 线程中执行），收发帧发布到事件总线。
+
+        :param command: 要发送的帧
+        :return: 应答帧，超时为 None
+        """
+        tx_ns = time.monotonic_ns()
+        response = modbus_rtu.transact(self.serial_conn, command)
+        BUS.publish_transaction(self.serial_conn.port, command, response, "Manual", tx_ns)
+        return response
+
+    def read_response(self, response):
+        """
+        处理串口应答（在界面线程中回调）。
 
+        :param response: 接收到的应答帧，超时为 None
+        """
         try:
-            # 检查是否有数据可读
-            if self.serial_conn.in_waiting > 0:
-                response = self.serial_conn.read(self.serial_conn.in_waiting)
-
-                # 显示接收的数据
-                hex_str = ' '.join(f'{b:02X}' for b in response)
-                display_str = f"[RX] {hex_str}"
-
-                # 解析响应
-                data_value = None
-                if len(response) >= 5:
-                    if response[1] & 0x80:
-                        display_str += "  [ERROR RESPONSE]"
-                    elif response[1] == 0x03 and len(response) >= 5:
-                        byte_count = response[2]
-                        if len(response) >= 3 + byte_count + 2:
-                            data_value = int.from_bytes(response[3:3+byte_count], 'big')
-                            display_str += f"  [Value: {data_value}]"
-
-                            # 更新对应输入框的值
-                            self.update_input_value(data_value)
-
-                if self.show_ascii_var.get():
-                    ascii_str = ''.join(chr(b) if 32 <= b < 127 else '.' for b in response)
-                    display_str += f"  |  {ascii_str}"
-
-                self.add_log(display_str, "received")
-
-                # 清除待处理的查询寄存器
-                if hasattr(self, 'pending_query_register'):
-                    delattr(self, 'pending_query_register')
-            else:
-                # 再等待一下，有些设备响应较慢
-                self.after(100, lambda: self.read_delayed())
+            self.show_response(response, show_ascii=self.show_ascii_var.get())
+
+            # 清除待处理的查询寄存器
+            if hasattr(self, 'pending_query_register'):
+                delattr(self, 'pending_query_register')
 
         except Exception as e:
             self.add_log(f"Error reading response: {e}", "error")
 
-    def read_delayed(self):
-        """延迟读取响应"""
-        if not self.serial_conn or not self.serial_conn.is_open:
+    def show_response(self, response, show_ascii=False):
+        """
+        显示并解析一帧应答，读寄存器应答会更新对应输入框。
+
+        :param response: 接收到的应答帧，超时为 None
+        :param show_ascii: 是否附加 ASCII 显示
+        """
+        if not response:
+            self.add_log("[RX] No response (timeout)", "info")
             return
 
-        try:
-            if self.serial_conn.in_waiting > 0:
-                response = self.serial_conn.read(self.serial_conn.in_waiting)
-                hex_str = ' '.join(f'{b:02X}' for b in response)
-                display_str = f"[RX] {hex_str}"
+        # 显示接收的数据
+        hex_str = ' '.join(f'{b:02X}' for b in response)
+        display_str = f"[RX] {hex_str}"
 
-                if response[1] & 0x80:
-                    display_str += "  [ERROR RESPONSE]"
+        # 解析响应
+        data_value = None
+        if len(response) >= 5:
+            if response[1] & 0x80:
+                display_str += "  [ERROR RESPONSE]"
+            elif response[1] == 0x03:
+                byte_count = response[2]
+                if len(response) >= 3 + byte_count + 2:
+                    data_value = int.from_bytes(response[3:3+byte_count], 'big')
+                    display_str += f"  [Value: {data_value}]"
 
-                if self.show_ascii_var.get():
-                    ascii_str = ''.join(chr(b) if 32 <= b < 127 else '.' for b in response)
-                    display_str += f"  |  {ascii_str}"
+                    # 更新对应输入框的值（仅单寄存器查询）
+                    if byte_count == 2:
+                        self.update_input_value(data_value)
 
-                self.add_log(display_str, "received")
-            else:
-                self.add_log("[RX] No response (timeout)", "info")
+        if show_ascii:
+            ascii_str = ''.join(chr(b) if 32 <= b < 127 else '.' for b in response)
+            display_str += f"  |  {ascii_str}"
 
-        except Exception as e:
-            self.add_log(f"Error reading delayed response: {e}", "error")
+        self.add_log(display_str, "received")
 
-    def update_input_value(self, value):
+    def update_input_value(self, value, register=None):
         """
         根据查询的寄存器地址，更新对应的输入框值
 
         :param value: 从设备读取到的值
+        :param register: 寄存器地址，None 时使用当前待处理的查询寄存器
         """
-        if not hasattr(self, 'pending_query_register'):
-            return
-
-        register = self.pending_query_register
+        if register is None:
+            if not hasattr(self, 'pending_query_register'):
+                return
+            register = self.pending_query_register
 
         # 根据寄存器地址更新对应的变量
         if register == 0x01:  # 方向
@@ -630,13 +562,11 @@ class MotorDebugFrame(ttk.Frame):
             self.angle_var.set(angle)
             self.add_log(f"  -> Angle updated to: {angle}° (pulse: {value})", "info")
         elif register == 0x0E:  # 加减速系数
-            self.accel_var.set(value)
             self.add_log(f"  -> Acceleration coefficient updated to: {value}", "info")
         elif register == 0x02:  # 运行状态
             status_str = "Running" if value == 1 else "Stopped"
             self.add_log(f"  -> Run status: {status_str} ({value})", "info")
         elif register == 0x09:  # 脱机使能
-            self.enable_var.set(value)
             status_str = "Free (脱机)" if value == 1 else "Lock (锁定)"
             self.add_log(f"  -> Enable status updated to: {value} ({status_str})", "info")
 
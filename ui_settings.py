@@ -5,6 +5,10 @@ import serial
 import serial.tools.list_ports
 from config_manager import ConfigManager
 from key_manager import KeyManager
+from serial_worker import SerialWorker
+from register_shadow import RegisterShadow
+from flow_optimizer import optimize_flow
+from event_bus import BUS, ItemStarted, ItemFinished
 
 # =========================================================================
 # 辅助类：测试项设置窗口 (TestItemSettingsWindow)
@@ -16,7 +20,7 @@ class TestItemSettingsWindow(tk.Toplevel):
     def __init__(self, parent, callback):
         super().__init__(parent)
         self.title("Add Test Item")
-        self.geometry("420x350")
+        self.geometry("420x440")
         self.callback = callback
         self.key_manager = KeyManager()
         
@@ -34,8 +38,8 @@ class TestItemSettingsWindow(tk.Toplevel):
         self.type_var = tk.StringVar(value="single")
         type_frame = ttk.Frame(main_frame)
         type_frame.grid(row=0, column=1, sticky=tk.W, pady=8)
-        ttk.Radiobutton(type_frame, text="Single Key", variable=self.type_var, value="single").pack(side=tk.LEFT, padx=5)
-        ttk.Radiobutton(type_frame, text="Multi-Key", variable=self.type_var, value="multi").pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(type_frame, text="Single Key", variable=self.type_var, value="single", command=self.on_type_change).pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(type_frame, text="Multi-Key", variable=self.type_var, value="multi", command=self.on_type_change).pack(side=tk.LEFT, padx=5)
 
         # 2. 选择按键
         ttk.Label(main_frame, text="Select Key:", font=("Cambria", 9, "bold")).grid(row=1, column=0, sticky=tk.W, pady=8)
@@ -46,6 +50,12 @@ class TestItemSettingsWindow(tk.Toplevel):
         self.key_combo.grid(row=1, column=1, sticky=tk.EW, pady=8)
         if key_names:
             self.key_combo.current(0)
+
+        # 组合键：多选列表，所选按键在同一时间窗口内同时按下（列表中靠前的第一个按键为电机定位的主按键）
+        self.key_names = key_names
+        self.key_list = tk.Listbox(main_frame, selectmode=tk.MULTIPLE, height=6, exportselection=False)
+        for name in key_names:
+            self.key_list.insert(tk.END, name)
             
         # 3. 测试模式
         ttk.Label(main_frame, text="Test Mode:", font=("Cambria", 9, "bold")).grid(row=2, column=0, sticky=tk.W, pady=8)
@@ -73,7 +83,17 @@ class TestItemSettingsWindow(tk.Toplevel):
         ttk.Button(btn_frame, text="Cancel", width=12, command=self.destroy).pack(side=tk.LEFT, padx=10)
         
         self.on_mode_change()
+        self.on_type_change()
         
+    def on_type_change(self):
+        """切换单键/组合键时显示对应的按键选择控件"""
+        if self.type_var.get() == "multi":
+            self.key_combo.grid_remove()
+            self.key_list.grid(row=1, column=1, sticky=tk.EW, pady=8)
+        else:
+            self.key_list.grid_remove()
+            self.key_combo.grid(row=1, column=1, sticky=tk.EW, pady=8)
+
     def on_mode_change(self):
         if self.mode_var.get() == "time":
             self.unit_label.grid(row=4, column=0, sticky=tk.W, pady=5)
@@ -83,7 +103,16 @@ class TestItemSettingsWindow(tk.Toplevel):
             self.unit_combo.grid_remove()
             
     def on_ok(self):
-        key_name = self.key_var.get()
+        keys = None
+        if self.type_var.get() == "multi":
+            keys = [self.key_names[i] for i in self.key_list.curselection()]
+            if len(keys) < 2:
+                from tkinter import messagebox
+                messagebox.showerror("错误", "组合键测试至少需要选择两个按键", parent=self)
+                return
+            key_name = " + ".join(keys)
+        else:
+            key_name = self.key_var.get()
         if not key_name:
             return
             
@@ -94,6 +123,8 @@ class TestItemSettingsWindow(tk.Toplevel):
             "target": self.target_var.get(),
             "unit": self.unit_var.get() if self.mode_var.get() == "time" else ""
         }
+        if keys:
+            test_item["keys"] = keys
         self.callback(test_item)
         self.destroy()
 
@@ -119,6 +150,8 @@ class SerialConfigFrame(ttk.LabelFrame):
         self.port_manager = port_manager
         self.log = log_callback
         self.serial_conn = None # 存储实际的 serial.Serial 连接对象
+        self.worker = None      # 该串口专用的后台 I/O 线程
+        self.register_shadow = None  # 该串口上控制器参数寄存器的影子缓存
         self.is_open = False    # 标记当前串口是否已打开
         
         # 内部变量（保持兼容性）
@@ -177,6 +210,11 @@ class SerialConfigFrame(ttk.LabelFrame):
         """
         if self.is_open:
             # --- 关闭逻辑 ---
+            # 先停止 I/O 线程，再关闭串口
+            if self.worker:
+                self.worker.stop()
+                self.worker = None
+            self.register_shadow = None
             if self.serial_conn and self.serial_conn.is_open:
                 try:
                     self.serial_conn.close()
@@ -212,6 +250,17 @@ class SerialConfigFrame(ttk.LabelFrame):
                     timeout=0.1
                 )
                 
+                # 为该串口启动专用 I/O 线程，回调通过 after 投递回界面线程
+                self.worker = SerialWorker(
+                    self.serial_conn,
+                    name=self['text'],
+                    dispatcher=lambda fn: self.after(0, fn),
+                    log_callback=self.log
+                )
+
+                # 重新连接后控制器状态未知，使用全新的影子缓存
+                self.register_shadow = RegisterShadow()
+
                 # 标记端口为占用状态
                 self.port_manager.claim_port(port)
                 self.is_open = True
@@ -244,6 +293,14 @@ class SerialConfigFrame(ttk.LabelFrame):
         """获取当前已打开的串口连接对象"""
         return self.serial_conn
 
+    def get_serial_worker(self):
+        """获取当前串口的后台 I/O 线程对象"""
+        return self.worker
+
+    def get_register_shadow(self):
+        """获取当前串口的参数寄存器影子缓存"""
+        return self.register_shadow
+
 # =========================================================================
 # 辅助类：全局端口管理器 (PortManager)
 # =========================================================================
@@ -267,6 +324,128 @@ class PortManager:
         if port in self.used_ports:
             self.used_ports.remove(port)
 
+# =========================================================================
+# 辅助类：测试流程卡片 (FlowCard)
+# =========================================================================
+class FlowCard:
+    """
+    FlowCard 类：测试流程区域中的一张测试项卡片。
+    卡片按固定位置放置在画布上，控件常驻并重复使用：滚动时改绑到其它测试项，
+    测试状态变化时只更新颜色与状态文字，不销毁重建。
+    """
+
+    # 卡片尺寸与位置（像素）
+    WIDTH = 150
+    HEIGHT = 150
+    GAP = 50        # 相邻卡片之间的距离，中间绘制箭头
+    MARGIN_X = 10
+    MARGIN_Y = 15
+
+    # 状态样式：状态 -> (状态文字, 卡片背景色, 边框颜色, 标题栏背景色, 文字颜色)
+    STYLES = {
+        None: ("", "white", "#edebe9", "#f8f9fa", "#323130"),
+        'pending': ("Pending", "white", "#edebe9", "#f8f9fa", "#323130"),
+        'running': ("Running...", "#f3fdf3", "#107c10", "#dff6dd", "#107c10"),  # 浅绿
+        'completed': ("Completed", "white", "#edebe9", "#e1dfdd", "#605e5c"),
+        'skipped': ("Skipped", "white", "#edebe9", "#fff4ce", "#8a6d00"),       # 浅黄
+        'failed': ("Failed", "#fdf3f4", "#d13438", "#fde7e9", "#d13438"),       # 浅红
+    }
+
+    def __init__(self, canvas, menu_callback):
+        """
+        :param canvas: 测试流程画布
+        :param menu_callback: 右键菜单回调 (event, index)
+        """
+        self.canvas = canvas
+        self.index = None   # 当前显示的测试项索引，None 表示卡片空闲
+        self.texts = None   # 当前显示的文字，用于判断是否需要更新
+        self.status = None
+
+        # 卡片容器与标题栏
+        self.card = tk.Frame(canvas, highlightthickness=1)
+        self.header = tk.Frame(self.card)
+        self.header.pack(fill=tk.X)
+        self.lbl_step = tk.Label(self.header, font=("Cambria", 9, "bold"))
+        self.lbl_step.pack(side=tk.LEFT, padx=8, pady=4)
+        self.lbl_status = tk.Label(self.header, font=("Cambria", 8, "italic"))
+        self.lbl_status.pack(side=tk.RIGHT, padx=8)
+
+        # 内容区域
+        self.content = tk.Frame(self.card)
+        self.content.pack(fill=tk.BOTH, expand=True, pady=10)
+        self.lbl_key = tk.Label(self.content, font=("Cambria", 12, "bold"), wraplength=self.WIDTH - 20)
+        self.lbl_key.pack(pady=(5, 2))
+        self.lbl_value = tk.Label(self.content, font=("Cambria", 10), fg="#605e5c")
+        self.lbl_value.pack()
+        self.lbl_type = tk.Label(self.content, font=("Cambria", 8), fg="#a19f9d")
+        self.lbl_type.pack(pady=5)
+
+        self.window_id = canvas.create_window(0, self.MARGIN_Y, window=self.card, anchor=tk.NW,
+                                              width=self.WIDTH, height=self.HEIGHT, state=tk.HIDDEN)
+        self.arrow_id = canvas.create_text(0, self.MARGIN_Y + self.HEIGHT // 2, text="➜",
+                                           font=("Cambria", 18), fill="#0078d4", state=tk.HIDDEN)
+
+        for widget in (self.card, self.header, self.lbl_step, self.lbl_status,
+                       self.content, self.lbl_key, self.lbl_value, self.lbl_type):
+            widget.bind("<Button-3>", lambda event: menu_callback(event, self.index))
+        self.apply_style(None)
+
+    @classmethod
+    def slot_x(cls, index):
+        """第 index 张卡片左边缘在画布上的横坐标"""
+        return cls.MARGIN_X + index * (cls.WIDTH + cls.GAP)
+
+    def show(self, index, item, status):
+        """
+        显示指定测试项，只更新发生变化的位置、文字与样式。
+
+        :param index: 测试项索引
+        :param item: 测试项字典
+        :param status: 测试状态 (None / 'pending' / 'running' / 'completed' / 'skipped' / 'failed')
+        """
+        if index != self.index:
+            self.index = index
+            x = self.slot_x(index)
+            self.canvas.coords(self.window_id, x, self.MARGIN_Y)
+            self.canvas.coords(self.arrow_id, x - self.GAP // 2, self.MARGIN_Y + self.HEIGHT // 2)
+            self.canvas.itemconfigure(self.window_id, state=tk.NORMAL)
+            self.canvas.itemconfigure(self.arrow_id, state=tk.HIDDEN if index == 0 else tk.NORMAL)
+
+        texts = (
+            f"Step {index+1}",
+            item['key_name'],
+            f"{item['target']} {item['unit'] if item['mode'] == 'time' else 'Times'}",
+            "Single Key" if item.get('type') == 'single' else "Multi-Key",
+        )
+        if texts != self.texts:
+            self.texts = texts
+            self.lbl_step.config(text=texts[0])
+            self.lbl_key.config(text=texts[1])
+            self.lbl_value.config(text=texts[2])
+            self.lbl_type.config(text=texts[3])
+
+        if status != self.status:
+            self.apply_style(status)
+
+    def apply_style(self, status):
+        """按测试状态设置卡片颜色与状态文字"""
+        self.status = status
+        status_text, body_bg, border_color, header_bg, text_color = self.STYLES[status]
+        self.card.config(bg=body_bg, highlightbackground=border_color)
+        self.header.config(bg=header_bg)
+        self.lbl_step.config(bg=header_bg, fg=text_color)
+        self.lbl_status.config(text=status_text, bg=header_bg, fg=text_color)
+        self.content.config(bg=body_bg)
+        self.lbl_key.config(bg=body_bg, fg=text_color)
+        self.lbl_value.config(bg=body_bg)
+        self.lbl_type.config(bg=body_bg)
+
+    def hide(self):
+        """隐藏卡片，等待重复使用"""
+        self.index = None
+        self.canvas.itemconfigure(self.window_id, state=tk.HIDDEN)
+        self.canvas.itemconfigure(self.arrow_id, state=tk.HIDDEN)
+
 # =========================================================================
 # 主界面类：设置页签 (SettingsFrame)
 # =========================================================================
@@ -283,6 +462,7 @@ class SettingsFrame(ttk.Frame):
         self.vars = {} # 存储普通参数的变量字典
         self.config_manager = ConfigManager() # 初始化配置管理器
         self.test_flow = [] # 存储测试流程项
+        self.key_manager = KeyManager() # 读取按键绑定坐标（用于优化测试顺序）
         self.test_control = None # 引用测试控制对象
         
         self.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -341,6 +521,12 @@ class SettingsFrame(ttk.Frame):
         ttk.Entry(press_inner, textvariable=self.vars['press_interval'], width=15).grid(row=0, column=3, padx=(0, 20), pady=5)
         self.vars['press_interval'].trace_add("write", lambda *args: self.check_changes())
 
+        # Move Timeout：电机移动的安全超时时间，超过后判定移动失败
+        tk.Label(press_inner, text="Move Timeout (ms):", font=("Cambria", 9), bg="white", fg="#605e5c").grid(row=0, column=4, padx=(0, 10), pady=5, sticky=tk.W)
+        self.vars['move_timeout'] = tk.IntVar(value=10000)
+        ttk.Entry(press_inner, textvariable=self.vars['move_timeout'], width=15).grid(row=0, column=5, padx=(0, 20), pady=5)
+        self.vars['move_timeout'].trace_add("write", lambda *args: self.check_changes())
+
         # --- 3. 测试流程设置分区 (Test Flow) ---
         flow_card = tk.Frame(self, bg="white", highlightthickness=1, highlightbackground="#edebe9")
         flow_card.pack(fill=tk.BOTH, expand=True, pady=(10, 0))
@@ -360,6 +546,13 @@ class SettingsFrame(ttk.Frame):
         self.btn_clear = ttk.Button(ctrl_frame, text="Clear All", style="Danger.TButton", command=self.clear_test_flow)
         self.btn_clear.pack(side=tk.LEFT, padx=5)
 
+        # 按绑定坐标重排测试项，减少电机行程（仅适用于相互独立的测试项）
+        self.btn_optimize = ttk.Button(ctrl_frame, text="Optimize Order", command=self.optimize_test_flow)
+        self.btn_optimize.pack(side=tk.LEFT, padx=5)
+
+        self.lbl_optimize = tk.Label(ctrl_frame, text="", font=("Cambria", 9), bg="white", fg="#605e5c")
+        self.lbl_optimize.pack(side=tk.LEFT, padx=10)
+
         self.btn_next = ttk.Button(ctrl_frame, text="Next Item >>", command=self.skip_to_next_item, state=tk.DISABLED)
         self.btn_next.pack(side=tk.RIGHT, padx=5)
 
@@ -367,14 +560,23 @@ class SettingsFrame(ttk.Frame):
         self.flow_canvas = tk.Canvas(flow_card, height=180, highlightthickness=0, bg="white")
         self.flow_canvas.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=5)
         
-        scrollbar = ttk.Scrollbar(flow_card, orient=tk.HORIZONTAL, command=self.flow_canvas.xview)
+        scrollbar = ttk.Scrollbar(flow_card, orient=tk.HORIZONTAL, command=self.scroll_test_flow)
         scrollbar.pack(side=tk.BOTTOM, fill=tk.X, padx=5, pady=(0, 5))
         self.flow_canvas.configure(xscrollcommand=scrollbar.set)
 
-        self.flow_container = tk.Frame(self.flow_canvas, bg="white")
-        self.flow_canvas.create_window((0, 0), window=self.flow_container, anchor=tk.NW)
-        
-        self.flow_container.bind("<Configure>", lambda e: self.flow_canvas.configure(scrollregion=self.flow_canvas.bbox("all")))
+        # 只为可见范围内的测试项放置卡片，滚动或画布尺寸变化时补齐
+        self.flow_cards = {}            # {测试项索引: FlowCard}
+        self.card_pool = []             # 已隐藏、可重复使用的卡片
+        self.flow_state = (False, -1)   # 最近一次渲染时的 (是否测试中, 当前测试项索引)
+        # 订阅测试项开始/结束事件，已结束的测试项按结果显示（跳过/失败）
+        self.item_events = BUS.subscribe((ItemStarted, ItemFinished))
+        self.item_results = {}          # {测试项索引: 结束状态}
+        self.flow_canvas.bind("<Configure>", lambda e: self.update_visible_cards())
+
+        # 测试项右键菜单（所有卡片共用）
+        self.menu_index = None
+        self.flow_menu = tk.Menu(self, tearoff=0)
+        self.flow_menu.add_command(label="Delete Item", command=lambda: self.delete_test_item(self.menu_index))
 
         # --- 4. 应用按钮 (底部) ---
         self.btn_apply = ttk.Button(self, text="Apply Changes", style="Primary.TButton", command=self.apply_changes, state=tk.DISABLED)
@@ -398,83 +600,86 @@ class SettingsFrame(ttk.Frame):
             self.check_changes()
 
     def render_test_flow(self):
-        """渲染测试流程区域的所有测试项"""
+        """
+        刷新测试流程区域：更新滚动范围与按钮状态，并刷新可见范围内的卡片。
+        卡片常驻复用，只有状态或内容发生变化的卡片才会更新。
+        """
         is_testing = False
         current_idx = -1
         if self.test_control:
             is_testing = self.test_control.is_running
             current_idx = self.test_control.current_item_index
+        self.flow_state = (is_testing, current_idx)
+        self.collect_item_results()
 
         self.btn_clear.config(state=tk.DISABLED if is_testing else tk.NORMAL)
+        self.btn_optimize.config(state=tk.DISABLED if is_testing else tk.NORMAL)
         self.btn_next.config(state=tk.NORMAL if is_testing else tk.DISABLED)
 
-        for widget in self.flow_container.winfo_children():
-            widget.destroy()
-
-        for i, item in enumerate(self.test_flow):
-            if i > 0:
-                arrow_label = tk.Label(self.flow_container, text="➜", font=("Cambria", 18), fg="#0078d4", bg="white")
-                arrow_label.pack(side=tk.LEFT, padx=5)
-
-            # 样式定义
-            status_text = ""
-            status_color = "white"
-            border_color = "#edebe9"
-            header_bg = "#f8f9fa"
-            text_color = "#323130"
-            
-            if is_testing:
-                if i < current_idx:
-                    status_text = "Completed"
-                    header_bg = "#e1dfdd"
-                    text_color = "#605e5c"
-                elif i == current_idx:
-                    status_text = "Running..."
-                    header_bg = "#dff6dd" # 浅绿
-                    border_color = "#107c10"
-                    text_color = "#107c10"
-                    status_color = "#f3fdf3"
-                else:
-                    status_text = "Pending"
-            
-            # 创建卡片容器
-            card = tk.Frame(self.flow_container, bg=status_color, highlightthickness=1, highlightbackground=border_color)
-            card.pack(side=tk.LEFT, padx=10, pady=20, ipadx=10, ipady=10)
-            
-            # 卡片标题栏
-            header = tk.Frame(card, bg=header_bg)
-            header.pack(fill=tk.X)
-            
-            tk.Label(header, text=f"Step {i+1}", font=("Cambria", 9, "bold"), bg=header_bg, fg=text_color).pack(side=tk.LEFT, padx=8, pady=4)
-            if status_text:
-                tk.Label(header, text=status_text, font=("Cambria", 8, "italic"), bg=header_bg, fg=text_color).pack(side=tk.RIGHT, padx=8)
-
-            # 内容区域
-            content = tk.Frame(card, bg=status_color)
-            content.pack(fill=tk.BOTH, expand=True, pady=10)
+        width = FlowCard.slot_x(len(self.test_flow)) - FlowCard.GAP + FlowCard.MARGIN_X if self.test_flow else 0
+        self.flow_canvas.configure(scrollregion=(0, 0, width, FlowCard.HEIGHT + 2 * FlowCard.MARGIN_Y))
+        self.update_visible_cards()
 
-            tk.Label(content, text=item['key_name'], font=("Cambria", 12, "bold"), bg=status_color, fg=text_color).pack(pady=(5, 2))
-            
-            val_text = f"{item['target']} {item['unit'] if item['mode'] == 'time' else 'Times'}"
-            tk.Label(content, text=val_text, font=("Cambria", 10), bg=status_color, fg="#605e5c").pack()
-            
-            type_text = "Single Key" if item.get('type') == 'single' else "Multi-Key"
-            tk.Label(content, text=type_text, font=("Cambria", 8), bg=status_color, fg="#a19f9d").pack(pady=5)
-
-            # 右键菜单 (仅在非测试时或特定条件下允许删除)
-            menu = tk.Menu(self, tearoff=0)
-            menu.add_command(label="Delete Item", command=lambda idx=i: self.delete_test_item(idx))
-            
-            def show_menu(event, m=menu, idx=i):
-                if is_testing and idx <= current_idx:
-                    return
-                m.post(event.x_root, event.y_root)
-            
-            card.bind("<Button-3>", show_menu)
-            for child in card.winfo_children():
-                child.bind("<Button-3>", show_menu)
-                for grand_child in child.winfo_children():
-                    grand_child.bind("<Button-3>", show_menu)
+    def collect_item_results(self):
+        """取出事件总线上的测试项事件，记录各测试项的结束状态；新一轮测试开始时清空"""
+        for event in self.item_events.drain():
+            if isinstance(event, ItemStarted):
+                if event.index == 0:
+                    self.item_results = {}
+            else:
+                self.item_results[event.index] = event.result['status']
+
+    def card_status(self, index):
+        """根据最近一次渲染时的测试进度与测试项结果计算测试项状态"""
+        is_testing, current_idx = self.flow_state
+        if not is_testing:
+            return None
+        if index < current_idx:
+            status = self.item_results.get(index, 'completed')
+            if status == 'completed':
+                return 'completed'
+            return 'skipped' if status == 'skipped' else 'failed'
+        if index == current_idx:
+            return 'running'
+        return 'pending'
+
+    def update_visible_cards(self):
+        """
+        为可见范围（左右各多留一张）内的测试项放置卡片，移出范围的卡片隐藏后放回复用池。
+        测试项再多，同时存在的卡片数量也只与画布宽度有关。
+        """
+        canvas = self.flow_canvas
+        slot = FlowCard.WIDTH + FlowCard.GAP
+        left = int(canvas.canvasx(0)) - FlowCard.MARGIN_X
+        right = int(canvas.canvasx(canvas.winfo_width())) - FlowCard.MARGIN_X
+        visible = range(max(left // slot - 1, 0), min(right // slot + 2, len(self.test_flow)))
+
+        for index in [i for i in self.flow_cards if i not in visible]:
+            card = self.flow_cards.pop(index)
+            card.hide()
+            self.card_pool.append(card)
+
+        for index in visible:
+            card = self.flow_cards.get(index)
+            if card is None:
+                card = self.card_pool.pop() if self.card_pool else FlowCard(canvas, self.show_card_menu)
+                self.flow_cards[index] = card
+            card.show(index, self.test_flow[index], self.card_status(index))
+
+    def scroll_test_flow(self, *args):
+        """滚动条回调：滚动画布并补齐新进入可见范围的卡片"""
+        self.flow_canvas.xview(*args)
+        self.update_visible_cards()
+
+    def show_card_menu(self, event, index):
+        """显示测试项右键菜单（测试中不允许删除已完成或正在执行的测试项）"""
+        if index is None:
+            return
+        is_testing, current_idx = self.flow_state
+        if is_testing and index <= current_idx:
+            return
+        self.menu_index = index
+        self.flow_menu.post(event.x_root, event.y_root)
 
     def clear_test_flow(self):
         """清空所有测试项"""
@@ -484,6 +689,29 @@ class SettingsFrame(ttk.Frame):
         self.render_test_flow()
         self.check_changes()
 
+    def optimize_test_flow(self):
+        """按绑定的 X/Y 坐标重新排列测试项，使电机总行程最短，并显示节省的行程"""
+        if self.test_control and self.test_control.is_running:
+            return
+        if len(self.test_flow) < 2:
+            return
+
+        bindings = self.key_manager.get_bindings()
+        new_flow, before, after = optimize_flow(self.test_flow, bindings)
+
+        if after >= before:
+            self.lbl_optimize.config(text=f"Travel: {before} pulses (already optimal)")
+            self.log(f"Test flow order already optimal (travel {before} pulses)", "SET")
+            return
+
+        saved = before - after
+        self.lbl_optimize.config(text=f"Travel: {before} -> {after} pulses (-{saved * 100 // before}%)")
+        self.log(f"Test flow reordered: travel {before} -> {after} pulses, saved {saved}", "SET")
+
+        self.test_flow = new_flow
+        self.render_test_flow()
+        self.check_changes()
+
     def skip_to_next_item(self):
         """跳过当前测试项"""
         if self.test_control:
@@ -514,6 +742,8 @@ class SettingsFrame(ttk.Frame):
                     state[key] = 100
                 elif key == 'press_interval':
                     state[key] = 500
+                elif key == 'move_timeout':
+                    state[key] = 10000
                 else:
                     state[key] = var.get() if hasattr(var, 'get') else ""
         
@@ -560,11 +790,12 @@ class SettingsFrame(ttk.Frame):
     def validate_and_fix_inputs(self):
         """
         验证输入的有效性，如果输入无效则恢复为上一次保存的值。
-        检查的字段包括：press_duration, press_interval
+        检查的字段包括：press_duration, press_interval, move_timeout
         """
         # 获取上一次保存的值（如果有）
         last_press_duration = self.saved_state.get('press_duration', 100) if hasattr(self, 'saved_state') else 100
         last_press_interval = self.saved_state.get('press_interval', 500) if hasattr(self, 'saved_state') else 500
+        last_move_timeout = self.saved_state.get('move_timeout', 10000) if hasattr(self, 'saved_state') else 10000
         
         # 验证并修复 press_duration
         try:
@@ -584,6 +815,15 @@ class SettingsFrame(ttk.Frame):
             self.vars['press_interval'].set(last_press_interval)
             self.log(f"Invalid press interval, restored to {last_press_interval}", "SET")
 
+        # 验证并修复 move_timeout
+        try:
+            move_timeout = self.vars['move_timeout'].get()
+            if move_timeout is None or move_timeout <= 0:
+                raise ValueError("Invalid move timeout")
+        except:
+            self.vars['move_timeout'].set(last_move_timeout)
+            self.log(f"Invalid move timeout, restored to {last_move_timeout}", "SET")
+
     def save_config_to_file(self):
         """将当前配置保存到文件"""
         config = self.get_current_state()
@@ -623,6 +863,9 @@ class SettingsFrame(ttk.Frame):
             
             if 'press_interval' in config and config['press_interval'] is not None:
                 self.vars['press_interval'].set(config['press_interval'])
+
+            if 'move_timeout' in config and config['move_timeout'] is not None:
+                self.vars['move_timeout'].set(config['move_timeout'])
             
             # 加载测试流程
             if 'test_flow' in config:
@@ -659,3 +902,19 @@ class SettingsFrame(ttk.Frame):
         if title in self.serial_frames:
             return self.serial_frames[title].get_serial_connection()
         return None
+
+    def get_serial_worker(self, title):
+        """
+        供外部调用的接口，用于获取已打开串口的后台 I/O 线程。
+        """
+        if title in self.serial_frames:
+            return self.serial_frames[title].get_serial_worker()
+        return None
+
+    def get_register_shadow(self, title):
+        """
+        供外部调用的接口，用于获取已打开串口的参数寄存器影子缓存。
+        """
+        if title in self.serial_frames:
+            return self.serial_frames[title].get_register_shadow()
+        return None
@@ -1,9 +1,8 @@
 import tkinter as tk
 from tkinter import ttk
-import datetime
-import time
 import threading
-import struct
+from move_engine import MotorAxis
+from test_engine import TestEngine
 from key_manager import KeyManager
 
 class TestControlFrame(ttk.Frame):
@@ -27,16 +26,12 @@ class TestControlFrame(ttk.Frame):
         self.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
         
         # --- 测试状态变量 ---
-        self.timer_id = None            # Tkinter 定时器 ID，用于倒计时更新
-        self.remaining_seconds = 0      # 剩余测试时间（秒）
-        self.remaining_counts = 0       # 剩余测试次数
+        self.timer_id = None            # Tkinter 定时器 ID，用于定时读取测试进度
         self.current_item_index = 0     # 当前测试项索引
+        self.last_progress = None       # 界面上次显示的进度快照
         self.test_flow = []             # 测试流程
         self.is_running = False         # 标志：测试是否正在运行
-        self.is_paused = False          # 标志：测试是否处于暂停状态
-        self.stop_requested = False     # 标志：用户是否请求停止测试
-        self.pause_requested = False    # 标志：用户是否请求暂停测试
-        self.skip_item_requested = False # 标志：用户是否请求跳过当前测试项
+        self.engine = None              # 当前测试的执行引擎 (TestEngine)，保存剩余时间/次数及暂停、停止、跳过请求
         self.current_test_thread = None # 当前运行测试逻辑的后台线程
         
         self.create_widgets()
@@ -81,6 +76,11 @@ class TestControlFrame(ttk.Frame):
         self.btn_skip.pack(side=tk.LEFT, padx=15, ipadx=10)
         self.btn_stop.pack(side=tk.LEFT, padx=15, ipadx=10)
 
+        # 高频按压模式：不逐次记录按压日志，测试项结束后汇总实际频率与抖动
+        self.burst_var = tk.BooleanVar(value=False)
+        self.chk_burst = ttk.Checkbutton(self, text="Burst Mode (high-rate presses, summary log only)", variable=self.burst_var)
+        self.chk_burst.pack()
+
     # ==========================================
     # 测试控制逻辑分区
     # ==========================================
@@ -106,17 +106,19 @@ class TestControlFrame(ttk.Frame):
                 self.log("Error: Test flow is empty. Please add test items in Settings.", "ERR")
                 return
 
+            # 检查串口并创建测试引擎
+            self.engine = self.create_engine(settings)
+            if self.engine is None:
+                return
+
             self.current_item_index = 0
-            
-            # 重置所有控制标志位
+            self.last_progress = None
             self.is_running = True
-            self.is_paused = False
-            self.stop_requested = False
-            self.pause_requested = False
             
             # 开启后台线程执行核心测试循环
             self.current_test_thread = threading.Thread(target=self.run_test_cycle, daemon=True)
             self.current_test_thread.start()
+            self.poll_progress()
             
         # 更新 UI 状态为“测试中”
         self.update_ui_state("TESTING")
@@ -129,6 +131,7 @@ class TestControlFrame(ttk.Frame):
         if state == "TESTING":
             self.lbl_status.config(text="● TESTING", foreground="#107c10")
             self.btn_start.config(state=tk.DISABLED)
+            self.chk_burst.config(state=tk.DISABLED)
             self.btn_pause.config(state=tk.NORMAL, text="Pause")
             self.btn_skip.config(state=tk.NORMAL)
             self.btn_stop.config(state=tk.NORMAL)
@@ -143,197 +146,98 @@ class TestControlFrame(ttk.Frame):
             self.btn_pause.config(state=tk.DISABLED, text="Pause")
             self.btn_skip.config(state=tk.DISABLED)
             self.btn_stop.config(state=tk.DISABLED)
+            self.chk_burst.config(state=tk.NORMAL)
             self.lbl_remaining.config(text="Remaining: --")
 
-    def run_test_cycle(self):
+    def create_engine(self, settings):
         """
-        核心测试循环逻辑。遍历测试流程中的每一个测试项。
+        检查所需串口是否已打开，并创建测试引擎。
+
+        :param settings: 当前配置快照
+        :return: TestEngine 对象，串口未就绪时返回 None
         """
-        settings = self.settings_source.get_current_state()
         relay_conn = self.settings_source.get_serial_connection("Relay (Solenoid)")
         motor_x_conn = self.settings_source.get_serial_connection("X-Axis Motor")
         motor_y_conn = self.settings_source.get_serial_connection("Y-Axis Motor")
+        # 电机串口的收发统一交给各自的 I/O 线程执行，避免与运动控制页并发访问同一串口
+        motor_x_worker = self.settings_source.get_serial_worker("X-Axis Motor")
+        motor_y_worker = self.settings_source.get_serial_worker("Y-Axis Motor")
         
         # --- 串口连接检查 ---
         missing_ports = []
         if not relay_conn or not relay_conn.is_open: missing_ports.append("Relay")
-        if not motor_x_conn or not motor_x_conn.is_open: missing_ports.append("X-Axis Motor")
-        if not motor_y_conn or not motor_y_conn.is_open: missing_ports.append("Y-Axis Motor")
+        if not motor_x_conn or not motor_x_conn.is_open or not motor_x_worker: missing_ports.append("X-Axis Motor")
+        if not motor_y_conn or not motor_y_conn.is_open or not motor_y_worker: missing_ports.append("Y-Axis Motor")
         
         if missing_ports:
             self.log(f"Error: The following serial ports are not open: {', '.join(missing_ports)}", "ERR")
             self.log("Please open all required serial ports in 'Parameter Settings' tab before starting the test.", "ERR")
-            self.is_running = False
-            self.lbl_remaining.after(0, self.finish_test)
-            return
+            return None
 
-        press_duration = settings.get('press_duration', 100) / 1000.0
-        interval = settings.get('press_interval', 500) / 1000.0
+        axis_x = MotorAxis("X", motor_x_conn, motor_x_worker, self.settings_source.get_register_shadow("X-Axis Motor"))
+        axis_y = MotorAxis("Y", motor_y_conn, motor_y_worker, self.settings_source.get_register_shadow("Y-Axis Motor"))
 
-        # 继电器控制指令
-        CMD_OPEN = bytes.fromhex("A0 01 01 A2")
-        CMD_CLOSE = bytes.fromhex("A0 01 00 A1")
+        return TestEngine(
+            relay_conn, axis_x, axis_y, self.key_manager.get_bindings(), settings,
+            log_callback=self.log,
+            burst=self.burst_var.get()
+        )
 
-        all_bindings = self.key_manager.get_bindings()
-        binding_dict = {b['key_name']: b for b in all_bindings}
-
-        for i in range(len(self.test_flow)):
-            if self.stop_requested:
-                break
-            
-            self.current_item_index = i
-            item = self.test_flow[i]
-            key_name = item['key_name']
-            
-            # 通知设置页刷新显示（更新正在测试/已完成状态）
-            if hasattr(self.settings_source, 'render_test_flow'):
-                self.lbl_remaining.after(0, self.settings_source.render_test_flow)
-            
-            self.log(f"Testing item {i+1}/{len(self.test_flow)}: {key_name}", "TEST")
-            
-            # 1. 移动电机到指定位置
-            binding = binding_dict.get(key_name)
-            if binding:
-                x_pulse = binding.get('x_pulse', 0)
-                y_pulse = binding.get('y_pulse', 0)
-                
-                self.log(f"Moving to {key_name} (X:{x_pulse}, Y:{y_pulse})", "MOT")
-                self.send_motor_pulse(motor_x_conn, x_pulse, "X")
-                self.send_motor_pulse(motor_y_conn, y_pulse, "Y")
-                
-                # 等待电机移动（这里暂时用固定延时，实际可能需要查询状态）
-                # 在等待期间也要检查停止请求
-                for _ in range(20): # 2秒，每100ms检查一次
-                    if self.stop_requested or self.skip_item_requested: break
-                    time.sleep(0.1)
-            else:
-                self.log(f"Warning: No binding found for {key_name}", "WRN")
-
-            if self.stop_requested: break
-            if self.skip_item_requested:
-                self.skip_item_requested = False
-                continue
-
-            # 2. 初始化该项的剩余值
-            mode = item.get('mode')
-            target = item.get('target', 0)
-            
-            if mode == 'time':
-                unit = item.get('unit', 'Seconds')
-                seconds = target
-                if unit == 'Minutes': seconds = target * 60
-                elif unit == 'Hours': seconds = target * 3600
-                self.remaining_seconds = seconds
-                self.lbl_remaining.after(0, lambda: self.update_remaining_display(mode))
-                
-                # 启动时间模式下的 UI 倒计时
-                self.lbl_remaining.after(0, self.run_timer_async)
-            else:
-                self.remaining_counts = target
-                self.lbl_remaining.after(0, lambda: self.update_remaining_display(mode))
-
-            # 3. 执行单项测试循环
-            while self.is_running:
-                if self.stop_requested or self.skip_item_requested: break
-                
-                # 检查暂停
-                if self.pause_requested:
-                    self.is_paused = True
-                    while self.pause_requested and not self.stop_requested:
-                        time.sleep(0.1)
-                    self.is_paused = False
-                    if self.stop_requested: break
+    def run_test_cycle(self):
+        """
+        测试后台线程：由测试引擎遍历执行测试流程中的每一个测试项，结束后通知界面收尾。
+        进度由引擎发布到进度槽，界面定时读取，这里不逐次投递界面回调。
+        """
+        try:
+            self.engine.run(self.test_flow)
+        except Exception as e:
+            self.log(f"Test aborted: {e}", "ERR")
+        finally:
+            # 收尾（异常退出时也要恢复界面状态）
+            self.is_running = False
+            self.lbl_remaining.after(0, self.finish_test)
 
-                # 执行动作
-                try:
-                    # 吸合继电器
-                    relay_conn.write(CMD_OPEN)
-                    self.log(f"Relay ON: {CMD_OPEN.hex(' ').upper()}", "COM")
-                    time.sleep(press_duration)
-                    
-                    # 断开继电器
-                    relay_conn.write(CMD_CLOSE)
-                    self.log(f"Relay OFF: {CMD_CLOSE.hex(' ').upper()}", "COM")
-                    time.sleep(interval)
-                except Exception as e:
-                    self.log(f"Relay Error: {e}", "ERR")
-                    break
+    # 界面读取测试进度的周期 (ms)，约 20 Hz，与按压频率无关
+    PROGRESS_POLL_MS = 50
 
-                if mode == 'count':
-                    self.remaining_counts -= 1
-                    self.lbl_remaining.after(0, lambda: self.update_remaining_display(mode))
-                    if self.remaining_counts <= 0:
-                        break
-                else:
-                    if self.remaining_seconds <= 0:
-                        break
-            
-            self.skip_item_requested = False
-            if self.stop_requested: break
+    def poll_progress(self):
+        """
+        定时读取测试引擎发布的最新进度快照并刷新界面。
+        两次读取之间的中间进度直接丢弃；测试项切换时才重绘测试流程，剩余次数/时间变化时才更新标签。
+        计时由测试引擎按单调时钟完成（含暂停顺延），界面卡顿不会延长测试。
+        """
+        self.timer_id = None
+        if not self.engine:
+            return
+        snapshot = self.engine.progress.latest()
+        if snapshot is not None and snapshot != self.last_progress:
+            if self.last_progress is None or snapshot.item_index != self.last_progress.item_index:
+                self.current_item_index = snapshot.item_index
+                # 通知设置页刷新显示（更新正在测试/已完成状态）
+                if hasattr(self.settings_source, 'render_test_flow'):
+                    self.settings_source.render_test_flow()
+            self.last_progress = snapshot
+        if snapshot is not None:
+            self.update_remaining_display(snapshot)
+        if self.is_running:
+            self.timer_id = self.after(self.PROGRESS_POLL_MS, self.poll_progress)
 
-        # 收尾
-        self.is_running = False
-        self.current_item_index = len(self.test_flow) # 全部标记为已完成
-        if hasattr(self.settings_source, 'render_test_flow'):
-            self.lbl_remaining.after(0, self.settings_source.render_test_flow)
-        self.lbl_remaining.after(0, self.finish_test)
+    def update_remaining_display(self, snapshot):
+        """
+        更新剩余时间/次数显示，文字不变时不刷新标签。
 
-    def update_remaining_display(self, mode):
-        """更新剩余时间/次数显示"""
-        if mode == 'time':
-            m, s = divmod(self.remaining_seconds, 60)
+        :param snapshot: 进度快照 (TestProgress)
+        """
+        if snapshot.mode == 'time':
+            m, s = divmod(self.engine.remaining_seconds, 60)
             h, m = divmod(m, 60)
-            self.lbl_remaining.config(text=f"Item {self.current_item_index+1}: {h:02d}:{m:02d}:{s:02d}")
+            text = f"Item {snapshot.item_index+1}: {h:02d}:{m:02d}:{s:02d}"
+        elif snapshot.mode == 'count':
+            text = f"Item {snapshot.item_index+1}: {snapshot.remaining_counts} Counts"
         else:
-            self.lbl_remaining.config(text=f"Item {self.current_item_index+1}: {self.remaining_counts} Counts")
-
-    def run_timer_async(self):
-        """异步更新时间"""
-        if not self.is_running or self.is_paused:
-            if self.is_running: # 如果还在运行只是暂停，1秒后再试
-                self.timer_id = self.after(1000, self.run_timer_async)
             return
-
-        if self.remaining_seconds > 0:
-            self.remaining_seconds -= 1
-            self.update_remaining_display('time')
-            self.timer_id = self.after(1000, self.run_timer_async)
-        else:
-            self.timer_id = None
-
-    def send_motor_pulse(self, conn, pulse, axis_name=""):
-        """发送电机脉冲指令 (Modbus RTU)"""
-        if not conn or not conn.is_open:
-            return
-        try:
-            # 1. 设置脉冲数 (寄存器 0x05)
-            data = struct.pack('>BBHH', 0x01, 0x06, 0x05, pulse)
-            crc = self.calculate_crc(data)
-            full_msg = data + struct.pack('<H', crc)
-            conn.write(full_msg)
-            self.log(f"Motor {axis_name} Set Pulse ({pulse}): {full_msg.hex(' ').upper()}", "COM")
-            
-            # 2. 发送运行指令 (寄存器 0x02, 值 1)
-            time.sleep(0.1)
-            data = struct.pack('>BBHH', 0x01, 0x06, 0x02, 0x0001)
-            crc = self.calculate_crc(data)
-            full_msg = data + struct.pack('<H', crc)
-            conn.write(full_msg)
-            self.log(f"Motor {axis_name} Run: {full_msg.hex(' ').upper()}", "COM")
-        except Exception as e:
-            self.log(f"Motor {axis_name} Command Error: {e}", "ERR")
-
-    def calculate_crc(self, data):
-        """计算 Modbus CRC16"""
-        crc = 0xFFFF
-        for byte in data:
-            crc ^= byte
-            for _ in range(8):
-                if crc & 0x0001:
-                    crc = (crc >> 1) ^ 0xA001
-                else:
-                    crc >>= 1
-        return crc
+        if self.lbl_remaining.cget('text') != text:
+            self.lbl_remaining.config(text=text)
 
     # ==========================================
     # 辅助与生命周期管理分区
@@ -343,35 +247,34 @@ class TestControlFrame(ttk.Frame):
         if self.timer_id:
             self.after_cancel(self.timer_id)
             self.timer_id = None
+        # 读取最终进度（全部测试项标记为已完成）
+        self.poll_progress()
         self.update_ui_state("STANDBY")
         self.log("Test Finished/Stopped", "TEST")
 
     def pause_test(self):
-        """暂停测试按钮的回调。设置请求标志并停止 UI 定时器。"""
-        self.pause_requested = True
-        if self.timer_id:
-            self.after_cancel(self.timer_id)
-            self.timer_id = None
+        """暂停测试按钮的回调。设置请求标志（暂停期间引擎停止计时）。"""
+        if self.engine:
+            self.engine.pause_requested = True
         self.update_ui_state("PAUSED")
         self.log("Test Pause Requested (waiting for cycle to finish)", "TEST")
 
     def resume_test(self):
-        """恢复测试按钮的回调。清除请求标志并重启 UI 定时器（如果需要）。"""
-        self.pause_requested = False # 解除后台线程的阻塞
-        settings = self.settings_source.get_current_state()
-        if settings.get('test_mode') == 'time':
-            self.run_timer()
+        """恢复测试按钮的回调。清除请求标志。"""
+        if self.engine:
+            self.engine.pause_requested = False # 解除后台线程的阻塞
         self.update_ui_state("TESTING")
         self.log("Test Resumed", "TEST")
 
     def stop_test(self):
         """停止测试按钮的回调。设置停止请求标志，并确保暂停状态被解除。"""
-        self.stop_requested = True
-        self.pause_requested = False # 如果处于暂停状态，先解封线程使其能检测到停止标志并退出
+        if self.engine:
+            self.engine.stop_requested = True
+            self.engine.pause_requested = False # 如果处于暂停状态，先解封线程使其能检测到停止标志并退出
         self.log("Test Stop Requested (waiting for cycle to finish)", "TEST")
 
     def skip_to_next(self):
         """跳过当前测试项"""
-        if self.is_running:
-            self.skip_item_requested = True
+        if self.is_running and self.engine:
+            self.engine.skip_item_requested = True
             self.log("Skipping to next test item...", "TEST")